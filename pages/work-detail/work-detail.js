@@ -126,10 +126,10 @@ Page({
     }
   },
 
-  // 加载相关推荐
+  // 加载相关推荐（看了又看，后端没有记录时返回相似内容）
   loadRelated: async function(categoryId) {
     try {
-      const res = await apiService.getSimilarRecommend(this.data.workId, 5)
+      const res = await apiService.getNextToRead(this.data.workId, 5)
       if (res.code === 0) {
         const related = res.data
           .filter(item => item.id !== parseInt(this.data.workId))
@@ -112,6 +112,7 @@ const API = {
     UPDATE_PREFERENCE: '/recommend/preference',
     GET_HOT: '/recommend/hot',
     GET_SIMILAR: '/recommend/similar',  // 新增相似推荐接口
+    GET_NEXT: '/recommend/next',  // 看了又看（没有记录时返回相似内容）
     REFRESH: '/recommend/refresh'  // 新增刷新推荐接口
   }
 }
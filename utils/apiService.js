@@ -347,6 +347,16 @@ class ApiService {
     return await api.get(api.API.RECOMMEND.GET_SIMILAR + '/' + cultureId, { limit })
   }
 
+  /**
+   * 获取“接着看”推荐（看了又看，没有记录时由后端用相似内容补齐）
+   */
+  async getNextToRead(cultureId, limit = 5) {
+    if (this.useMock) {
+      return await mockApi.getRecommend(1, limit)
+    }
+    return await api.get(api.API.RECOMMEND.GET_NEXT + '/' + cultureId, { limit })
+  }
+
   /**
    * 刷新推荐系统
    */
@@ -13,6 +13,7 @@ migrate = Migrate()
 def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config['CONFIG_NAME'] = config_name
     
     # CORS配置 - 允许所有来源
     CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
@@ -30,11 +31,17 @@ def create_app(config_name='default'):
     from app.routes.culture import culture_bp
     from app.routes.interaction import interaction_bp
     from app.routes.recommend import recommend_bp
+    from app.routes.jobs import jobs_bp
+    from app.services.jobs import job_manager
     
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(culture_bp, url_prefix='/api')
     app.register_blueprint(interaction_bp, url_prefix='/api')
     app.register_blueprint(recommend_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api')
+
+    # 后台任务（内容刷新、推荐模型重建）在应用上下文中执行
+    job_manager.init_app(app)
     
     # 静态文件服务 - 提供图片访问
     @app.route('/images/<path:filename>')
@@ -15,13 +15,14 @@ class Category(db.Model):
     
     cultures = db.relationship('Culture', backref='category', lazy='dynamic')
     
-    def to_dict(self):
+    def to_dict(self, count=None):
+        """count 为该分类下的上架内容数，未提供时单独查询"""
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'icon': self.icon,
-            'count': self.cultures.count()
+            'count': count if count is not None else self.cultures.filter_by(status=1).count()
         }
 
 
@@ -68,3 +69,30 @@ class Culture(db.Model):
             'shareCount': self.share_count,
             'createTime': self.created_at.strftime('%Y-%m-%d') if self.created_at else None
         }
+
+    @classmethod
+    def list_columns(cls):
+        """列表接口需要读取的列（不含 description、images 等大字段）
+
+        包含游标分页的排序列（score、created_at、id），生成 nextCursor 时不会再逐行加载。
+        """
+        return (cls.id, cls.name, cls.category_id, cls.summary, cls.origin, cls.heritage_level, cls.cover_image,
+                cls.view_count, cls.like_count, cls.collect_count, cls.share_count, cls.score, cls.created_at)
+
+    def to_list_dict(self, category_name=None):
+        """列表接口的精简结构，分类名由调用方提供，不访问 category 关系"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'categoryId': self.category_id,
+            'category': category_name,
+            'summary': self.summary,
+            'origin': self.origin,
+            'heritageLevel': self.heritage_level,
+            'image': self.cover_image,
+            'viewCount': self.view_count,
+            'likeCount': self.like_count,
+            'collectCount': self.collect_count,
+            'shareCount': self.share_count,
+            'createTime': self.created_at.strftime('%Y-%m-%d') if self.created_at else None
+        }
@@ -0,0 +1,17 @@
+from datetime import datetime
+from app import db
+
+
+class UserRecommendation(db.Model):
+    """离线预计算的个性化推荐结果（每个用户一行）"""
+    __tablename__ = 'user_recommendations'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    algorithm = db.Column(db.String(20), nullable=False, default='hybrid')
+    # 推荐的内容ID，按推荐顺序以逗号分隔
+    culture_ids = db.Column(db.Text, nullable=False)
+    model_version = db.Column(db.String(50), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_culture_ids(self):
+        return [int(culture_id) for culture_id in self.culture_ids.split(',') if culture_id]
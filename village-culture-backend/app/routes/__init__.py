@@ -2,5 +2,6 @@ from app.routes.auth import auth_bp
 from app.routes.culture import culture_bp
 from app.routes.interaction import interaction_bp
 from app.routes.recommend import recommend_bp
+from app.routes.jobs import jobs_bp
 
-__all__ = ['auth_bp', 'culture_bp', 'interaction_bp', 'recommend_bp']
+__all__ = ['auth_bp', 'culture_bp', 'interaction_bp', 'recommend_bp', 'jobs_bp']
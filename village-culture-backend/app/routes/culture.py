@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
-from app.models import db, Culture, Category
-from sqlalchemy import or_
+from app.models import db, Culture
+from app.services.jobs import job_manager, JobQueueFull
+from app.services.leaderboard import hot_leaderboard
+from app.services.search import search_index
+from app.services.suggest import suggest_index
+from app.services.categories import category_cache
+from app.services.listing import culture_query, to_list
+from app.services.pagination import paginate, page_params, encode_cursor, decode_cursor, InvalidCursor
 from loguru import logger
 
 culture_bp = Blueprint('culture', __name__)
@@ -8,7 +14,7 @@ culture_bp = Blueprint('culture', __name__)
 @culture_bp.route('/content/banners', methods=['GET'])
 def get_banners():
     try:
-        banners = Culture.query.filter_by(is_recommend=True, status=1).order_by(Culture.score.desc()).limit(5).all()
+        banners = culture_query().filter_by(is_recommend=True, status=1).order_by(Culture.score.desc()).limit(5).all()
         result = [{'id': item.id, 'image': item.cover_image, 'title': item.name, 'link': f'/pages/work-detail/work-detail?id={item.id}'} for item in banners]
         return jsonify({'code': 0, 'message': 'success', 'data': result})
     except Exception as e:
@@ -18,11 +24,13 @@ def get_banners():
 @culture_bp.route('/content/recommend', methods=['GET'])
 def get_recommend():
     try:
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('pageSize', 20, type=int)
-        pagination = Culture.query.filter_by(status=1, is_recommend=True).order_by(Culture.score.desc(), Culture.created_at.desc()).paginate(page=page, per_page=page_size, error_out=False)
-        result = {'list': [item.to_dict() for item in pagination.items], 'total': pagination.total, 'page': page, 'pageSize': page_size, 'hasMore': pagination.has_next}
-        return jsonify({'code': 0, 'message': 'success', 'data': result})
+        page, page_size, cursor, with_total = page_params()
+        query = culture_query().filter_by(status=1, is_recommend=True)
+        order = [(Culture.score, True), (Culture.created_at, True), (Culture.id, True)]
+        result = paginate(query, order, page_size, cursor, page, with_total, count_key='recommend')
+        return jsonify({'code': 0, 'message': 'success', 'data': result.to_dict(page_size, to_list(result.items))})
+    except InvalidCursor:
+        return jsonify({'code': 400, 'message': '无效的游标'}), 400
     except Exception as e:
         logger.error(f'获取推荐内容失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
@@ -30,11 +38,13 @@ def get_recommend():
 @culture_bp.route('/content/latest', methods=['GET'])
 def get_latest():
     try:
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('pageSize', 20, type=int)
-        pagination = Culture.query.filter_by(status=1).order_by(Culture.created_at.desc()).paginate(page=page, per_page=page_size, error_out=False)
-        result = {'list': [item.to_dict() for item in pagination.items], 'total': pagination.total, 'page': page, 'pageSize': page_size, 'hasMore': pagination.has_next}
-        return jsonify({'code': 0, 'message': 'success', 'data': result})
+        page, page_size, cursor, with_total = page_params()
+        query = culture_query().filter_by(status=1)
+        order = [(Culture.created_at, True), (Culture.id, True)]
+        result = paginate(query, order, page_size, cursor, page, with_total, count_key='latest')
+        return jsonify({'code': 0, 'message': 'success', 'data': result.to_dict(page_size, to_list(result.items))})
+    except InvalidCursor:
+        return jsonify({'code': 400, 'message': '无效的游标'}), 400
     except Exception as e:
         logger.error(f'获取最新内容失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
@@ -47,6 +57,12 @@ def get_detail(id):
             return jsonify({'code': 404, 'message': '内容不存在'}), 404
         culture.view_count += 1
         db.session.commit()
+        # 浏览量已提交，排行榜的更新失败只记录日志，不影响详情返回；
+        # 趋势只统计写入用户行为的浏览（add-history），不在这里计数
+        try:
+            hot_leaderboard.update(culture)
+        except Exception as e:
+            logger.warning(f'更新热门排行失败: {str(e)}')
         return jsonify({'code': 0, 'message': 'success', 'data': culture.to_dict()})
     except Exception as e:
         logger.error(f'获取内容详情失败: {str(e)}')
@@ -56,37 +72,54 @@ def get_detail(id):
 def search():
     try:
         keyword = request.args.get('keyword', '')
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('pageSize', 20, type=int)
+        page, page_size, cursor, _ = page_params()
         
         if not keyword:
             return jsonify({'code': 400, 'message': '关键词不能为空'}), 400
         
-        # 分页搜索
-        query = Culture.query.filter(
-            Culture.status == 1, 
-            or_(Culture.name.contains(keyword), Culture.description.contains(keyword))
-        ).order_by(Culture.score.desc())
-        
-        pagination = query.paginate(page=page, per_page=page_size, error_out=False)
-        
+        # 倒排索引检索（BM25 + 内容分数），只查询当前页的内容；
+        # 检索在内存中完成，总数不需要额外查询，游标即结果中的偏移
+        offset = (page - 1) * page_size
+        if cursor:
+            offset = decode_cursor(cursor, [int])[0]
+            if offset < 0:
+                raise InvalidCursor(cursor)
+        culture_ids, total = search_index.search(keyword, offset=offset, limit=page_size)
+        cultures = {c.id: c for c in culture_query().filter(Culture.id.in_(culture_ids), Culture.status == 1).all()}
+
+        has_more = offset + page_size < total
         result = {
-            'list': [item.to_dict() for item in pagination.items],
-            'total': pagination.total,
-            'page': page,
+            'list': to_list(cultures[cid] for cid in culture_ids if cid in cultures),
+            'total': total,
             'pageSize': page_size,
-            'hasMore': pagination.has_next
+            'hasMore': has_more,
+            'nextCursor': encode_cursor([offset + page_size]) if has_more else None
         }
+        if cursor is None:
+            result['page'] = page
         return jsonify({'code': 0, 'message': 'success', 'data': result})
+    except InvalidCursor:
+        return jsonify({'code': 400, 'message': '无效的游标'}), 400
     except Exception as e:
         logger.error(f'搜索失败: {str(e)}')
         return jsonify({'code': 500, 'message': '搜索失败'}), 500
 
+@culture_bp.route('/content/suggest', methods=['GET'])
+def suggest():
+    """搜索框输入联想：按名称、产地、分类名（支持全拼和拼音首字母）前缀匹配"""
+    try:
+        keyword = request.args.get('keyword', '')
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        return jsonify({'code': 0, 'message': 'success', 'data': suggest_index.suggest(keyword, limit)})
+    except Exception as e:
+        logger.error(f'输入联想失败: {str(e)}')
+        return jsonify({'code': 500, 'message': '获取失败'}), 500
+
 @culture_bp.route('/content/categories', methods=['GET'])
 def get_categories():
     try:
-        categories = Category.query.filter_by(is_active=True).order_by(Category.sort_order).all()
-        return jsonify({'code': 0, 'message': 'success', 'data': [cat.to_dict() for cat in categories]})
+        # 分类及其上架内容数来自缓存（一次分组查询加载）
+        return jsonify({'code': 0, 'message': 'success', 'data': category_cache.active()})
     except Exception as e:
         logger.error(f'获取分类失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
@@ -94,50 +127,56 @@ def get_categories():
 @culture_bp.route('/content/category/<int:category_id>', methods=['GET'])
 def get_by_category(category_id):
     try:
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('pageSize', 20, type=int)
-        pagination = Culture.query.filter_by(category_id=category_id, status=1).order_by(Culture.score.desc()).paginate(page=page, per_page=page_size, error_out=False)
-        result = {'list': [item.to_dict() for item in pagination.items], 'total': pagination.total, 'page': page, 'pageSize': page_size, 'hasMore': pagination.has_next}
-        return jsonify({'code': 0, 'message': 'success', 'data': result})
+        page, page_size, cursor, with_total = page_params()
+        query = culture_query().filter_by(category_id=category_id, status=1)
+        order = [(Culture.score, True), (Culture.id, True)]
+        result = paginate(query, order, page_size, cursor, page, with_total, count_key=f'category:{category_id}')
+        return jsonify({'code': 0, 'message': 'success', 'data': result.to_dict(page_size, to_list(result.items))})
+    except InvalidCursor:
+        return jsonify({'code': 400, 'message': '无效的游标'}), 400
     except Exception as e:
         logger.error(f'获取分类内容失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
 
+def _refresh_content(job):
+    """后台任务：爬取并导入新内容，再更新推荐分数"""
+    from scripts.crawler import CultureCrawler
+    from scripts.import_data import import_to_database
+    from app.services.recommender import recommender
+    import os
+
+    # 获取项目根目录
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    upload_folder = os.path.join(project_root, 'uploads')
+
+    # 执行爬虫
+    job.update(0.05, '正在爬取数据')
+    crawler = CultureCrawler(upload_folder=upload_folder)
+    data_list = crawler.crawl_all()
+    if not data_list:
+        job.update(message='没有新数据')
+        return {'crawled': 0, 'imported': 0}
+
+    # 导入数据库
+    job.update(0.6, f'正在导入 {len(data_list)} 条数据')
+    imported = import_to_database(data_list)
+
+    # 更新推荐系统分数
+    job.update(0.9, '正在更新内容分数')
+    recommender.update_scores()
+    job.update(message='完成')
+    return {'crawled': len(data_list), 'imported': imported}
+
+
 # 新增：刷新内容（重新爬取数据）
 @culture_bp.route('/content/refresh', methods=['POST'])
 def refresh_content():
-    """刷新内容数据"""
+    """刷新内容数据（提交后台任务，通过 /api/jobs/<id> 查询进度）"""
     try:
-        from scripts.crawler import CultureCrawler
-        from scripts.import_data import import_to_database
-        import os
-        
-        # 获取项目根目录
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        upload_folder = os.path.join(project_root, 'uploads')
-        
-        # 执行爬虫
-        crawler = CultureCrawler(upload_folder=upload_folder)
-        data_list = crawler.crawl_all()
-        
-        if data_list:
-            # 导入数据库
-            imported = import_to_database(data_list)
-            
-            # 更新推荐系统分数
-            from app.services.recommender import recommender
-            recommender.update_scores()
-            
-            return jsonify({
-                'code': 0, 
-                'message': 'success',
-                'data': {
-                    'crawled': len(data_list),
-                    'imported': imported
-                }
-            })
-        else:
-            return jsonify({'code': 0, 'message': '没有新数据', 'data': {'crawled': 0, 'imported': 0}})
+        job, created = job_manager.submit('content_refresh', _refresh_content)
+        return jsonify({'code': 0, 'message': 'success' if created else '任务正在执行', 'data': job.to_dict()})
+    except JobQueueFull:
+        return jsonify({'code': 429, 'message': '任务队列已满，请稍后再试'}), 429
     except Exception as e:
         logger.error(f'刷新内容失败: {str(e)}')
         return jsonify({'code': 500, 'message': '刷新失败'}), 500
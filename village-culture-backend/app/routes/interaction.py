@@ -2,6 +2,15 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request, get_jwt
 from functools import wraps
 from app.models import db, Culture, Like, Collect, ViewHistory, UserBehavior
+from app.services.cache import recommendation_cache
+from app.services.precompute import invalidate_precomputed
+from app.services.leaderboard import hot_leaderboard
+from app.services.trending import trending
+from app.services.transitions import transition_model
+from app.services.profiles import user_profiles
+from app.services.pagination import paginate, page_params, InvalidCursor
+from app.services.categories import category_cache
+from app.services.listing import culture_query
 from loguru import logger
 
 interaction_bp = Blueprint('interaction', __name__)
@@ -37,6 +46,29 @@ def get_current_user_id():
         logger.warning(f'获取用户ID失败: {str(e)}')
         return None
 
+def notify_interaction(user_id, culture_id, behavior_type, culture=None):
+    """用户互动提交后的处理：使该用户的推荐缓存失效，更新用户画像、浏览转移、热门排行榜和实时趋势
+
+    在互动已提交后调用，自身的失败只记录日志，不影响接口返回。
+    """
+    try:
+        recommendation_cache.invalidate_user(user_id)
+        # 点赞、收藏后删除预计算结果；浏览和取消操作保留，结果在 PRECOMPUTE_MAX_AGE_MINUTES 后过期
+        if behavior_type in ('like', 'collect'):
+            invalidate_precomputed(user_id)
+        # 只有写入了用户行为的互动才计入画像和趋势（取消点赞/收藏不删除行为记录），
+        # 与趋势计数启动时从 user_behaviors 回填的口径一致
+        if behavior_type in ('view', 'like', 'collect'):
+            user_profiles.record(user_id, culture_id, culture.category_id if culture else None, behavior_type)
+            trending.record(culture_id, behavior_type)
+        if behavior_type == 'view':
+            transition_model.record(user_id, culture_id)
+        if culture is not None:
+            hot_leaderboard.update(culture)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'互动后续处理失败: {str(e)}')
+
 @interaction_bp.route('/interaction/like', methods=['POST'])
 @jwt_required()
 def like():
@@ -56,6 +88,7 @@ def like():
         behavior = UserBehavior(user_id=user_id, culture_id=culture_id, behavior_type='like', weight=2.0)
         db.session.add(behavior)
         db.session.commit()
+        notify_interaction(user_id, culture_id, 'like', culture)
         return jsonify({'code': 0, 'message': 'success', 'data': {'likeCount': culture.like_count if culture else 0}})
     except Exception as e:
         db.session.rollback()
@@ -77,6 +110,7 @@ def unlike():
         if culture and culture.like_count > 0:
             culture.like_count -= 1
         db.session.commit()
+        notify_interaction(user_id, culture_id, 'unlike', culture)
         return jsonify({'code': 0, 'message': 'success', 'data': {'likeCount': culture.like_count if culture else 0}})
     except Exception as e:
         db.session.rollback()
@@ -102,6 +136,7 @@ def collect():
         behavior = UserBehavior(user_id=user_id, culture_id=culture_id, behavior_type='collect', weight=3.0)
         db.session.add(behavior)
         db.session.commit()
+        notify_interaction(user_id, culture_id, 'collect', culture)
         return jsonify({'code': 0, 'message': 'success', 'data': {'collectCount': culture.collect_count if culture else 0}})
     except Exception as e:
         db.session.rollback()
@@ -123,6 +158,7 @@ def uncollect():
         if culture and culture.collect_count > 0:
             culture.collect_count -= 1
         db.session.commit()
+        notify_interaction(user_id, culture_id, 'uncollect', culture)
         return jsonify({'code': 0, 'message': 'success', 'data': {'collectCount': culture.collect_count if culture else 0}})
     except Exception as e:
         db.session.rollback()
@@ -161,6 +197,7 @@ def add_history():
         db.session.add(behavior)
         
         db.session.commit()
+        notify_interaction(user_id, culture_id, 'view', culture)
         return jsonify({'code': 0, 'message': 'success'})
     except Exception as e:
         db.session.rollback()
@@ -177,34 +214,29 @@ def get_likes():
         if not user_id:
             return jsonify({'code': 0, 'message': 'success', 'data': {'list': [], 'total': 0, 'page': 1, 'pageSize': 20, 'hasMore': False}})
         
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('pageSize', 20, type=int)
+        page, page_size, cursor, with_total = page_params()
         
         # 查询用户点赞记录
-        likes_query = Like.query.filter_by(user_id=user_id).order_by(Like.created_at.desc())
-        pagination = likes_query.paginate(page=page, per_page=page_size, error_out=False)
+        likes_query = Like.query.filter_by(user_id=user_id)
+        pagination = paginate(likes_query, [(Like.created_at, True), (Like.id, True)], page_size, cursor, page, with_total)
         
         # 获取对应的文化内容
         culture_ids = [like.culture_id for like in pagination.items]
-        cultures = Culture.query.filter(Culture.id.in_(culture_ids)).all()
+        cultures = culture_query().filter(Culture.id.in_(culture_ids)).all()
         culture_dict = {c.id: c for c in cultures}
+        category_names = category_cache.names()
         
         result_list = []
         for like in pagination.items:
             culture = culture_dict.get(like.culture_id)
             if culture:
-                item = culture.to_dict()
+                item = culture.to_list_dict(category_names.get(culture.category_id))
                 item['likedAt'] = like.created_at.strftime('%Y-%m-%d %H:%M:%S') if like.created_at else None
                 result_list.append(item)
         
-        result = {
-            'list': result_list,
-            'total': pagination.total,
-            'page': page,
-            'pageSize': page_size,
-            'hasMore': pagination.has_next
-        }
-        return jsonify({'code': 0, 'message': 'success', 'data': result})
+        return jsonify({'code': 0, 'message': 'success', 'data': pagination.to_dict(page_size, result_list)})
+    except InvalidCursor:
+        return jsonify({'code': 400, 'message': '无效的游标'}), 400
     except Exception as e:
         logger.error(f'获取点赞列表失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
@@ -219,34 +251,29 @@ def get_collects():
         if not user_id:
             return jsonify({'code': 0, 'message': 'success', 'data': {'list': [], 'total': 0, 'page': 1, 'pageSize': 20, 'hasMore': False}})
         
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('pageSize', 20, type=int)
+        page, page_size, cursor, with_total = page_params()
         
         # 查询用户收藏记录
-        collects_query = Collect.query.filter_by(user_id=user_id).order_by(Collect.created_at.desc())
-        pagination = collects_query.paginate(page=page, per_page=page_size, error_out=False)
+        collects_query = Collect.query.filter_by(user_id=user_id)
+        pagination = paginate(collects_query, [(Collect.created_at, True), (Collect.id, True)], page_size, cursor, page, with_total)
         
         # 获取对应的文化内容
         culture_ids = [collect.culture_id for collect in pagination.items]
-        cultures = Culture.query.filter(Culture.id.in_(culture_ids)).all()
+        cultures = culture_query().filter(Culture.id.in_(culture_ids)).all()
         culture_dict = {c.id: c for c in cultures}
+        category_names = category_cache.names()
         
         result_list = []
         for collect in pagination.items:
             culture = culture_dict.get(collect.culture_id)
             if culture:
-                item = culture.to_dict()
+                item = culture.to_list_dict(category_names.get(culture.category_id))
                 item['collectedAt'] = collect.created_at.strftime('%Y-%m-%d %H:%M:%S') if collect.created_at else None
                 result_list.append(item)
         
-        result = {
-            'list': result_list,
-            'total': pagination.total,
-            'page': page,
-            'pageSize': page_size,
-            'hasMore': pagination.has_next
-        }
-        return jsonify({'code': 0, 'message': 'success', 'data': result})
+        return jsonify({'code': 0, 'message': 'success', 'data': pagination.to_dict(page_size, result_list)})
+    except InvalidCursor:
+        return jsonify({'code': 400, 'message': '无效的游标'}), 400
     except Exception as e:
         logger.error(f'获取收藏列表失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
@@ -261,34 +288,29 @@ def get_history():
         if not user_id:
             return jsonify({'code': 0, 'message': 'success', 'data': {'list': [], 'total': 0, 'page': 1, 'pageSize': 20, 'hasMore': False}})
         
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('pageSize', 20, type=int)
+        page, page_size, cursor, with_total = page_params()
         
         # 查询用户浏览历史
-        history_query = ViewHistory.query.filter_by(user_id=user_id).order_by(ViewHistory.created_at.desc())
-        pagination = history_query.paginate(page=page, per_page=page_size, error_out=False)
+        history_query = ViewHistory.query.filter_by(user_id=user_id)
+        pagination = paginate(history_query, [(ViewHistory.created_at, True), (ViewHistory.id, True)], page_size, cursor, page, with_total)
         
         # 获取对应的文化内容
         culture_ids = [h.culture_id for h in pagination.items]
-        cultures = Culture.query.filter(Culture.id.in_(culture_ids)).all()
+        cultures = culture_query().filter(Culture.id.in_(culture_ids)).all()
         culture_dict = {c.id: c for c in cultures}
+        category_names = category_cache.names()
         
         result_list = []
         for history in pagination.items:
             culture = culture_dict.get(history.culture_id)
             if culture:
-                item = culture.to_dict()
+                item = culture.to_list_dict(category_names.get(culture.category_id))
                 item['viewedAt'] = history.created_at.strftime('%Y-%m-%d %H:%M:%S') if history.created_at else None
                 result_list.append(item)
         
-        result = {
-            'list': result_list,
-            'total': pagination.total,
-            'page': page,
-            'pageSize': page_size,
-            'hasMore': pagination.has_next
-        }
-        return jsonify({'code': 0, 'message': 'success', 'data': result})
+        return jsonify({'code': 0, 'message': 'success', 'data': pagination.to_dict(page_size, result_list)})
+    except InvalidCursor:
+        return jsonify({'code': 400, 'message': '无效的游标'}), 400
     except Exception as e:
         logger.error(f'获取浏览历史失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from app.services.jobs import job_manager
+from loguru import logger
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """查询后台任务的状态、进度和耗时"""
+    try:
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({'code': 404, 'message': '任务不存在'}), 404
+        return jsonify({'code': 0, 'message': 'success', 'data': job.to_dict()})
+    except Exception as e:
+        logger.error(f'获取任务状态失败: {str(e)}')
+        return jsonify({'code': 500, 'message': '获取失败'}), 500
+
+@jobs_bp.route('/jobs', methods=['GET'])
+@jwt_required()
+def list_jobs():
+    """最近的后台任务列表"""
+    try:
+        return jsonify({'code': 0, 'message': 'success', 'data': [job.to_dict() for job in job_manager.recent()]})
+    except Exception as e:
+        logger.error(f'获取任务列表失败: {str(e)}')
+        return jsonify({'code': 500, 'message': '获取失败'}), 500
@@ -1,8 +1,15 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from functools import wraps
 from app.models import Culture, UserBehavior, Like, Collect, ViewHistory, db
-from app.services.recommender import recommender, get_personal_recommendations
+from app.services.recommender import recommender, get_personal_recommendations, save_model_snapshot
+from app.services.cache import recommendation_cache
+from app.services.content_index import content_index
+from app.services.jobs import job_manager, JobQueueFull
+from app.services.leaderboard import hot_leaderboard
+from app.services.trending import trending
+from app.services.transitions import transition_model
+from app.services.listing import culture_query, to_list
 from loguru import logger
 from collections import Counter
 
@@ -37,6 +44,14 @@ def get_current_user_id():
         logger.warning(f'获取用户ID失败: {str(e)}')
         return None
 
+def _cultures_in_order(culture_ids):
+    """按给定ID顺序获取上架内容"""
+    if not culture_ids:
+        return []
+    cultures = culture_query().filter(Culture.id.in_(culture_ids), Culture.status == 1).all()
+    culture_dict = {c.id: c for c in cultures}
+    return [culture_dict[cid] for cid in culture_ids if cid in culture_dict]
+
 @recommend_bp.route('/recommend/personal', methods=['GET'])
 @optional_jwt
 def get_personal_recommend():
@@ -44,34 +59,27 @@ def get_personal_recommend():
     try:
         user_id = get_current_user_id()
         page_size = request.args.get('pageSize', 10, type=int)
+        algorithm = request.args.get('algorithm', current_app.config.get('RECOMMEND_ALGORITHM', 'hybrid'))
+        if algorithm not in ('hybrid', 'als'):
+            algorithm = 'hybrid'
 
         # 如果未登录，返回热门内容
         if not user_id:
-            hot_cultures = Culture.query.filter_by(status=1).order_by(
-                Culture.view_count.desc(),
-                Culture.like_count.desc()
-            ).limit(page_size).all()
-            return jsonify({'code': 0, 'message': 'success', 'data': [item.to_dict() for item in hot_cultures]})
+            hot_cultures = _cultures_in_order(hot_leaderboard.top(page_size))
+            return jsonify({'code': 0, 'message': 'success', 'data': to_list(hot_cultures)})
 
         # 使用推荐系统获取推荐内容ID列表
-        recommended_ids = get_personal_recommendations(user_id, n=page_size)
+        recommended_ids = get_personal_recommendations(user_id, n=page_size, algorithm=algorithm)
 
         if not recommended_ids:
             # 如果没有推荐结果，返回热门内容
-            hot_cultures = Culture.query.filter_by(status=1).order_by(
-                Culture.view_count.desc(),
-                Culture.like_count.desc()
-            ).limit(page_size).all()
-            return jsonify({'code': 0, 'message': 'success', 'data': [item.to_dict() for item in hot_cultures]})
-
-        # 获取推荐的文化内容
-        cultures = Culture.query.filter(Culture.id.in_(recommended_ids), Culture.status == 1).all()
+            hot_cultures = _cultures_in_order(hot_leaderboard.top(page_size))
+            return jsonify({'code': 0, 'message': 'success', 'data': to_list(hot_cultures)})
 
-        # 按推荐顺序排序
-        culture_dict = {c.id: c for c in cultures}
-        sorted_cultures = [culture_dict[cid] for cid in recommended_ids if cid in culture_dict]
+        # 获取推荐的文化内容（按推荐顺序）
+        sorted_cultures = _cultures_in_order(recommended_ids)
 
-        return jsonify({'code': 0, 'message': 'success', 'data': [item.to_dict() for item in sorted_cultures]})
+        return jsonify({'code': 0, 'message': 'success', 'data': to_list(sorted_cultures)})
     except Exception as e:
         logger.error(f'个性化推荐失败: {str(e)}')
         return jsonify({'code': 500, 'message': '推荐失败'}), 500
@@ -81,15 +89,51 @@ def get_hot_recommend():
     """获取热门推荐"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        hot_cultures = Culture.query.filter_by(status=1).order_by(
-            Culture.view_count.desc(), 
-            Culture.like_count.desc()
-        ).limit(limit).all()
-        return jsonify({'code': 0, 'message': 'success', 'data': [item.to_dict() for item in hot_cultures]})
+        category_id = request.args.get('categoryId', type=int)
+        hot_cultures = _cultures_in_order(hot_leaderboard.top(limit, category_id))
+        return jsonify({'code': 0, 'message': 'success', 'data': to_list(hot_cultures)})
     except Exception as e:
         logger.error(f'获取热门推荐失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
 
+@recommend_bp.route('/recommend/next/<int:culture_id>', methods=['GET'])
+def get_next_to_read(culture_id):
+    """详情页“接着看”：浏览该内容的用户接下来最常浏览的内容，没有记录时返回相似内容"""
+    try:
+        limit = request.args.get('limit', 5, type=int)
+        next_ids = transition_model.next_items(culture_id, limit)
+        if len(next_ids) < limit:
+            next_ids += [cid for cid in content_index.similar(culture_id, limit) or [] if cid not in next_ids]
+        cultures = _cultures_in_order(next_ids[:limit])
+        return jsonify({'code': 0, 'message': 'success', 'data': to_list(cultures)})
+    except Exception as e:
+        logger.error(f'获取接着看推荐失败: {str(e)}')
+        return jsonify({'code': 500, 'message': '获取失败'}), 500
+
+@recommend_bp.route('/recommend/trending', methods=['GET'])
+def get_trending_recommend():
+    """获取实时趋势内容（最近互动速度明显上升的内容），不足时用热门内容补齐"""
+    try:
+        limit = request.args.get('limit', 10, type=int)
+        ranked = trending.top(limit)
+        trending_scores = {culture_id: score for culture_id, score, _ in ranked}
+        culture_ids = [culture_id for culture_id, _, _ in ranked]
+        if len(culture_ids) < limit:
+            culture_ids += [cid for cid in hot_leaderboard.top(limit * 2) if cid not in trending_scores]
+        data = to_list(_cultures_in_order(culture_ids)[:limit])
+        for item in data:
+            item['trendingScore'] = round(trending_scores.get(item['id'], 0.0), 3)
+        return jsonify({'code': 0, 'message': 'success', 'data': data})
+    except Exception as e:
+        logger.error(f'获取趋势内容失败: {str(e)}')
+        return jsonify({'code': 500, 'message': '获取失败'}), 500
+
+@recommend_bp.route('/recommend/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """获取推荐结果缓存命中统计"""
+    return jsonify({'code': 0, 'message': 'success', 'data': recommendation_cache.stats()})
+
 @recommend_bp.route('/recommend/preference', methods=['POST'])
 @jwt_required()
 def update_preference():
@@ -108,46 +152,52 @@ def get_similar(culture_id):
     try:
         limit = request.args.get('limit', 5, type=int)
         
+        # 优先从内容相似度索引读取预先计算的近邻
+        similar_ids = content_index.similar(culture_id, limit)
+        if similar_ids:
+            sorted_cultures = _cultures_in_order(similar_ids)
+            return jsonify({'code': 0, 'message': 'success', 'data': to_list(sorted_cultures)})
+
         # 获取当前内容
         culture = Culture.query.get(culture_id)
         if not culture:
             return jsonify({'code': 404, 'message': '内容不存在'}), 404
         
-        # 基于分类推荐相似内容
-        similar_cultures = Culture.query.filter(
+        # 索引中没有该内容时，基于分类推荐相似内容
+        similar_cultures = culture_query().filter(
             Culture.category_id == culture.category_id,
             Culture.id != culture_id,
             Culture.status == 1
         ).order_by(Culture.score.desc()).limit(limit).all()
         
-        return jsonify({'code': 0, 'message': 'success', 'data': [item.to_dict() for item in similar_cultures]})
+        return jsonify({'code': 0, 'message': 'success', 'data': to_list(similar_cultures)})
     except Exception as e:
         logger.error(f'获取相似推荐失败: {str(e)}')
         return jsonify({'code': 500, 'message': '获取失败'}), 500
 
+def _rebuild_recommender(job):
+    """后台任务：全量重建推荐模型并更新内容分数"""
+    job.update(0.05, '正在构建推荐模型')
+    recommender.build_model()
+    job.update(0.8, '正在更新内容分数')
+    stats = recommender.update_scores()
+    # 写入快照，其它 worker 切换到新模型，本进程也不会被旧快照替换
+    job.update(0.95, '正在保存模型快照')
+    save_model_snapshot()
+    job.update(message='完成')
+    return {'users': len(recommender.user_item_matrix), 'items': len(recommender.item_similarity),
+            'scoresUpdated': stats['updated']}
+
+
 @recommend_bp.route('/recommend/refresh', methods=['POST'])
 @jwt_required()
 def refresh_recommendations():
-    """刷新推荐系统"""
+    """刷新推荐系统（提交后台任务，通过 /api/jobs/<id> 查询进度）"""
     try:
-        user_id = get_jwt_identity()
-        
-        # 重新构建用户-物品矩阵
-        recommender.build_user_item_matrix()
-        recommender.calculate_item_similarity()
-        recommender.update_scores()
-        
-        # 获取新的推荐
-        recommended_ids = get_personal_recommendations(user_id, n=10)
-        cultures = Culture.query.filter(Culture.id.in_(recommended_ids), Culture.status == 1).all()
-        culture_dict = {c.id: c for c in cultures}
-        sorted_cultures = [culture_dict[cid] for cid in recommended_ids if cid in culture_dict]
-        
-        return jsonify({
-            'code': 0, 
-            'message': 'success', 
-            'data': [item.to_dict() for item in sorted_cultures]
-        })
+        job, created = job_manager.submit('recommend_refresh', _rebuild_recommender)
+        return jsonify({'code': 0, 'message': 'success' if created else '任务正在执行', 'data': job.to_dict()})
+    except JobQueueFull:
+        return jsonify({'code': 429, 'message': '任务队列已满，请稍后再试'}), 429
     except Exception as e:
         logger.error(f'刷新推荐失败: {str(e)}')
         return jsonify({'code': 500, 'message': '刷新失败'}), 500
@@ -0,0 +1,87 @@
+"""
+推荐结果缓存
+按用户缓存推荐结果（用户下再按 (数量, 算法) 区分），支持TTL过期和LRU淘汰
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+class RecommendationCache:
+    """带TTL的LRU缓存，可按用户失效"""
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._user_keys = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id, params):
+        """读取缓存，未命中或已过期返回 None"""
+        key = (user_id, params)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, user_id, params, value):
+        key = (user_id, params)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        """用户产生新行为后使其缓存失效"""
+        with self._lock:
+            for key in self._user_keys.pop(user_id, set()):
+                self._data.pop(key, None)
+
+    def clear(self):
+        """推荐模型重建后清空全部缓存"""
+        with self._lock:
+            self._data.clear()
+            self._user_keys.clear()
+
+    def _remove(self, key):
+        self._data.pop(key, None)
+        keys = self._user_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[key[0]]
+
+    def stats(self):
+        """缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+# 全局个性化推荐结果缓存
+recommendation_cache = RecommendationCache()
@@ -0,0 +1,94 @@
+"""
+分类缓存
+分类列表和每个分类下的上架内容数用一次分组查询加载后缓存，首页读取分类时不再逐个分类 COUNT。
+本进程内新增、删除内容或修改内容的状态、分类，以及修改分类后，缓存在提交时自动失效；
+其它进程（如导入脚本）的修改在 TTL 到期后同步。
+"""
+import time
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event, and_, func, inspect
+from sqlalchemy.orm import Session
+
+from app.models import db, Culture, Category
+
+
+class CategoryCache:
+    """分类列表与内容数缓存"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._active = []
+        self._names = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """一次查询加载全部分类及其上架内容数"""
+        rows = db.session.query(Category, func.count(Culture.id)).outerjoin(
+            Culture, and_(Culture.category_id == Category.id, Culture.status == 1)
+        ).group_by(Category.id).order_by(Category.sort_order, Category.id).all()
+
+        active = [category.to_dict(count) for category, count in rows if category.is_active]
+        names = {category.id: category.name for category, _ in rows}
+        with self._lock:
+            self._active = active
+            self._names = names
+            self._loaded_at = time.monotonic()
+        return len(rows)
+
+    def _ensure_fresh(self):
+        ttl = self.ttl
+        if has_app_context():
+            ttl = current_app.config.get('CATEGORY_CACHE_SECONDS', ttl)
+        if not self._loaded_at or time.monotonic() - self._loaded_at > ttl:
+            self.load()
+
+    def active(self):
+        """启用的分类（按 sort_order 排序），每项含上架内容数 count"""
+        self._ensure_fresh()
+        with self._lock:
+            return self._active
+
+    def names(self):
+        """分类ID到名称的映射（包括未启用的分类）"""
+        self._ensure_fresh()
+        with self._lock:
+            return self._names
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
+
+
+# 全局分类缓存
+category_cache = CategoryCache()
+
+
+def _affects_categories(obj):
+    if isinstance(obj, Category):
+        return True
+    if isinstance(obj, Culture):
+        state = inspect(obj)
+        return state.attrs.status.history.has_changes() or state.attrs.category_id.history.has_changes()
+    return False
+
+
+@event.listens_for(Session, 'before_flush')
+def _mark_changes(session, flush_context, instances):
+    """新增、删除内容或分类，或内容的状态、分类发生变化时标记，提交后使缓存失效"""
+    if any(isinstance(obj, (Culture, Category)) for obj in session.new) \
+            or any(isinstance(obj, (Culture, Category)) for obj in session.deleted) \
+            or any(_affects_categories(obj) for obj in session.dirty):
+        session.info['categories_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('categories_changed', False):
+        category_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('categories_changed', None)
@@ -0,0 +1,169 @@
+"""
+内容相似度索引
+对文化内容的名称、摘要、描述做 jieba 分词和 TF-IDF 向量化，
+预先计算每个内容的 Top-K 相似内容，供“相似推荐”直接从内存读取
+"""
+import re
+import time
+import threading
+import numpy as np
+from loguru import logger
+
+from app.models import db, Culture
+from app.services.neighbors import NeighborStore
+
+try:
+    import jieba
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from scipy import sparse
+    HAS_TFIDF = True
+except ImportError:
+    HAS_TFIDF = False
+    logger.warning('未安装jieba或scikit-learn，相似内容推荐将按分类查询')
+
+WORD_PATTERN = re.compile(r'\w')
+
+
+def tokenize(text):
+    """jieba 分词，去掉单字和标点"""
+    return [word for word in jieba.lcut(text) if len(word) > 1 and WORD_PATTERN.search(word)]
+
+
+def culture_text(name, summary, description):
+    """拼接用于向量化的文本，名称重复一次以提高权重"""
+    return ' '.join(filter(None, [name, name, summary, description]))
+
+
+class ContentIndex:
+    """TF-IDF 内容相似度索引"""
+
+    def __init__(self, k=20, block_size=1000, check_interval=60):
+        self.k = k
+        self.block_size = block_size
+        self.check_interval = check_interval
+        self.vectorizer = None
+        self.matrix = None
+        self.culture_ids = []
+        self.neighbors = NeighborStore(k=k)
+        self.max_culture_id = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_built(self):
+        return self.matrix is not None
+
+    def _load(self, min_id=0):
+        rows = db.session.query(
+            Culture.id, Culture.name, Culture.summary, Culture.description
+        ).filter(Culture.status == 1, Culture.id > min_id).order_by(Culture.id).all()
+        return [row.id for row in rows], [culture_text(row.name, row.summary, row.description) for row in rows]
+
+    def _top_k(self, rows, candidates, candidate_ids, exclude_self_offset=None):
+        """分块计算 rows 与 candidates 的余弦相似度，返回每行的 (ids, sims)"""
+        results = []
+        candidates_t = candidates.T.tocsc()
+        for start in range(0, rows.shape[0], self.block_size):
+            block = (rows[start:start + self.block_size] @ candidates_t).tocsr()
+            for offset in range(block.shape[0]):
+                begin, end = block.indptr[offset], block.indptr[offset + 1]
+                cols = block.indices[begin:end]
+                sims = block.data[begin:end]
+                if exclude_self_offset is not None:
+                    mask = cols != exclude_self_offset + start + offset
+                    cols, sims = cols[mask], sims[mask]
+                results.append((candidate_ids[cols], sims))
+        return results
+
+    def build(self):
+        """全量构建索引"""
+        if not HAS_TFIDF:
+            return False
+        start = time.perf_counter()
+        culture_ids, texts = self._load()
+        if not culture_ids:
+            return False
+
+        vectorizer = TfidfVectorizer(tokenizer=tokenize, lowercase=False, token_pattern=None,
+                                     max_df=0.5 if len(texts) > 10 else 1.0, sublinear_tf=True)
+        matrix = vectorizer.fit_transform(texts).tocsr()
+        ids = np.asarray(culture_ids)
+
+        neighbors = NeighborStore(k=self.k)
+        for culture_id, (similar_ids, sims) in zip(culture_ids, self._top_k(matrix, matrix, ids, 0)):
+            neighbors.set(culture_id, similar_ids, sims)
+
+        with self._lock:
+            self.vectorizer = vectorizer
+            self.matrix = matrix
+            self.culture_ids = culture_ids
+            self.neighbors = neighbors
+            self.max_culture_id = max(culture_ids)
+            self._checked_at = time.monotonic()
+        logger.info(f'✅ 内容相似度索引构建完成: {len(culture_ids)} 条内容, '
+                    f'词表 {len(vectorizer.vocabulary_)}, 耗时 {time.perf_counter() - start:.1f}s')
+        return True
+
+    def add_new(self):
+        """增量加入新导入的内容（沿用现有词表和IDF），返回新增条数"""
+        if not self.is_built:
+            return len(self.culture_ids) if self.build() else 0
+
+        culture_ids, texts = self._load(self.max_culture_id)
+        if not culture_ids:
+            return 0
+
+        with self._lock:
+            new_matrix = self.vectorizer.transform(texts).tocsr()
+            matrix = sparse.vstack([self.matrix, new_matrix]).tocsr()
+            all_ids = np.asarray(self.culture_ids + culture_ids)
+
+            # 新内容与全部内容比较，得到新内容的近邻
+            offset = len(self.culture_ids)
+            for culture_id, (similar_ids, sims) in zip(
+                    culture_ids, self._top_k(new_matrix, matrix, all_ids, offset)):
+                self.neighbors.set(culture_id, similar_ids, sims)
+
+            # 已有内容若与新内容足够相似，则并入其近邻列表
+            old_ids = np.asarray(self.culture_ids)
+            for new_id, (similar_ids, sims) in zip(culture_ids, self._top_k(new_matrix, self.matrix, old_ids)):
+                for old_id, sim in zip(similar_ids.tolist(), sims.tolist()):
+                    ids, values = self.neighbors.get(old_id)
+                    if len(ids) < self.k or sim > values[-1]:
+                        self.neighbors.set(old_id, np.append(ids, new_id), np.append(values, sim))
+
+            self.matrix = matrix
+            self.culture_ids = self.culture_ids + culture_ids
+            self.max_culture_id = max(culture_ids)
+
+        logger.info(f'内容相似度索引新增 {len(culture_ids)} 条内容')
+        return len(culture_ids)
+
+    def refresh(self):
+        """按检查间隔发现新导入的内容并增量加入
+
+        全量构建由 init_recommender 和定时任务完成，尚未构建时不在请求线程中构建。
+        """
+        if not self.is_built:
+            return
+        now = time.monotonic()
+        if self._checked_at and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        latest = db.session.query(db.func.max(Culture.id)).scalar() or 0
+        if latest > self.max_culture_id:
+            self.add_new()
+
+    def similar(self, culture_id, limit=5):
+        """获取相似内容ID列表；索引尚未构建或内容不在索引中时返回 None"""
+        if not HAS_TFIDF:
+            return None
+        self.refresh()
+        if culture_id not in self.neighbors:
+            return None
+        ids, _ = self.neighbors.get(culture_id)
+        return ids[:limit].tolist()
+
+
+# 全局内容相似度索引
+content_index = ContentIndex()
@@ -0,0 +1,49 @@
+"""
+行为权重的指数时间衰减
+一条行为在 t 时刻的权重为 w · 2^(-(t - t_行为) / 半衰期)。
+
+所有 (用户, 物品) 的衰减因子随时间同步变化，因此不必重新累加历史：
+以某个基准时刻 epoch 为参照，存储 S = Σ w · 2^((t_行为 - epoch) / 半衰期)，
+新行为只需加上自己的一项，读取时再整体乘以 2^(-(now - epoch) / 半衰期)。
+"""
+from datetime import datetime, date, timedelta
+
+SECONDS_PER_DAY = 86400.0
+# 存储值相对 epoch 的放大倍数超过此值时需要重新全量构建（避免浮点溢出/精度损失）
+MAX_GROWTH = 2.0 ** 64
+
+
+class TimeDecay:
+    """以 epoch 为基准维护的指数衰减；half_life_days 为空或 0 时不衰减"""
+
+    def __init__(self, half_life_days=None, epoch=None):
+        self.half_life_days = half_life_days or None
+        self.epoch = epoch or datetime.utcnow()
+
+    @property
+    def enabled(self):
+        return self.half_life_days is not None
+
+    def _exponent(self, when):
+        # 按天聚合的行为取当天正午
+        if isinstance(when, str):
+            when = datetime.strptime(when[:10], '%Y-%m-%d') + timedelta(hours=12)
+        elif isinstance(when, date) and not isinstance(when, datetime):
+            when = datetime(when.year, when.month, when.day, 12)
+        return (when - self.epoch).total_seconds() / SECONDS_PER_DAY / self.half_life_days
+
+    def growth(self, when):
+        """发生在 when 的行为写入时乘的系数（相对 epoch）"""
+        if not self.enabled or when is None:
+            return 1.0
+        return 2.0 ** self._exponent(when)
+
+    def factor(self, now=None):
+        """读取时把存储值换算为 now 时刻衰减后权重的系数"""
+        if not self.enabled:
+            return 1.0
+        return 2.0 ** -self._exponent(now or datetime.utcnow())
+
+    def needs_rebase(self, now=None):
+        """距离 epoch 太久，存储值已放大过多"""
+        return self.enabled and self.growth(now or datetime.utcnow()) > MAX_GROWTH
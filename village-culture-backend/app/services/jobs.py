@@ -0,0 +1,155 @@
+"""
+后台任务
+耗时操作（爬取导入、重建推荐模型）提交到本进程内有界的线程池执行，接口立即返回任务ID，
+同名任务在执行期间重复提交时直接返回正在执行的任务。
+"""
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from loguru import logger
+
+
+class JobQueueFull(Exception):
+    """等待中的任务过多"""
+
+
+class Job:
+    """一个后台任务的状态：pending -> running -> success / failed"""
+
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = 'pending'
+        self.progress = 0.0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._started = None
+        self._finished = None
+
+    @property
+    def is_active(self):
+        return self.status in ('pending', 'running')
+
+    def update(self, progress=None, message=None):
+        """任务函数内部报告进度（0~1）"""
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+
+    def to_dict(self):
+        if self._started is None:
+            duration = None
+        else:
+            duration = round((self._finished or time.monotonic()) - self._started, 3)
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'createTime': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'startTime': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'finishTime': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None,
+            'durationSeconds': duration
+        }
+
+
+class JobManager:
+    """有界线程池 + 同名任务合并
+
+    max_workers 个任务同时执行，最多再排队 max_pending 个；已结束的任务保留最近 keep 个供查询。
+    """
+
+    def __init__(self, max_workers=2, max_pending=10, keep=100):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.keep = keep
+        self.app = None
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """绑定应用（任务在其应用上下文中执行）并读取线程池配置
+
+        只绑定第一个应用：导入脚本等在进程内再次 create_app 时不影响已绑定的应用。
+        """
+        if self.app is not None:
+            return
+        self.app = app
+        self.max_workers = app.config.get('JOB_WORKERS', self.max_workers)
+        self.max_pending = app.config.get('JOB_MAX_PENDING', self.max_pending)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        return self._executor
+
+    def submit(self, name, fn, *args, **kwargs):
+        """提交任务，返回 (任务, 是否新建)；fn 的第一个参数为 Job，用于报告进度"""
+        with self._lock:
+            running = self._active.get(name)
+            if running is not None:
+                return running, False
+            if len(self._active) >= self.max_workers + self.max_pending:
+                raise JobQueueFull(name)
+
+            job = Job(name)
+            self._jobs[job.id] = job
+            self._active[name] = job
+            self._prune()
+            executor = self._get_executor()
+        executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f'后台任务已提交: {name} ({job.id})')
+        return job, True
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        job._started = time.monotonic()
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    job.result = fn(job, *args, **kwargs)
+            else:
+                job.result = fn(job, *args, **kwargs)
+            job.progress = 1.0
+            job.status = 'success'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            logger.error(f'后台任务失败: {job.name} ({job.id}): {e}')
+        finally:
+            job.finished_at = datetime.utcnow()
+            job._finished = time.monotonic()
+            with self._lock:
+                if self._active.get(job.name) is job:
+                    del self._active[job.name]
+        logger.info(f'后台任务结束: {job.name} ({job.id}) {job.status}, 耗时 {job._finished - job._started:.1f}s')
+
+    def _prune(self):
+        """只保留最近 keep 个已结束的任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.is_active]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def recent(self):
+        return list(reversed(self._jobs.values()))
+
+
+# 全局后台任务管理器
+job_manager = JobManager()
@@ -0,0 +1,86 @@
+"""
+分层只读映射
+增量更新时新旧模型共享绝大部分数据：每次更新只新增一层保存变化的条目，
+最新一层不小于下一层的一半时两层合并（类似 LSM），层数保持在 O(log N)，
+单次更新的开销与变化的条目数成正比（均摊），读取时从最新的层向下查找。
+"""
+from collections.abc import Mapping
+
+# 已删除条目的标记，以及查找时的缺省值
+_REMOVED = object()
+_MISSING = object()
+
+
+class LayeredDict(Mapping):
+    """由若干层映射叠加而成的只读映射
+
+    各层创建后不再修改，可以在多个版本之间共享；updated 返回新版本，原对象保持不变。
+    """
+
+    def __init__(self, layers, size):
+        self._layers = tuple(layers)
+        self._size = size
+
+    @classmethod
+    def of(cls, mapping):
+        """把普通映射包装为单层的 LayeredDict（不复制，调用方之后不应再修改 mapping）"""
+        if isinstance(mapping, cls):
+            return mapping
+        return cls((mapping,), len(mapping))
+
+    def __getitem__(self, key):
+        for layer in reversed(self._layers):
+            value = layer.get(key, _MISSING)
+            if value is not _MISSING:
+                if value is _REMOVED:
+                    break
+                return value
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        if len(self._layers) == 1:
+            yield from self._layers[0]
+            return
+        seen = set()
+        for layer in reversed(self._layers):
+            for key, value in layer.items():
+                if key not in seen:
+                    seen.add(key)
+                    if value is not _REMOVED:
+                        yield key
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def depth(self):
+        return len(self._layers)
+
+    def updated(self, changes, removed=()):
+        """返回写入 changes、删除 removed 之后的新版本"""
+        layer = dict(changes)
+        for key in removed:
+            layer[key] = _REMOVED
+
+        size = self._size
+        for key, value in layer.items():
+            exists = key in self
+            if value is _REMOVED:
+                size -= exists
+            elif not exists:
+                size += 1
+
+        layers = list(self._layers)
+        layers.append(layer)
+        while len(layers) > 1 and len(layers[-1]) * 2 >= len(layers[-2]):
+            newer = layers.pop()
+            merged = dict(layers.pop())
+            merged.update(newer)
+            if not layers:
+                # 合并到最底层时不再需要删除标记
+                merged = {key: value for key, value in merged.items() if value is not _REMOVED}
+            layers.append(merged)
+        return LayeredDict(layers, size)
@@ -0,0 +1,93 @@
+"""
+热门内容排行榜
+在内存中按 (浏览量 desc, 点赞数 desc, id asc) 维护有序列表（全站一份，每个分类一份），
+详情浏览、点赞、收藏及其撤销时直接更新排名，读取 Top-N 只需切片，不访问数据库。
+其它进程的计数变化通过定期与数据库对账同步。
+"""
+import time
+import threading
+from bisect import bisect_left, insort
+from flask import current_app, has_app_context
+
+from app.models import db, Culture
+
+
+class HotLeaderboard:
+    """热门内容排行榜"""
+
+    def __init__(self, reconcile_interval=300):
+        # 与数据库对账的间隔（秒）
+        self.reconcile_interval = reconcile_interval
+        self._entries = {}
+        self._ranking = []
+        self._category_rankings = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(culture_id, view_count, like_count):
+        # 升序排列即为热门顺序
+        return (-(view_count or 0), -(like_count or 0), culture_id)
+
+    def reconcile(self):
+        """从数据库重新加载全部上架内容的计数"""
+        rows = db.session.query(
+            Culture.id, Culture.category_id, Culture.view_count, Culture.like_count
+        ).filter(Culture.status == 1).all()
+
+        entries = {}
+        category_rankings = {}
+        for row in rows:
+            key = self._key(row.id, row.view_count, row.like_count)
+            entries[row.id] = (row.category_id, key)
+            category_rankings.setdefault(row.category_id, []).append(key)
+        for ranking in category_rankings.values():
+            ranking.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._ranking = sorted(key for _, key in entries.values())
+            self._category_rankings = category_rankings
+            self._loaded_at = time.monotonic()
+        return len(entries)
+
+    def _ensure_fresh(self):
+        interval = self.reconcile_interval
+        if has_app_context():
+            interval = current_app.config.get('HOT_RECONCILE_SECONDS', interval)
+        if not self._loaded_at or time.monotonic() - self._loaded_at > interval:
+            self.reconcile()
+
+    def _remove(self, culture_id):
+        entry = self._entries.pop(culture_id, None)
+        if entry is None:
+            return
+        category_id, key = entry
+        for ranking in (self._ranking, self._category_rankings.get(category_id, [])):
+            index = bisect_left(ranking, key)
+            if index < len(ranking) and ranking[index] == key:
+                del ranking[index]
+
+    def update(self, culture):
+        """内容计数或状态变化后更新排名（传入已提交的 Culture 对象）"""
+        if culture is None or not self._loaded_at:
+            return
+        with self._lock:
+            self._remove(culture.id)
+            if culture.status != 1:
+                return
+            key = self._key(culture.id, culture.view_count, culture.like_count)
+            self._entries[culture.id] = (culture.category_id, key)
+            insort(self._ranking, key)
+            insort(self._category_rankings.setdefault(culture.category_id, []), key)
+
+    def top(self, n=10, category_id=None):
+        """热门内容ID列表，可按分类筛选"""
+        self._ensure_fresh()
+        with self._lock:
+            ranking = self._ranking if category_id is None else self._category_rankings.get(category_id, [])
+            return [key[2] for key in ranking[:n]]
+
+
+# 全局热门排行榜
+hot_leaderboard = HotLeaderboard()
@@ -0,0 +1,20 @@
+"""
+内容列表的查询与序列化
+列表查询只读取 Culture.list_columns() 中的列，序列化时分类名取自分类缓存，
+不再为每一行加载 category 关系，也不返回 description、images 等大字段（详情接口返回完整内容）。
+"""
+from sqlalchemy.orm import load_only
+
+from app.models import Culture
+from app.services.categories import category_cache
+
+
+def culture_query():
+    """只加载列表所需列的内容查询"""
+    return Culture.query.options(load_only(*Culture.list_columns()))
+
+
+def to_list(cultures):
+    """内容列表的精简序列化"""
+    names = category_cache.names()
+    return [culture.to_list_dict(names.get(culture.category_id)) for culture in cultures]
@@ -0,0 +1,129 @@
+"""
+物品近邻存储
+每个物品只保留相似度最高的 K 个邻居，以紧凑的并行数组保存
+"""
+import sys
+import numpy as np
+
+from app.services.layered import LayeredDict
+
+EMPTY_IDS = np.empty(0, dtype=np.int32)
+EMPTY_SIMS = np.empty(0, dtype=np.float32)
+
+
+class NeighborStore:
+    """Top-K 物品近邻表
+
+    item_id -> (邻居ID数组, 相似度数组)，按相似度降序排列。
+    低于 min_similarity 或共同用户数低于 min_support 的邻居会被剪枝。
+    """
+
+    def __init__(self, k=50, min_similarity=0.0, min_support=1):
+        self.k = k
+        self.min_similarity = min_similarity
+        self.min_support = min_support
+        self.neighbors = {}
+
+    def __len__(self):
+        return len(self.neighbors)
+
+    def __contains__(self, item_id):
+        return item_id in self.neighbors
+
+    def get(self, item_id):
+        """获取物品的近邻 (ids, sims)，不存在时返回空数组"""
+        return self.neighbors.get(item_id, (EMPTY_IDS, EMPTY_SIMS))
+
+    def items(self):
+        return self.neighbors.items()
+
+    def _prune(self, ids, sims, supports=None):
+        """剪枝并按相似度降序排列，没有保留的邻居时返回 None"""
+        ids = np.asarray(ids)
+        sims = np.asarray(sims, dtype=np.float64)
+
+        mask = sims >= self.min_similarity
+        if supports is not None:
+            mask &= np.asarray(supports) >= self.min_support
+        ids, sims = ids[mask], sims[mask]
+
+        if len(sims) == 0:
+            return None
+
+        # 只对前K个做排序
+        if len(sims) > self.k:
+            top = np.argpartition(-sims, self.k - 1)[:self.k]
+            ids, sims = ids[top], sims[top]
+        order = np.argsort(-sims, kind='stable')
+
+        return ids[order].astype(np.int32), sims[order].astype(np.float32)
+
+    def set(self, item_id, ids, sims, supports=None):
+        """剪枝并保存物品的近邻列表（只在构建新近邻表时使用）"""
+        entry = self._prune(ids, sims, supports)
+        if entry is None:
+            self.neighbors.pop(item_id, None)
+        else:
+            self.neighbors[item_id] = entry
+
+    def updated(self, changes):
+        """返回替换了部分物品近邻列表的新近邻表，原近邻表不变
+
+        changes 为 {item_id: (ids, sims, supports)}。新旧近邻表共享未变化的条目，
+        开销只与变化的物品数有关。
+        """
+        entries, removed = {}, []
+        for item_id, (ids, sims, supports) in changes.items():
+            entry = self._prune(ids, sims, supports)
+            if entry is None:
+                removed.append(item_id)
+            else:
+                entries[item_id] = entry
+        store = NeighborStore(k=self.k, min_similarity=self.min_similarity, min_support=self.min_support)
+        store.neighbors = LayeredDict.of(self.neighbors).updated(entries, removed)
+        return store
+
+    @classmethod
+    def from_dict(cls, item_similarity, **kwargs):
+        """由 {item: {item: similarity}} 结构构建"""
+        store = cls(**kwargs)
+        for item_id, similar_items in item_similarity.items():
+            if similar_items:
+                store.set(item_id, list(similar_items.keys()), list(similar_items.values()))
+        return store
+
+    def to_arrays(self):
+        """展开为按物品ID排序的 CSR 数组 (item_ids, indptr, neighbor_ids, similarities)"""
+        item_ids = np.array(sorted(self.neighbors.keys()), dtype=np.int64)
+        indptr = np.zeros(len(item_ids) + 1, dtype=np.int64)
+        for idx, item_id in enumerate(item_ids.tolist()):
+            indptr[idx + 1] = indptr[idx] + len(self.neighbors[item_id][0])
+        if len(item_ids):
+            neighbor_ids = np.concatenate([self.neighbors[i][0] for i in item_ids.tolist()])
+            similarities = np.concatenate([self.neighbors[i][1] for i in item_ids.tolist()])
+        else:
+            neighbor_ids, similarities = EMPTY_IDS, EMPTY_SIMS
+        return item_ids, indptr, neighbor_ids, similarities
+
+    @classmethod
+    def from_arrays(cls, item_ids, indptr, neighbor_ids, similarities, **kwargs):
+        """由 CSR 数组构建，各物品的近邻为原数组的切片视图（不复制数据，可直接用于内存映射）"""
+        store = cls(**kwargs)
+        for idx, item_id in enumerate(item_ids.tolist()):
+            start, end = indptr[idx], indptr[idx + 1]
+            store.neighbors[item_id] = (neighbor_ids[start:end], similarities[start:end])
+        return store
+
+    def memory_usage(self):
+        """统计内存占用（字节）"""
+        array_bytes = 0
+        total_bytes = sys.getsizeof(self.neighbors)
+        for ids, sims in self.neighbors.values():
+            array_bytes += ids.nbytes + sims.nbytes
+            total_bytes += sys.getsizeof(ids) + sys.getsizeof(sims) + 64  # 元组及键的开销
+        return {
+            'items': len(self.neighbors),
+            'neighbors': sum(len(ids) for ids, _ in self.neighbors.values()),
+            'array_bytes': array_bytes,
+            'total_bytes': total_bytes
+        }
@@ -0,0 +1,179 @@
+"""
+列表分页
+游标分页（keyset）：按排序列的值定位下一页，WHERE (排序列) < (上一页最后一行的值) LIMIT n+1，
+不需要 OFFSET 也不需要 COUNT(*)，翻到多深都只读取一页的数据。
+游标是排序列取值的 base64 编码，对客户端不透明。
+
+未传 cursor 参数的旧客户端继续使用 page/pageSize（OFFSET + COUNT），同时返回 nextCursor 以便切换。
+"""
+import json
+import time
+import base64
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from flask import request
+from sqlalchemy import and_, or_, func, select, Float
+
+
+# 每页最多返回的条数
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析或与排序列不匹配"""
+
+
+@dataclass
+class Page:
+    items: list
+    has_more: bool
+    next_cursor: str = None
+    total: int = None
+    page: int = None
+
+    def to_dict(self, page_size, items=None):
+        """接口返回的分页结构；游标模式下只有请求了总数时才包含 total 和 page"""
+        result = {'list': items if items is not None else self.items, 'pageSize': page_size,
+                  'hasMore': self.has_more, 'nextCursor': self.next_cursor}
+        if self.total is not None:
+            result['total'] = self.total
+        if self.page is not None:
+            result['page'] = self.page
+        return result
+
+
+def encode_cursor(values):
+    """将排序列取值编码为游标"""
+    encoded = [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(encoded, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_value(value, expected):
+    """按排序列的 Python 类型校验并还原游标中的一个取值，类型不符时抛出 ValueError"""
+    if expected is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get('dt'), str):
+            raise ValueError(value)
+        return datetime.fromisoformat(value['dt'])
+    # bool 是 int 的子类，需单独排除；浮点列接受整数
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if expected is float and isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, expected):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor, types):
+    """解析游标，types 为各排序列的 Python 类型（如 [datetime, int]）
+
+    取值个数或类型与排序列不符时抛出 InvalidCursor。
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursor(cursor)
+    try:
+        return [_decode_value(value, expected) for value, expected in zip(values, types)]
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def _after(order, values):
+    """(c1, c2, ...) 排在 values 之后的条件：c1 越过 v1，或 c1 = v1 且 c2 越过 v2 ……
+
+    MySQL 的 FLOAT 列是单精度，与游标中的双精度值比较相等会失败，
+    因此浮点列改为与上一页最后一行当前存储的值比较（该行已删除时退回游标中的值）。
+    """
+    last_key, last_value = order[-1][0], values[-1]
+    bounds = [
+        func.coalesce(select(column).where(last_key == last_value).correlate(None).scalar_subquery(), value)
+        if isinstance(column.type, Float) else value
+        for (column, _), value in zip(order, values)
+    ]
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        beyond = column < bounds[i] if descending else column > bounds[i]
+        clauses.append(and_(*[order[j][0] == bounds[j] for j in range(i)], beyond))
+    return or_(*clauses)
+
+
+def _cursor_of(item, order):
+    return encode_cursor([getattr(item, column.key) for column, _ in order])
+
+
+class CountCache:
+    """列表总数缓存（带TTL的LRU），游标模式请求总数时使用"""
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, query):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._data.move_to_end(key)
+                return entry[1]
+        total = query.order_by(None).count()
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, total)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return total
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+count_cache = CountCache()
+
+
+def page_params(default_size=20, max_size=MAX_PAGE_SIZE):
+    """读取分页参数：(page, pageSize, cursor, withTotal)
+
+    pageSize 限制在 1~max_size 之间。
+    请求中带 cursor 参数（第一页传空字符串）即使用游标分页，否则 cursor 为 None。
+    """
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = min(max(request.args.get('pageSize', default_size, type=int), 1), max_size)
+    cursor = request.args.get('cursor')
+    with_total = request.args.get('withTotal', '') in ('1', 'true')
+    return page, page_size, cursor, with_total
+
+
+def paginate(query, order, page_size, cursor=None, page=None, with_total=False, count_key=None):
+    """分页查询，返回 Page
+
+    order 为 [(列, 是否降序), ...]，最后一列必须唯一（通常为主键），排序列不能为 NULL。
+    cursor 不为 None 时使用游标分页（空字符串表示第一页）；否则按 page 使用 OFFSET 分页。
+    游标模式下 with_total 为真时返回总数（按 count_key 缓存）。
+    """
+    ordering = [column.desc() if descending else column.asc() for column, descending in order]
+
+    if cursor is None:
+        pagination = query.order_by(*ordering).paginate(page=page or 1, per_page=page_size, error_out=False)
+        next_cursor = _cursor_of(pagination.items[-1], order) if pagination.has_next and pagination.items else None
+        return Page(pagination.items, pagination.has_next, next_cursor, pagination.total, page or 1)
+
+    total = None
+    if with_total:
+        total = count_cache.get(count_key, query) if count_key else query.order_by(None).count()
+    if cursor:
+        values = decode_cursor(cursor, [column.type.python_type for column, _ in order])
+        query = query.filter(_after(order, values))
+    items = query.order_by(*ordering).limit(page_size + 1).all()
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    next_cursor = _cursor_of(items[-1], order) if has_more else None
+    return Page(items, has_more, next_cursor, total)
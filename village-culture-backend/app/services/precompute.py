@@ -0,0 +1,147 @@
+"""
+个性化推荐离线预计算
+定时任务为近期活跃用户批量计算 Top-N 推荐并写入 user_recommendations 表，
+/api/recommend/personal 优先按主键读取预计算结果，没有新鲜结果时才在线计算。
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from loguru import logger
+
+from app.models import db, UserBehavior, UserRecommendation
+
+# 工作进程内的应用上下文（进程退出前一直保持）
+_worker_context = None
+
+
+def active_user_ids(days=30, min_behaviors=3):
+    """最近 days 天有行为、且行为总数达到个性化推荐门槛的用户"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    rows = db.session.query(UserBehavior.user_id).group_by(UserBehavior.user_id).having(
+        func.count(UserBehavior.id) >= min_behaviors
+    ).having(func.max(UserBehavior.created_at) >= cutoff).all()
+    return sorted(row.user_id for row in rows)
+
+
+def _init_worker(config_name):
+    """工作进程初始化：创建应用（独立的数据库连接）并确保模型可用
+
+    fork 启动时直接继承父进程已构建的模型；其它启动方式下通过快照（内存映射）或本进程构建获得模型。
+    """
+    global _worker_context
+    from app import create_app
+    from app.services.recommender import recommender
+
+    app = create_app(config_name)
+    _worker_context = app.app_context()
+    _worker_context.push()
+    recommender.ensure_model()
+
+
+def compute_batch(user_ids, n, algorithm):
+    """计算一批用户的推荐，返回 [(user_id, [culture_id, ...]), ...]"""
+    from app.services.recommender import recommender
+
+    results = []
+    for user_id in user_ids:
+        recommended = recommender.recommend_by_als(user_id, n) if algorithm == 'als' else []
+        if not recommended:
+            recommended = recommender.recommend_hybrid(user_id, n)
+        results.append((user_id, recommended))
+    return results
+
+
+def _compute_batch_in_worker(args):
+    try:
+        return compute_batch(*args)
+    finally:
+        db.session.remove()
+
+
+def save_batch(results, algorithm, model_version=None):
+    """按主键替换这一批用户的预计算结果"""
+    if not results:
+        return
+    now = datetime.utcnow()
+    user_ids = [user_id for user_id, _ in results]
+    UserRecommendation.query.filter(UserRecommendation.user_id.in_(user_ids)).delete(synchronize_session=False)
+    db.session.execute(UserRecommendation.__table__.insert(), [
+        {'user_id': user_id, 'algorithm': algorithm, 'culture_ids': ','.join(map(str, culture_ids)),
+         'model_version': model_version, 'updated_at': now}
+        for user_id, culture_ids in results
+    ])
+    db.session.commit()
+
+
+def precompute_recommendations(n=None, days=None, batch_size=None, workers=None, algorithm=None):
+    """为活跃用户批量预计算推荐，返回统计信息
+
+    用户按 batch_size 分批，由 workers 个进程并行计算，主进程逐批写回数据库。
+    workers <= 1 时在当前进程内计算，不启动进程池。
+    """
+    from app.services.recommender import recommender
+
+    config = current_app.config
+    n = n or config.get('PRECOMPUTE_TOP_N', 50)
+    days = days or config.get('PRECOMPUTE_ACTIVE_DAYS', 30)
+    batch_size = batch_size or config.get('PRECOMPUTE_BATCH_SIZE', 500)
+    workers = workers if workers is not None else config.get('PRECOMPUTE_WORKERS', 2)
+    algorithm = algorithm or config.get('RECOMMEND_ALGORITHM', 'hybrid')
+
+    start = time.perf_counter()
+    user_ids = active_user_ids(days)
+    batches = [user_ids[i:i + batch_size] for i in range(0, len(user_ids), batch_size)]
+    # 先在主进程中准备好模型，fork 出的工作进程直接共享
+    model = recommender.ensure_model()
+    version = model.snapshot_version
+
+    written = 0
+    if workers <= 1 or len(batches) <= 1:
+        for batch in batches:
+            results = compute_batch(batch, n, algorithm)
+            save_batch(results, algorithm, version)
+            written += len(results)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches)), initializer=_init_worker,
+                                 initargs=(config.get('CONFIG_NAME', 'default'),)) as executor:
+            for results in executor.map(_compute_batch_in_worker, [(batch, n, algorithm) for batch in batches]):
+                save_batch(results, algorithm, version)
+                written += len(results)
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'users': len(user_ids),
+        'written': written,
+        'batches': len(batches),
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'usersPerSecond': round(written / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    logger.info(f'✅ 推荐预计算完成: {stats["written"]} 个用户, {stats["workers"]} 个进程, '
+                f'耗时 {stats["seconds"]}s')
+    return stats
+
+
+def get_precomputed(user_id, n, algorithm, max_age_minutes=None):
+    """读取新鲜的预计算结果（一次主键查询），不存在、已过期或请求数量超过预计算数量时返回 None
+
+    返回完整的预计算列表（不截断到 n），调用方过滤掉用户之后看过的内容后仍有余量可用。
+    """
+    config = current_app.config
+    max_age_minutes = max_age_minutes or config.get('PRECOMPUTE_MAX_AGE_MINUTES', 120)
+    if n > config.get('PRECOMPUTE_TOP_N', 50):
+        return None
+    row = db.session.get(UserRecommendation, user_id)
+    if row is None or row.algorithm != algorithm:
+        return None
+    if row.updated_at < datetime.utcnow() - timedelta(minutes=max_age_minutes):
+        return None
+    return row.get_culture_ids()
+
+
+def invalidate_precomputed(user_id):
+    """用户点赞、收藏后删除其预计算结果，下次请求改为在线计算"""
+    UserRecommendation.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    db.session.commit()
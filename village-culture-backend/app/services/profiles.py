@@ -0,0 +1,127 @@
+"""
+用户画像缓存
+每个用户一份紧凑的画像：行为总数、分类偏好（按行为权重累加）、交互过的内容ID集合。
+未命中时用一次聚合查询从数据库加载，互动接口写入行为后直接在缓存的画像上累加，
+推荐时不再反复统计和扫描用户行为。
+"""
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy import func
+
+from app.models import db, Culture, UserBehavior
+
+
+class UserProfile:
+    """用户画像"""
+
+    __slots__ = ('behavior_count', 'category_weights', 'item_ids')
+
+    def __init__(self):
+        self.behavior_count = 0
+        self.category_weights = {}
+        self.item_ids = set()
+
+    def add(self, culture_id, category_id, weight, count=1):
+        self.behavior_count += count
+        self.item_ids.add(culture_id)
+        if category_id is not None:
+            self.category_weights[category_id] = self.category_weights.get(category_id, 0.0) + weight * count
+
+    def copy(self):
+        profile = UserProfile()
+        profile.behavior_count = self.behavior_count
+        profile.category_weights = dict(self.category_weights)
+        profile.item_ids = set(self.item_ids)
+        return profile
+
+    def preferred_categories(self):
+        """按偏好权重从高到低排列的分类ID（权重相同时按分类ID）"""
+        return sorted(self.category_weights, key=lambda category_id: (-self.category_weights[category_id], category_id))
+
+
+class UserProfileStore:
+    """带TTL的LRU用户画像缓存
+
+    TTL 用于同步其它进程写入的行为（本进程写入的行为会立即累加到画像上）。
+    """
+
+    def __init__(self, maxsize=50000, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def load(user_id):
+        """从数据库加载画像（一次按 内容/类型 聚合的查询）"""
+        from app.services.recommender import BEHAVIOR_WEIGHTS
+
+        rows = db.session.query(
+            UserBehavior.culture_id, Culture.category_id, UserBehavior.behavior_type, func.count(UserBehavior.id)
+        ).outerjoin(Culture, Culture.id == UserBehavior.culture_id).filter(
+            UserBehavior.user_id == user_id
+        ).group_by(UserBehavior.culture_id, Culture.category_id, UserBehavior.behavior_type).all()
+
+        profile = UserProfile()
+        for culture_id, category_id, behavior_type, count in rows:
+            profile.add(culture_id, category_id, BEHAVIOR_WEIGHTS.get(behavior_type, 1.0), count)
+        return profile
+
+    def get(self, user_id):
+        """获取用户画像，未命中或已过期时从数据库加载"""
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._data.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        profile = self.load(user_id)
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, profile)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return profile
+
+    def record(self, user_id, culture_id, category_id, behavior_type):
+        """互动接口写入一条行为后，累加到已缓存的画像上（未缓存时下次读取自然包含该行为）
+
+        在副本上累加后替换，正在读取旧画像的推荐请求不受影响。
+        """
+        from app.services.recommender import BEHAVIOR_WEIGHTS
+
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is not None:
+                profile = entry[1].copy()
+                profile.add(culture_id, category_id, BEHAVIOR_WEIGHTS.get(behavior_type, 1.0))
+                self._data[user_id] = (entry[0], profile)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+# 全局用户画像缓存
+user_profiles = UserProfileStore()
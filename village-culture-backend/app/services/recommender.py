@@ -3,61 +3,257 @@
 基于协同过滤和内容特征的混合推荐算法
 """
 from app.models import db, User, Culture, UserBehavior, Like, Collect, ViewHistory
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case, select, update, bindparam
+from flask import current_app, has_app_context
 from collections import defaultdict
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+import threading
+import time
 import numpy as np
 from loguru import logger
 
+try:
+    from app.services.similarity import ItemSimilarityEngine
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+    logger.warning('未安装scipy，物品相似度将使用原始算法计算')
+
+from app.services.neighbors import NeighborStore
+from app.services.layered import LayeredDict
+from app.services.cache import recommendation_cache
+from app.services.als import ALSModel
+from app.services.decay import TimeDecay
+from app.services.precompute import get_precomputed
+from app.services.leaderboard import hot_leaderboard
+from app.services.profiles import user_profiles
+from app.services.content_index import content_index
+from app.services.transitions import transition_model
+from app.services import snapshot
+
+
+# 行为类型权重
+BEHAVIOR_WEIGHTS = {
+    'view': 1.0,
+    'like': 2.0,
+    'collect': 3.0,
+    'share': 4.0
+}
+
+
+@dataclass(frozen=True)
+class RecommenderModel:
+    """一份完整、一致的推荐模型
+
+    发布后不再修改：重建或增量更新时总是生成新的对象，再整体替换 RecommenderSystem.model。
+    similarity_engine 仅供增量更新使用，请求线程不会读取它。
+    """
+    # 用户-物品权重（开启时间衰减时为相对 decay.epoch 的存储值，读取时用 get_user_items 换算）
+    user_item_matrix: object = None
+    # 未衰减的用户-物品权重，只在计算物品相似度时使用（不衰减时为 None）；
+    # 保留相似度引擎时一并保留，供增量更新使用，否则计算完成后丢弃
+    raw_user_item_matrix: object = None
+    # 物品近邻表（每个物品只保留Top-K相似物品）
+    item_similarity: object = None
+    similarity_engine: object = None
+    decay: TimeDecay = field(default_factory=TimeDecay)
+    # 已处理的用户行为水位线，用于增量更新
+    last_behavior_id: int = 0
+    last_behavior_at: datetime = None
+    # 矩阵分解模型（由定时任务训练）
+    als_model: object = None
+    # 模型对应的快照版本
+    snapshot_version: str = None
+
+    @property
+    def is_ready(self):
+        return self.user_item_matrix is not None and self.item_similarity is not None
+
+    def get_user_items(self, user_id, now=None):
+        """用户当前（衰减后）的 {物品: 权重}"""
+        row = self.user_item_matrix.get(user_id, {})
+        factor = self.decay.factor(now)
+        if factor == 1.0:
+            return row
+        return {item_id: weight * factor for item_id, weight in row.items()}
 
-class RecommenderSystem:
-    """推荐系统"""
-
-    def __init__(self):
-        self.user_item_matrix = None
-        self.item_similarity = None
 
-    def build_user_item_matrix(self):
-        """构建用户-物品矩阵"""
-        # 获取所有用户行为数据
-        behaviors = UserBehavior.query.all()
+class RecommenderSystem:
+    """推荐系统
+
+    读取方每次只读一次 self.model 引用，之后始终使用同一个模型对象，无需加锁；
+    构建方在新的模型对象中完成构建，最后一次赋值原子地发布（构建之间用锁串行）。
+    """
+
+    def __init__(self, similarity_method='sparse', neighbor_k=None, min_similarity=None, min_support=None,
+                 chunk_size=10000, half_life_days=None, similarity_workers=None):
+        self.model = RecommenderModel()
+        # 行为权重半衰期（天），None 时读取配置 BEHAVIOR_HALF_LIFE_DAYS，0 表示不衰减
+        self.half_life_days = half_life_days
+        # 构建用户-物品矩阵时每次从数据库读取的行数
+        self.chunk_size = chunk_size
+        # 相似度计算方式：sparse（稀疏矩阵）或 legacy（原始逐对计算，用于对比）
+        self.similarity_method = similarity_method
+        # 近邻剪枝参数，None 时读取配置 NEIGHBOR_K / NEIGHBOR_MIN_SIMILARITY / NEIGHBOR_MIN_SUPPORT
+        self.neighbor_k = neighbor_k
+        self.min_similarity = min_similarity
+        self.min_support = min_support
+        # 相似度计算进程数，None 时读取配置 SIMILARITY_WORKERS，大于 1 时按物品分块多进程计算
+        self.similarity_workers = similarity_workers
+        self._build_lock = threading.Lock()
+        self._snapshot_checked_at = 0.0
+
+    # 当前模型的只读视图
+    @property
+    def user_item_matrix(self):
+        return self.model.user_item_matrix
+
+    @property
+    def item_similarity(self):
+        return self.model.item_similarity
+
+    @property
+    def als_model(self):
+        return self.model.als_model
+
+    @property
+    def decay(self):
+        return self.model.decay
+
+    @property
+    def last_behavior_id(self):
+        return self.model.last_behavior_id
+
+    @property
+    def snapshot_version(self):
+        return self.model.snapshot_version
+
+    def _publish(self, model):
+        """原子地替换当前模型，旧的推荐结果全部失效"""
+        self.model = model
+        recommendation_cache.clear()
+
+    def build_model(self, method=None):
+        """全量构建新模型并发布，返回新模型"""
+        with self._build_lock:
+            model = self.calculate_item_similarity(self.build_user_item_matrix(), method)
+            self._publish(model)
+        return model
+
+    def build_user_item_matrix(self, chunk_size=None):
+        """构建用户-物品矩阵，返回只含矩阵的新模型（不发布）
+
+        加权求和在数据库中按 (用户, 物品) GROUP BY 完成，结果以流式游标分块读取，
+        内存占用只与 (用户, 物品) 对的数量有关，而与行为总条数无关。
+        开启时间衰减时再按天分组，在读取时乘以当天相对本次构建时刻的衰减系数，
+        同时累加一份未衰减的权重供相似度计算使用。
+        """
+        chunk_size = chunk_size or self.chunk_size
+        half_life_days = self.half_life_days
+        if half_life_days is None and has_app_context():
+            half_life_days = current_app.config.get('BEHAVIOR_HALF_LIFE_DAYS')
+        decay = TimeDecay(half_life_days)
+
+        # 先确定本次构建的水位线，之后写入的行为留给增量更新处理
+        latest = db.session.query(UserBehavior.id, UserBehavior.created_at).order_by(
+            UserBehavior.id.desc()
+        ).first()
+        last_behavior_id, last_behavior_at = (latest.id, latest.created_at) if latest else (0, None)
+
+        # 根据行为类型设置权重并累加
+        behavior_weight = case(BEHAVIOR_WEIGHTS, value=UserBehavior.behavior_type, else_=1.0)
+        columns = [UserBehavior.user_id, UserBehavior.culture_id]
+        if decay.enabled:
+            columns.append(func.date(UserBehavior.created_at))
+        rows = db.session.query(*columns, func.sum(behavior_weight)).filter(
+            UserBehavior.id <= last_behavior_id
+        ).group_by(*columns).execution_options(yield_per=chunk_size)
 
         # 用户-物品评分矩阵
         user_items = defaultdict(dict)
-        users = set()
-        items = set()
-
-        for behavior in behaviors:
-            user_id = behavior.user_id
-            item_id = behavior.culture_id
-
-            # 根据行为类型设置权重
-            weight_map = {
-                'view': 1.0,
-                'like': 2.0,
-                'collect': 3.0,
-                'share': 4.0
-            }
-            weight = weight_map.get(behavior.behavior_type, 1.0)
-
-            # 累加权重
-            if item_id in user_items[user_id]:
-                user_items[user_id][item_id] += weight
-            else:
-                user_items[user_id][item_id] = weight
+        raw_user_items = None
+
+        if decay.enabled:
+            raw_user_items = defaultdict(dict)
+            growth = {}
+            for user_id, item_id, day, weight in rows:
+                if day not in growth:
+                    growth[day] = decay.growth(day)
+                row = user_items[user_id]
+                row[item_id] = row.get(item_id, 0.0) + float(weight) * growth[day]
+                raw_row = raw_user_items[user_id]
+                raw_row[item_id] = raw_row.get(item_id, 0.0) + float(weight)
+            raw_user_items = dict(raw_user_items)
+        else:
+            for user_id, item_id, weight in rows:
+                user_items[user_id][item_id] = float(weight)
+
+        # ALS 模型独立于近邻表，沿用到下次训练
+        return RecommenderModel(
+            user_item_matrix=dict(user_items), raw_user_item_matrix=raw_user_items, decay=decay,
+            als_model=self.model.als_model, last_behavior_id=last_behavior_id, last_behavior_at=last_behavior_at
+        )
+
+    def calculate_item_similarity(self, model=None, method=None):
+        """计算物品相似度，返回带近邻表的新模型（不发布）
+
+        相似度的分母使用未衰减的权重，衰减只体现在共现的新鲜度上（陈旧的共现被压低），
+        推荐打分时再乘以用户自己衰减后的权重。
+        """
+        model = model or self.model
+        method = method or self.similarity_method
+        if model.raw_user_item_matrix is not None:
+            ratings, decayed = model.raw_user_item_matrix, model.user_item_matrix
+        else:
+            ratings, decayed = model.user_item_matrix, None
+        store = self._new_neighbor_store()
+        engine = None
+        workers = self.similarity_workers
+        if workers is None and has_app_context():
+            workers = current_app.config.get('SIMILARITY_WORKERS', 1)
+        if method == 'sparse' and HAS_SCIPY and (workers or 1) > 1:
+            # 多进程构建不保留共现矩阵，之后的增量更新会退化为全量构建
+            ItemSimilarityEngine().build_neighbors_parallel(ratings, store, workers, decayed_matrix=decayed)
+        elif method == 'sparse' and HAS_SCIPY:
+            engine = ItemSimilarityEngine()
+            engine.fit(ratings, decayed)
+            engine.build_neighbors(store)
+        else:
+            for item_id, similar_items in self._calculate_item_similarity_legacy(ratings, decayed).items():
+                store.set(item_id, list(similar_items.keys()), list(similar_items.values()))
+
+        memory = store.memory_usage()
+        logger.info(f'物品近邻表: {memory["items"]} 个物品, {memory["neighbors"]} 个近邻, '
+                    f'约 {memory["total_bytes"] / 1024 / 1024:.1f} MB')
+        raw_user_item_matrix = model.raw_user_item_matrix if engine is not None else None
+        return replace(model, item_similarity=store, similarity_engine=engine,
+                       raw_user_item_matrix=raw_user_item_matrix)
+
+    def _new_neighbor_store(self):
+        config = current_app.config if has_app_context() else {}
+
+        def setting(value, key, default):
+            if value is None:
+                value = config.get(key)
+            return default if value is None else value
+
+        return NeighborStore(k=setting(self.neighbor_k, 'NEIGHBOR_K', 50),
+                             min_similarity=setting(self.min_similarity, 'NEIGHBOR_MIN_SIMILARITY', 0.0),
+                             min_support=setting(self.min_support, 'NEIGHBOR_MIN_SUPPORT', 1))
+
+    def _calculate_item_similarity_legacy(self, user_item_matrix, decayed_matrix=None):
+        """原始算法：逐对遍历物品计算相似度（衰减时共同用户按新鲜度计数，与稀疏矩阵算法一致）"""
+        def freshness(user_id, item_id):
+            # 衰减后与衰减前权重之比（下限约60个半衰期）
+            rating = user_item_matrix[user_id][item_id]
+            ratio = decayed_matrix[user_id][item_id] / rating if rating > 0 else 1.0
+            return max(ratio, 2.0 ** -60)
 
-            users.add(user_id)
-            items.add(item_id)
-
-        self.user_item_matrix = user_items
-        return users, items
-
-    def calculate_item_similarity(self):
-        """计算物品相似度"""
         # 构建物品-用户倒排表
         item_users = defaultdict(set)
 
-        for user_id, items in self.user_item_matrix.items():
+        for user_id, items in user_item_matrix.items():
             for item_id, rating in items.items():
                 item_users[item_id].add(user_id)
 
@@ -75,80 +271,260 @@ class RecommenderSystem:
 
                 if len(common_users) > 0:
                     # 计算相似度
-                    sum_i = sum(self.user_item_matrix[u].get(item_i, 0) for u in common_users)
-                    sum_j = sum(self.user_item_matrix[u].get(item_j, 0) for u in common_users)
+                    sum_i = sum(user_item_matrix[u].get(item_i, 0) for u in common_users)
+                    sum_j = sum(user_item_matrix[u].get(item_j, 0) for u in common_users)
+                    support = len(common_users)
+                    if decayed_matrix is not None:
+                        support = sum(
+                            (freshness(u, item_i) * freshness(u, item_j)) ** 0.5 for u in common_users
+                        )
 
                     if sum_i > 0 and sum_j > 0:
-                        similarity = len(common_users) / (sum_i * sum_j) ** 0.5
+                        similarity = support / (sum_i * sum_j) ** 0.5
                         item_similarity[item_i][item_j] = similarity
                         item_similarity[item_j][item_i] = similarity
 
-        self.item_similarity = item_similarity
+        return item_similarity
+
+    def update_incremental(self):
+        """增量更新：只处理水位线之后新增的用户行为，生成新模型后发布
+
+        新行为按发生时间乘以相对 epoch 的衰减系数后累加，不需要重算历史。
+        用户-物品矩阵和近邻表采用分层的写时复制（LayeredDict）：新模型只新增一层保存受影响的行，
+        与旧模型共享其余数据，开销只与受影响的用户和物品有关，正在使用旧模型的请求不受影响。
+        返回处理的行为条数；若尚未完成全量构建（或距衰减基准过久、使用多进程构建）则返回 None，
+        由调用方执行全量构建。
+        """
+        with self._build_lock:
+            model = self.model
+            engine = model.similarity_engine
+            if model.user_item_matrix is None or engine is None or model.decay.needs_rebase():
+                return None
+
+            behaviors = db.session.query(
+                UserBehavior.id, UserBehavior.user_id, UserBehavior.culture_id,
+                UserBehavior.behavior_type, UserBehavior.created_at
+            ).filter(UserBehavior.id > model.last_behavior_id).order_by(UserBehavior.id).all()
+
+            if not behaviors:
+                return 0
+
+            # 受影响用户更新前的行（旧对象保持不变）
+            old_rows = {}
+            for behavior in behaviors:
+                if behavior.user_id not in old_rows:
+                    old_rows[behavior.user_id] = model.user_item_matrix.get(behavior.user_id, {})
+
+            # 在新行对象上累加新行为的权重（与全量构建一致，按行为发生的日期计算衰减系数）
+            new_rows = {user_id: dict(row) for user_id, row in old_rows.items()}
+            for behavior in behaviors:
+                row = new_rows[behavior.user_id]
+                day = behavior.created_at.date() if behavior.created_at else None
+                weight = BEHAVIOR_WEIGHTS.get(behavior.behavior_type, 1.0) * model.decay.growth(day)
+                row[behavior.culture_id] = row.get(behavior.culture_id, 0.0) + weight
+
+            # 相似度使用未衰减的权重，在模型保存的未衰减矩阵上同样只更新受影响的行
+            raw_user_item_matrix = model.raw_user_item_matrix
+            if raw_user_item_matrix is not None:
+                old_raw = {user_id: raw_user_item_matrix.get(user_id, {}) for user_id in old_rows}
+                new_raw = {user_id: dict(row) for user_id, row in old_raw.items()}
+                for behavior in behaviors:
+                    row = new_raw[behavior.user_id]
+                    row[behavior.culture_id] = row.get(behavior.culture_id, 0.0) + \
+                        BEHAVIOR_WEIGHTS.get(behavior.behavior_type, 1.0)
+                fit_args = (old_raw, new_raw, old_rows, new_rows)
+                raw_user_item_matrix = LayeredDict.of(raw_user_item_matrix).updated(new_raw)
+            else:
+                fit_args = (old_rows, new_rows)
+
+            user_item_matrix = LayeredDict.of(model.user_item_matrix).updated(new_rows)
+
+            # 只重新计算受影响物品的近邻列表；引擎只由构建方使用，出错时丢弃，下次改为全量构建
+            try:
+                item_similarity = model.item_similarity.updated(
+                    {item_id: engine.neighbors_of(item_id) for item_id in engine.partial_fit(*fit_args)}
+                )
+            except Exception:
+                self.model = replace(model, similarity_engine=None)
+                raise
+
+            self._publish(replace(
+                model, user_item_matrix=user_item_matrix, raw_user_item_matrix=raw_user_item_matrix,
+                item_similarity=item_similarity, last_behavior_id=behaviors[-1].id, last_behavior_at=behaviors[-1].created_at
+            ))
+            return len(behaviors)
+
+    def save_snapshot(self, snapshot_dir):
+        """将当前模型保存为快照"""
+        with self._build_lock:
+            model = self.model
+            version = snapshot.save_snapshot(
+                snapshot_dir, model.user_item_matrix, model.item_similarity,
+                als_model=model.als_model,
+                meta={
+                    'last_behavior_id': model.last_behavior_id,
+                    'last_behavior_at': model.last_behavior_at.strftime('%Y-%m-%d %H:%M:%S') if model.last_behavior_at else None,
+                    'half_life_days': model.decay.half_life_days,
+                    'decay_epoch': model.decay.epoch.strftime('%Y-%m-%d %H:%M:%S')
+                }
+            )
+            # 快照与内存中的模型内容相同，只更新版本号（不影响推荐结果，无需清空缓存）
+            if self.model is model:
+                self.model = replace(model, snapshot_version=version)
+        return version
+
+    def load_snapshot(self, snapshot_dir, version=None):
+        """以内存映射方式加载快照并发布，成功返回 True"""
+        meta, arrays = snapshot.load_snapshot(snapshot_dir, version)
+        if meta is None:
+            return False
+
+        als_model = None
+        if 'als_user_factors' in arrays:
+            als_model = ALSModel.from_arrays(
+                arrays['als_user_ids'], arrays['als_user_factors'],
+                arrays['als_item_ids'], arrays['als_item_factors']
+            )
+        epoch = meta.get('decay_epoch')
+        # 快照是只读的（没有相似度引擎），之后的增量更新需要先全量构建
+        model = RecommenderModel(
+            user_item_matrix=snapshot.SnapshotUserItems(
+                arrays['user_ids'], arrays['user_indptr'], arrays['user_items'], arrays['user_weights']
+            ),
+            item_similarity=NeighborStore.from_arrays(
+                arrays['item_ids'], arrays['neighbor_indptr'], arrays['neighbor_ids'], arrays['neighbor_sims'],
+                k=meta['neighbor_k'], min_similarity=meta['min_similarity'], min_support=meta['min_support']
+            ),
+            decay=TimeDecay(meta.get('half_life_days'),
+                            datetime.strptime(epoch, '%Y-%m-%d %H:%M:%S') if epoch else None),
+            last_behavior_id=meta.get('last_behavior_id') or 0,
+            als_model=als_model,
+            snapshot_version=meta['version']
+        )
+        with self._build_lock:
+            self._publish(model)
+        logger.info(f'📦 已加载推荐模型快照 {meta["version"]}（{meta["users"]} 用户, {meta["items"]} 物品）')
+        return True
+
+    def refresh_from_snapshot(self, snapshot_dir, interval=60):
+        """定期检查是否有更新的快照版本，有则切换（检查间隔内直接返回）
+
+        快照的行为水位线落后于当前模型时不切换；本进程构建、尚未保存为快照的模型
+        只会被水位线更新的快照替换。
+        """
+        now = time.monotonic()
+        if self._snapshot_checked_at and now - self._snapshot_checked_at < interval:
+            return False
+        self._snapshot_checked_at = now
+
+        model = self.model
+        current = model.snapshot_version
+        version = snapshot.current_version(snapshot_dir)
+        if not version or version == current:
+            return False
+        if current and int(version[1:]) < int(current[1:]):
+            return False
+        try:
+            meta = snapshot.read_meta(snapshot_dir, version)
+            if meta is None:
+                return False
+            snapshot_behavior_id = meta.get('last_behavior_id') or 0
+            if snapshot_behavior_id < model.last_behavior_id or (
+                    current is None and model.is_ready and snapshot_behavior_id == model.last_behavior_id):
+                return False
+            return self.load_snapshot(snapshot_dir, version)
+        except Exception as e:
+            logger.error(f'加载推荐模型快照失败: {e}')
+            return False
+
+    def ensure_model(self):
+        """确保模型可用并返回当前模型：优先使用最新快照，没有快照时在本进程内构建"""
+        snapshot_dir = current_app.config.get('MODEL_SNAPSHOT_DIR') if has_app_context() else None
+        if snapshot_dir:
+            self.refresh_from_snapshot(snapshot_dir)
+
+        model = self.model
+        if not model.is_ready:
+            with self._build_lock:
+                # 等锁期间可能已由其它线程构建完成
+                if not self.model.is_ready:
+                    self._publish(self.calculate_item_similarity(self.build_user_item_matrix()))
+            model = self.model
+        return model
+
+    def get_user_items(self, user_id, now=None):
+        """用户当前（衰减后）的 {物品: 权重}"""
+        return self.model.get_user_items(user_id, now)
 
     def recommend_by_cf(self, user_id, n=10):
         """基于协同过滤的推荐"""
-        if not self.user_item_matrix:
-            self.build_user_item_matrix()
-
-        if not self.item_similarity:
-            self.calculate_item_similarity()
+        model = self.ensure_model()
 
         # 用户已交互的物品
-        user_items = self.user_item_matrix.get(user_id, {})
+        user_items = model.get_user_items(user_id)
         if not user_items:
             return []
+        # 模型构建之后新交互的物品同样排除
+        interacted = user_profiles.get(user_id).item_ids
 
         # 计算推荐分数
         recommendations = defaultdict(float)
 
         for item_id, rating in user_items.items():
-            # 找相似的物品
-            similar_items = self.item_similarity.get(item_id, {})
-            for similar_item, similarity in similar_items.items():
-                if similar_item not in user_items:
+            # 只在剪枝后的Top-K近邻中查找相似物品
+            similar_ids, similarities = model.item_similarity.get(item_id)
+            for similar_item, similarity in zip(similar_ids.tolist(), similarities.tolist()):
+                if similar_item not in user_items and similar_item not in interacted:
                     recommendations[similar_item] += similarity * rating
 
         # 排序并返回TopN
         sorted_recs = sorted(recommendations.items(), key=lambda x: x[1], reverse=True)
         return [item_id for item_id, score in sorted_recs[:n]]
 
-    def recommend_by_content(self, user_id, n=10):
-        """基于内容的推荐"""
-        # 获取用户喜欢的分类
-        user_behaviors = UserBehavior.query.filter_by(user_id=user_id).all()
-
-        if not user_behaviors:
+    def train_als(self, **params):
+        """基于当前用户-物品矩阵训练 ALS 模型（训练完成后才发布替换旧模型）"""
+        als_model = ALSModel(**params)
+        model = self.model
+        # ALS 的置信度与权重绝对值相关，使用换算到当前时刻的衰减权重
+        factor = model.decay.factor()
+        user_item_matrix = model.user_item_matrix if factor == 1.0 else {
+            user_id: {item_id: weight * factor for item_id, weight in row.items()}
+            for user_id, row in model.user_item_matrix.items()
+        }
+        if als_model.fit(user_item_matrix):
+            with self._build_lock:
+                self._publish(replace(self.model, als_model=als_model))
+        return self.model.als_model
+
+    def recommend_by_als(self, user_id, n=10):
+        """基于矩阵分解的推荐"""
+        model = self.ensure_model()
+        if model.als_model is None:
             return []
+        interacted = user_profiles.get(user_id).item_ids.union(model.user_item_matrix.get(user_id, {}))
+        return model.als_model.recommend(user_id, n=n, exclude=interacted)
 
-        # 统计用户偏好的分类
-        category_preferences = defaultdict(float)
-        for behavior in user_behaviors:
-            culture = Culture.query.get(behavior.culture_id)
-            if culture:
-                weight_map = {'view': 1.0, 'like': 2.0, 'collect': 3.0, 'share': 4.0}
-                weight = weight_map.get(behavior.behavior_type, 1.0)
-                category_preferences[culture.category_id] += weight
-
-        # 获取用户已交互的物品
-        interacted_ids = {b.culture_id for b in user_behaviors}
-
-        # 推荐相似分类的内容
-        recommended = []
-        for category_id, preference_score in sorted(category_preferences.items(),
-                                                    key=lambda x: x[1], reverse=True):
-            # 获取该分类下未交互的内容
-            cultures = Culture.query.filter(
-                and_(Culture.category_id == category_id,
-                     Culture.status == 1,
-                     ~Culture.id.in_(interacted_ids))
-            ).order_by(Culture.score.desc()).limit(n).all()
+    def recommend_by_content(self, user_id, n=10):
+        """基于内容的推荐
 
-            recommended.extend([c.id for c in cultures])
+        分类偏好读取用户画像，已交互内容用子查询排除，只需一次查询在偏好分类中取候选内容。
+        """
+        profile = user_profiles.get(user_id)
+        categories = profile.preferred_categories()
+        if not categories:
+            return []
 
-            if len(recommended) >= n:
-                break
+        # 按分类偏好排序、分类内按分数排序，取前N个未交互的内容
+        category_rank = case({category_id: rank for rank, category_id in enumerate(categories)},
+                             value=Culture.category_id)
+        interacted_ids = select(UserBehavior.culture_id).where(UserBehavior.user_id == user_id)
+        cultures = db.session.query(Culture.id).filter(
+            and_(Culture.category_id.in_(categories),
+                 Culture.status == 1,
+                 Culture.id.notin_(interacted_ids))
+        ).order_by(category_rank, Culture.score.desc()).limit(n).all()
 
-        return recommended[:n]
+        return [c.id for c in cultures]
 
     def recommend_hybrid(self, user_id, n=10):
         """混合推荐：协同过滤 + 内容推荐"""
@@ -172,60 +548,172 @@ class RecommenderSystem:
         return [item_id for item_id, score in sorted_items[:n]]
 
     def get_hot_items(self, n=10):
-        """获取热门内容"""
-        cultures = Culture.query.filter_by(status=1).order_by(
-            Culture.view_count.desc(),
-            Culture.like_count.desc()
-        ).limit(n).all()
-
-        return [c.id for c in cultures]
-
-    def update_scores(self):
-        """更新内容分数"""
-        cultures = Culture.query.filter_by(status=1).all()
-
-        for culture in cultures:
-            # 计算热度分数
-            score = (
-                    culture.view_count * 0.1 +
-                    culture.like_count * 1.0 +
-                    culture.collect_count * 2.0 +
-                    culture.share_count * 3.0
-            )
-
-            # 时间衰减因子（越新越靠前）
-            days = (datetime.utcnow() - culture.created_at).days
-            time_decay = 1.0 / (1.0 + days * 0.01)
-
-            culture.score = score * time_decay
-
+        """获取热门内容（内存排行榜）"""
+        return hot_leaderboard.top(n)
+
+    def update_scores(self, batch_size=5000):
+        """更新内容分数
+
+        只读取计算所需的列，用 NumPy 向量化计算热度分数和时间衰减，
+        再只把分数有变化的行按主键批量 UPDATE（executemany）写回。
+        """
+        start = time.perf_counter()
+        rows = db.session.query(
+            Culture.id, Culture.view_count, Culture.like_count, Culture.collect_count,
+            Culture.share_count, Culture.created_at, Culture.score
+        ).filter(Culture.status == 1).all()
+
+        if not rows:
+            return {'rows': 0, 'updated': 0, 'seconds': 0.0, 'rowsPerSecond': 0.0}
+
+        ids, views, likes, collects, shares, created_at, old_scores = zip(*rows)
+        counts = np.array([views, likes, collects, shares], dtype=np.float64)
+        counts = np.nan_to_num(counts)
+
+        # 计算热度分数
+        score = counts.T @ np.array([0.1, 1.0, 2.0, 3.0])
+
+        # 时间衰减因子（越新越靠前）
+        now = np.datetime64(datetime.utcnow(), 's')
+        created = np.array([c or datetime.utcnow() for c in created_at], dtype='datetime64[s]')
+        days = (now - created) // np.timedelta64(1, 'D')
+        time_decay = 1.0 / (1.0 + days * 0.01)
+        new_scores = score * time_decay
+
+        old_scores = np.nan_to_num(np.array(old_scores, dtype=np.float64), nan=-1.0)
+        changed = ~np.isclose(new_scores, old_scores, rtol=1e-5, atol=1e-6)
+
+        ids = np.array(ids)[changed].tolist()
+        new_scores = new_scores[changed].tolist()
+        table = Culture.__table__
+        statement = update(table).where(table.c.id == bindparam('culture_id')).values(score=bindparam('new_score'))
+        for offset in range(0, len(ids), batch_size):
+            db.session.execute(statement, [
+                {'culture_id': culture_id, 'new_score': value}
+                for culture_id, value in zip(ids[offset:offset + batch_size],
+                                             new_scores[offset:offset + batch_size])
+            ])
         db.session.commit()
-        logger.info('✅ 内容分数更新完成')
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            'rows': len(rows),
+            'updated': len(ids),
+            'seconds': round(elapsed, 3),
+            'rowsPerSecond': round(len(rows) / elapsed, 1) if elapsed > 0 else 0.0
+        }
+        logger.info(f'✅ 内容分数更新完成: {stats["rows"]} 条内容, 更新 {stats["updated"]} 条, '
+                    f'{stats["rowsPerSecond"]} 行/秒')
+        return stats
 
 
 # 全局推荐器实例
 recommender = RecommenderSystem()
 
 
-def get_personal_recommendations(user_id, n=10):
-    """获取个性化推荐"""
+def get_personal_recommendations(user_id, n=10, algorithm='hybrid'):
+    """获取个性化推荐（结果按用户缓存）
+
+    algorithm: hybrid（协同过滤+内容混合）或 als（矩阵分解，模型不可用时退回混合推荐）
+    """
+    cached = recommendation_cache.get(user_id, (n, algorithm))
+    if cached is not None:
+        return cached
+
+    # 优先使用离线预计算的结果，没有新鲜结果时在线计算
+    precomputed = get_precomputed(user_id, n, algorithm)
+    if precomputed is None:
+        result = _compute_personal_recommendations(user_id, n, algorithm)
+    else:
+        # 去掉预计算之后用户已经看过的内容，不足 n 条时用在线结果补齐
+        seen = user_profiles.get(user_id).item_ids
+        result = [culture_id for culture_id in precomputed if culture_id not in seen][:n]
+        if len(result) < n:
+            chosen = set(result)
+            result += [culture_id for culture_id in _compute_personal_recommendations(user_id, n, algorithm)
+                       if culture_id not in chosen and culture_id not in seen][:n - len(result)]
+    recommendation_cache.set(user_id, (n, algorithm), result)
+    return result
+
+
+def _compute_personal_recommendations(user_id, n, algorithm):
     # 检查用户是否有行为数据
-    behavior_count = UserBehavior.query.filter_by(user_id=user_id).count()
+    behavior_count = user_profiles.get(user_id).behavior_count
 
     if behavior_count < 3:
         # 新用户，推荐热门内容
         logger.info(f'用户 {user_id} 行为数据不足，推荐热门内容')
         return recommender.get_hot_items(n)
+    if algorithm == 'als':
+        recommended = recommender.recommend_by_als(user_id, n)
+        if recommended:
+            logger.info(f'用户 {user_id} 使用矩阵分解推荐')
+            return recommended
+
+    # 老用户，使用混合推荐
+    logger.info(f'用户 {user_id} 使用混合推荐')
+    return recommender.recommend_hybrid(user_id, n)
+
+
+def init_recommender(full=True):
+    """初始化推荐系统
+
+    full=False 时只增量处理新增的用户行为；尚未全量构建过时自动退化为全量构建。
+    完成后写入新的模型快照，供其它 worker 通过内存映射加载。
+    内容相似度索引随之全量重建或增量加入新内容，不留到第一个相似推荐请求时构建；
+    全量重建时同时重建“看了又看”浏览转移模型。
+    """
+    refresh_content_index(full)
+    if full:
+        rebuild_transitions()
+
+    processed = recommender.update_incremental() if not full else None
+    if processed is not None:
+        recommender.update_scores()
+        logger.info(f'✅ 推荐系统增量更新完成，处理 {processed} 条新行为')
+        if not processed:
+            return
     else:
-        # 老用户，使用混合推荐
-        logger.info(f'用户 {user_id} 使用混合推荐')
-        return recommender.recommend_hybrid(user_id, n)
-
-
-def init_recommender():
-    """初始化推荐系统"""
-    logger.info('🚀 初始化推荐系统...')
-    recommender.build_user_item_matrix()
-    recommender.calculate_item_similarity()
-    recommender.update_scores()
-    logger.info('✅ 推荐系统初始化完成')
+        logger.info('🚀 初始化推荐系统...')
+        recommender.build_model()
+        recommender.update_scores()
+        logger.info('✅ 推荐系统初始化完成')
+
+    if current_app.config.get('ALS_ENABLED'):
+        recommender.train_als(
+            max_seconds=current_app.config.get('ALS_MAX_SECONDS', 300),
+            threads=current_app.config.get('ALS_THREADS', 1)
+        )
+
+    save_model_snapshot()
+
+
+def refresh_content_index(full=True):
+    """全量重建内容相似度索引，或只加入新导入的内容（尚未构建时全量构建）"""
+    try:
+        if full:
+            content_index.build()
+        else:
+            content_index.add_new()
+    except Exception as e:
+        logger.error(f'❌ 内容相似度索引更新失败: {e}')
+
+
+def rebuild_transitions():
+    """按最近的浏览行为重建浏览转移模型"""
+    try:
+        transition_model.build()
+    except Exception as e:
+        logger.error(f'❌ 浏览转移模型构建失败: {e}')
+
+
+def save_model_snapshot():
+    """把当前模型写入快照目录 MODEL_SNAPSHOT_DIR（未配置时跳过），返回版本号"""
+    snapshot_dir = current_app.config.get('MODEL_SNAPSHOT_DIR')
+    if not snapshot_dir:
+        return None
+    try:
+        return recommender.save_snapshot(snapshot_dir)
+    except Exception as e:
+        logger.error(f'❌ 保存推荐模型快照失败: {e}')
+        return None
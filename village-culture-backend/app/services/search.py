@@ -0,0 +1,320 @@
+"""
+内容全文检索
+对名称、摘要、描述、产地、非遗级别建立倒排索引（jieba 分词 + 中文二元组 + 中文单字），
+按 BM25 相关度与内容分数加权排序，查询完全在内存中完成，不再对 TEXT 列做 LIKE 全表扫描。
+
+索引可保存为 .npz 文件，进程启动时直接加载，再从数据库补充文件之后新导入的内容。
+内容下架后定期同步到索引中的上架标记，检索结果和命中总数都不包含已下架的内容。
+"""
+import os
+import re
+import math
+import time
+import threading
+from collections import Counter
+import numpy as np
+from flask import current_app, has_app_context
+from loguru import logger
+
+from app.models import db, Culture
+
+try:
+    import jieba
+    HAS_JIEBA = True
+except ImportError:
+    HAS_JIEBA = False
+    logger.warning('未安装jieba，全文检索只使用二元组分词')
+
+CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+WORD_CHAR_PATTERN = re.compile(r'\w')
+
+# 索引文件格式版本，分词方式变化后旧文件不再加载，改为重新构建
+INDEX_FORMAT = 2
+
+# 各字段在文档中重复的次数（名称权重最高）
+FIELD_WEIGHTS = (('name', 3), ('heritage_level', 2), ('origin', 1), ('summary', 1), ('description', 1))
+
+
+def analyze(text, unigrams=False):
+    """分词：jieba 搜索引擎模式的词 + 中文连续片段的二元组 + 英文/数字单词
+
+    单独的一个汉字作为单字词；unigrams=True（建立索引时）对所有中文片段都补充单字词，
+    这样单字查询也能命中，而多字查询仍只使用二元组。
+    """
+    if not text:
+        return []
+    text = text.lower()
+    tokens = []
+    if HAS_JIEBA:
+        tokens.extend(word for word in jieba.lcut_for_search(text) if len(word) > 1 and WORD_CHAR_PATTERN.search(word))
+    for run in CJK_PATTERN.findall(text):
+        if len(run) == 1 or unigrams:
+            tokens.extend(run)
+        if len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(WORD_PATTERN.findall(text))
+    return tokens
+
+
+class SearchIndex:
+    """BM25 倒排索引
+
+    文档按加入顺序编号，倒排表为 {词: (文档编号数组, 词频数组)}。
+    """
+
+    def __init__(self, k1=1.2, b=0.75, score_weight=0.2, min_match=0.5, check_interval=60, score_interval=600):
+        self.k1 = k1
+        self.b = b
+        # 最终得分 = (1 - score_weight) · 归一化 BM25 + score_weight · 归一化内容分数
+        self.score_weight = score_weight
+        # 文档至少包含查询中 min_match 比例的词才算命中
+        self.min_match = min_match
+        self.check_interval = check_interval
+        self.score_interval = score_interval
+        self.postings = {}
+        self.doc_ids = np.zeros(0, dtype=np.int64)
+        self.doc_lens = np.zeros(0, dtype=np.float64)
+        self.doc_scores = np.zeros(0, dtype=np.float64)
+        # 文档是否仍为上架状态（随内容分数定期刷新）
+        self.doc_active = np.zeros(0, dtype=bool)
+        self.max_culture_id = 0
+        self._built = False
+        self._checked_at = 0.0
+        self._scores_at = 0.0
+        self._file_mtime = None
+        self._lock = threading.Lock()
+        # 串行化“读取水位线 - 读取数据库 - 追加”的整个过程，避免并发时重复追加同一批内容（可重入）
+        self._build_lock = threading.RLock()
+
+    @property
+    def path(self):
+        if has_app_context():
+            return current_app.config.get('SEARCH_INDEX_PATH')
+        return None
+
+    def _file_changed(self, path):
+        """索引文件是否被其它进程（导入、定时重建）更新过"""
+        try:
+            return os.path.getmtime(path) != self._file_mtime
+        except OSError:
+            return False
+
+    def _load_docs(self, min_id=0):
+        rows = db.session.query(
+            Culture.id, Culture.score, *[getattr(Culture, field) for field, _ in FIELD_WEIGHTS]
+        ).filter(Culture.status == 1, Culture.id > min_id).order_by(Culture.id).all()
+        docs = []
+        for row in rows:
+            terms = Counter()
+            for field, repeat in FIELD_WEIGHTS:
+                for token in analyze(getattr(row, field), unigrams=True):
+                    terms[token] += repeat
+            docs.append((row.id, row.score or 0.0, terms))
+        return docs
+
+    def _append(self, docs):
+        """把文档加入倒排表（调用方持有锁）"""
+        offset = len(self.doc_ids)
+        new_postings = {}
+        for position, (_, _, terms) in enumerate(docs, offset):
+            for term, tf in terms.items():
+                entry = new_postings.setdefault(term, ([], []))
+                entry[0].append(position)
+                entry[1].append(tf)
+        for term, (positions, tfs) in new_postings.items():
+            positions = np.asarray(positions, dtype=np.int32)
+            tfs = np.asarray(tfs, dtype=np.float32)
+            existing = self.postings.get(term)
+            if existing is not None:
+                positions = np.concatenate([existing[0], positions])
+                tfs = np.concatenate([existing[1], tfs])
+            self.postings[term] = (positions, tfs)
+
+        self.doc_ids = np.concatenate([self.doc_ids, np.asarray([doc[0] for doc in docs], dtype=np.int64)])
+        self.doc_scores = np.concatenate([self.doc_scores, np.asarray([doc[1] for doc in docs], dtype=np.float64)])
+        self.doc_lens = np.concatenate([self.doc_lens, np.asarray([sum(doc[2].values()) for doc in docs],
+                                                                  dtype=np.float64)])
+        self.doc_active = np.concatenate([self.doc_active, np.ones(len(docs), dtype=bool)])
+        if docs:
+            self.max_culture_id = max(self.max_culture_id, docs[-1][0])
+
+    def build(self):
+        """从数据库全量构建索引"""
+        start = time.perf_counter()
+        with self._build_lock:
+            docs = self._load_docs()
+            with self._lock:
+                self.postings = {}
+                self.doc_ids = np.zeros(0, dtype=np.int64)
+                self.doc_lens = np.zeros(0, dtype=np.float64)
+                self.doc_scores = np.zeros(0, dtype=np.float64)
+                self.doc_active = np.zeros(0, dtype=bool)
+                self.max_culture_id = 0
+                self._append(docs)
+                self._built = True
+                self._checked_at = self._scores_at = time.monotonic()
+        logger.info(f'✅ 全文检索索引构建完成: {len(docs)} 条内容, {len(self.postings)} 个词, '
+                    f'耗时 {time.perf_counter() - start:.1f}s')
+        return len(docs)
+
+    def add_new(self):
+        """增量加入新导入的内容，返回新增条数"""
+        with self._build_lock:
+            if not self._built:
+                return self.build()
+            docs = self._load_docs(self.max_culture_id)
+            if docs:
+                with self._lock:
+                    self._append(docs)
+                logger.info(f'全文检索索引新增 {len(docs)} 条内容')
+        return len(docs)
+
+    def refresh_scores(self):
+        """重新读取内容分数（分数由定时任务更新）和上架状态，已删除或下架的内容不再命中"""
+        rows = db.session.query(Culture.id, Culture.score, Culture.status).filter(
+            Culture.id <= self.max_culture_id
+        ).all()
+        scores = {row.id: row.score for row in rows}
+        active = {row.id for row in rows if row.status == 1}
+        with self._lock:
+            doc_ids = self.doc_ids.tolist()
+            self.doc_scores = np.asarray([scores.get(doc_id) or 0.0 for doc_id in doc_ids], dtype=np.float64)
+            self.doc_active = np.asarray([doc_id in active for doc_id in doc_ids], dtype=bool)
+            self._scores_at = time.monotonic()
+
+    def save(self, path=None):
+        """保存索引文件（先写临时文件再原子替换）"""
+        path = path or self.path
+        if not path or not self._built:
+            return None
+        with self._lock:
+            terms = list(self.postings)
+            lengths = [len(self.postings[term][0]) for term in terms]
+            arrays = {
+                'format': np.asarray(INDEX_FORMAT),
+                'terms': np.asarray(terms, dtype=str),
+                'term_indptr': np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+                'positions': np.concatenate([self.postings[t][0] for t in terms]) if terms else np.zeros(0, np.int32),
+                'tfs': np.concatenate([self.postings[t][1] for t in terms]) if terms else np.zeros(0, np.float32),
+                'doc_ids': self.doc_ids,
+                'doc_lens': self.doc_lens,
+                'doc_scores': self.doc_scores
+            }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        self._file_mtime = os.path.getmtime(path)
+        return path
+
+    def load(self, path=None):
+        """加载索引文件，文件不存在或损坏时返回 False"""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            mtime = os.path.getmtime(path)
+            with np.load(path, allow_pickle=False) as data:
+                if 'format' not in data.files or int(data['format']) != INDEX_FORMAT:
+                    logger.warning('全文检索索引文件格式版本不匹配，重新构建')
+                    return False
+                terms = data['terms'].tolist()
+                indptr = data['term_indptr']
+                positions, tfs = data['positions'], data['tfs']
+                postings = {term: (positions[indptr[i]:indptr[i + 1]], tfs[indptr[i]:indptr[i + 1]])
+                            for i, term in enumerate(terms)}
+                doc_ids, doc_lens, doc_scores = data['doc_ids'], data['doc_lens'], data['doc_scores']
+        except Exception as e:
+            logger.error(f'加载全文检索索引失败: {e}')
+            return False
+        with self._lock:
+            self.postings = postings
+            self.doc_ids, self.doc_lens, self.doc_scores = doc_ids, doc_lens, doc_scores
+            self.doc_active = np.ones(len(doc_ids), dtype=bool)
+            self.max_culture_id = int(doc_ids.max()) if len(doc_ids) else 0
+            self._file_mtime = mtime
+            self._built = True
+            self._checked_at = self._scores_at = time.monotonic()
+        logger.info(f'已加载全文检索索引: {len(doc_ids)} 条内容, {len(postings)} 个词')
+        return True
+
+    def refresh(self):
+        """首次使用时加载索引文件或全量构建，之后按间隔补充新内容、刷新内容分数
+
+        索引文件被其它进程更新后重新加载。
+        """
+        if not self._built:
+            with self._build_lock:
+                if not self._built:
+                    if has_app_context():
+                        self.score_weight = current_app.config.get('SEARCH_SCORE_WEIGHT', self.score_weight)
+                    if self.load():
+                        self.add_new()
+                        # 索引文件保存之后可能有内容下架
+                        self.refresh_scores()
+                    else:
+                        self.build()
+                        self.save()
+            return
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            path = self.path
+            with self._build_lock:
+                if path and self._file_changed(path):
+                    self.load(path)
+                    self.refresh_scores()
+                latest = db.session.query(db.func.max(Culture.id)).scalar() or 0
+                if latest > self.max_culture_id:
+                    self.add_new()
+        if now - self._scores_at >= self.score_interval:
+            self.refresh_scores()
+
+    def search(self, query, offset=0, limit=20):
+        """检索，返回 (当前页内容ID列表, 命中总数)"""
+        self.refresh()
+        terms = list(dict.fromkeys(analyze(query)))
+        with self._lock:
+            n_docs = len(self.doc_ids)
+            postings = [self.postings[term] for term in terms if term in self.postings]
+            doc_ids, doc_lens, doc_scores = self.doc_ids, self.doc_lens, self.doc_scores
+            doc_active = self.doc_active
+        if not terms or not postings or n_docs == 0:
+            return [], 0
+
+        # BM25
+        avg_len = doc_lens.mean() or 1.0
+        bm25 = np.zeros(n_docs, dtype=np.float64)
+        matched = np.zeros(n_docs, dtype=np.int32)
+        for positions, tfs in postings:
+            df = len(positions)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_lens[positions] / avg_len)
+            bm25[positions] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+            matched[positions] += 1
+
+        hits = np.flatnonzero((matched >= max(1, math.ceil(len(terms) * self.min_match))) & doc_active)
+        if len(hits) == 0:
+            return [], 0
+
+        # 与内容分数加权（均在命中集合内归一化到 0~1）
+        relevance = bm25[hits] / bm25[hits].max()
+        scores = np.maximum(doc_scores[hits], 0.0)
+        if scores.max() > 0:
+            relevance = (1.0 - self.score_weight) * relevance + self.score_weight * scores / scores.max()
+
+        end = min(offset + limit, len(hits))
+        if offset >= end:
+            return [], len(hits)
+        # 只对需要的前 end 个结果完整排序
+        if end < len(hits):
+            top = np.argpartition(-relevance, end - 1)[:end]
+        else:
+            top = np.arange(len(hits))
+        top = top[np.lexsort((doc_ids[hits][top], -relevance[top]))]
+        return doc_ids[hits][top[offset:end]].tolist(), len(hits)
+
+
+# 全局全文检索索引
+search_index = SearchIndex()
@@ -0,0 +1,443 @@
+"""
+物品相似度计算引擎
+基于稀疏矩阵（CSR）运算计算物品-物品相似度
+"""
+import os
+import math
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
+
+# 工作进程内已打开的共享输入矩阵（按目录缓存，每个进程只打开一次）
+_shared_matrices = {}
+
+# 新鲜度下限（约60个半衰期），避免极旧的行为下溢为0而改变稀疏结构
+MIN_FRESHNESS = 2.0 ** -60
+
+
+def _offdiag(matrix):
+    """去掉对角线并整理为规范的 CSR（索引有序、无重复、无显式零）"""
+    matrix = matrix.tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    matrix.sum_duplicates()
+    matrix.sort_indices()
+    return matrix
+
+
+class ItemSimilarityEngine:
+    """稀疏矩阵物品相似度引擎
+
+    与原始算法保持一致的相似度定义：
+        sim(i, j) = |N(i) ∩ N(j)| / sqrt(sum_i * sum_j)
+    其中 sum_i 为共同用户对物品 i 的评分之和。
+    令 B 为用户-物品的0/1矩阵，R 为用户-物品评分矩阵，则
+        共现矩阵 C = Bᵀ·B，评分和矩阵 A = Rᵀ·B，
+        sim = C / sqrt(A ∘ Aᵀ)
+    全部通过稀疏矩阵乘法完成，无需逐对遍历物品。
+    去掉对角线后 C、A、Aᵀ 的非零结构完全相同，因此可以直接按 data 数组逐元素计算。
+
+    开启时间衰减时，评分 R 使用未衰减的权重，分子改为按新鲜度加权的共现：
+    记 g 为某条 (用户, 物品) 衰减后与衰减前权重之比，F 为 sqrt(g) 组成的矩阵，
+        共现 C_f = Fᵀ·F（每位共同用户贡献 sqrt(g_i · g_j)），sim = C_f / sqrt(A ∘ Aᵀ)
+    一个半衰期之前的共现只算半次，陈旧的物品对被压低；不衰减时 F = B，与原定义一致。
+    共同用户数（剪枝用的 support）仍为未加权的 C。
+    """
+
+    def __init__(self):
+        self.user_ids = []
+        self.item_ids = []
+        self.user_index = {}
+        self.item_index = {}
+        self.cooccurrence = None
+        # 按新鲜度加权的共现矩阵（不衰减时为 None，直接使用 cooccurrence）
+        self.fresh_cooccurrence = None
+        self.rating_sums = None
+        self.rating_sums_t = None
+        self.similarity = None
+        # 增量更新累积的变化量 {行号: (列号数组, 变化量数组)}，变化量的四列依次为 C、C_f、A、Aᵀ
+        self._pending = {}
+        self._pending_nnz = 0
+        self._item_id_array = np.zeros(0, dtype=np.int64)
+
+    def build_matrix(self, user_item_matrix, decayed_matrix=None):
+        """由 user_item_matrix（未衰减的权重）构建 CSR 格式的用户-物品评分矩阵
+
+        给出 decayed_matrix（衰减后的权重，键与 user_item_matrix 相同）时同时构建新鲜度矩阵 F，
+        返回 (评分矩阵, F)；否则 F 为 None。
+        """
+        self.user_ids = list(user_item_matrix.keys())
+        self.user_index = {user_id: idx for idx, user_id in enumerate(self.user_ids)}
+        self.item_index = {}
+        self.item_ids = []
+        self._item_id_array = np.zeros(0, dtype=np.int64)
+
+        indptr = [0]
+        indices = []
+        data = []
+        for user_id in self.user_ids:
+            for item_id, rating in user_item_matrix[user_id].items():
+                col = self.item_index.get(item_id)
+                if col is None:
+                    col = len(self.item_ids)
+                    self.item_index[item_id] = col
+                    self.item_ids.append(item_id)
+                indices.append(col)
+                data.append(rating)
+            indptr.append(len(indices))
+
+        shape = (len(self.user_ids), len(self.item_ids))
+        indices = np.asarray(indices, dtype=np.int32)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        ratings = sparse.csr_matrix((np.asarray(data, dtype=np.float64), indices, indptr), shape=shape)
+        if decayed_matrix is None:
+            return ratings, None
+        decayed = [decayed_matrix[user_id][item_id]
+                   for user_id in self.user_ids for item_id in user_item_matrix[user_id]]
+        return ratings, sparse.csr_matrix((_freshness(decayed, data), indices.copy(), indptr.copy()), shape=shape)
+
+    def fit(self, user_item_matrix, decayed_matrix=None):
+        """计算物品相似度矩阵，返回 CSR 格式的相似度矩阵
+
+        user_item_matrix 为未衰减的权重，decayed_matrix 为衰减后的权重（不衰减时为 None）。
+        """
+        ratings, freshness = self.build_matrix(user_item_matrix, decayed_matrix)
+
+        # 0/1 交互矩阵
+        binary = ratings.copy()
+        binary.data = np.ones_like(binary.data)
+
+        ratings_t = ratings.T.tocsr()
+        binary_t = binary.T.tocsr()
+
+        # 共现次数与共同用户评分和
+        self.cooccurrence = _offdiag(binary_t @ binary)
+        self.fresh_cooccurrence = None if freshness is None else _offdiag(freshness.T.tocsr() @ freshness)
+        self.rating_sums = _offdiag(ratings_t @ binary)
+        self.rating_sums_t = _offdiag(self.rating_sums.T)
+        self.similarity = None
+        self._pending = {}
+        self._pending_nnz = 0
+        return self.similarity_matrix()
+
+    @property
+    def _numerator(self):
+        return self.cooccurrence if self.fresh_cooccurrence is None else self.fresh_cooccurrence
+
+    def _item_ids_array(self):
+        if len(self._item_id_array) != len(self.item_ids):
+            self._item_id_array = np.asarray(self.item_ids)
+        return self._item_id_array
+
+    def similarity_matrix(self):
+        """由共现矩阵和评分和矩阵得到相似度矩阵"""
+        self._fold()
+        if self.similarity is None:
+            similarity = self.cooccurrence.copy()
+            similarity.data = self._numerator.data / np.sqrt(
+                self.rating_sums.data * self.rating_sums_t.data
+            )
+            self.similarity = similarity
+        return self.similarity
+
+    def _row_values(self, row):
+        """物品的一行（完整矩阵加上累积的变化量），返回 (列号数组, [C, C_f, A, Aᵀ] 数组)"""
+        if row < self.cooccurrence.shape[0]:
+            start, end = self.cooccurrence.indptr[row], self.cooccurrence.indptr[row + 1]
+            cols = self.cooccurrence.indices[start:end]
+            values = np.zeros((end - start, 4))
+            values[:, 0] = self.cooccurrence.data[start:end]
+            if self.fresh_cooccurrence is not None:
+                values[:, 1] = self.fresh_cooccurrence.data[start:end]
+            values[:, 2] = self.rating_sums.data[start:end]
+            values[:, 3] = self.rating_sums_t.data[start:end]
+        else:
+            cols, values = np.zeros(0, dtype=np.int32), np.zeros((0, 4))
+
+        pending = self._pending.get(row)
+        if pending is not None:
+            cols, values = _merge_row(cols, values, *pending)
+        return cols, values
+
+    def neighbors_of(self, item_id):
+        """获取物品的全部相似物品，返回 (ids, sims, supports)"""
+        cols, values = self._row_values(self.item_index[item_id])
+        numerator = values[:, 0] if self.fresh_cooccurrence is None else values[:, 1]
+        sims = numerator / np.sqrt(values[:, 2] * values[:, 3])
+        ids = self._item_ids_array()[cols]
+        return ids, sims, values[:, 0]
+
+    def build_neighbors(self, store):
+        """将每个物品的相似物品剪枝后写入近邻表"""
+        similarity = self.similarity_matrix()
+        item_ids = np.asarray(self.item_ids)
+        indptr = similarity.indptr
+        for row, item_id in enumerate(self.item_ids):
+            start, end = indptr[row], indptr[row + 1]
+            if start == end:
+                continue
+            store.set(
+                item_id,
+                item_ids[similarity.indices[start:end]],
+                similarity.data[start:end],
+                self.cooccurrence.data[start:end]
+            )
+        return store
+
+    def _rows_matrix(self, rows, user_ids, columns, decayed_rows=None):
+        """将若干用户的 {item: rating} 行转换为 CSR 矩阵，columns 为 {全局物品列号: 局部列号}
+
+        返回 (评分矩阵, 0/1 矩阵, 新鲜度矩阵)，未给出 decayed_rows 时新鲜度矩阵为 None。
+        """
+        indptr = [0]
+        indices = []
+        data = []
+        decayed = []
+        for user_id in user_ids:
+            for item_id, rating in rows.get(user_id, {}).items():
+                indices.append(columns[self.item_index[item_id]])
+                data.append(rating)
+                if decayed_rows is not None:
+                    decayed.append(decayed_rows[user_id][item_id])
+            indptr.append(len(indices))
+
+        shape = (len(user_ids), len(columns))
+        indices = np.asarray(indices, dtype=np.int32)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        ratings = sparse.csr_matrix((np.asarray(data, dtype=np.float64), indices, indptr), shape=shape)
+        binary = ratings.copy()
+        binary.data = np.ones_like(binary.data)
+        freshness = None
+        if decayed_rows is not None:
+            freshness = sparse.csr_matrix((_freshness(decayed, data), indices.copy(), indptr.copy()), shape=shape)
+        return ratings, binary, freshness
+
+    def partial_fit(self, old_rows, new_rows, old_decayed=None, new_decayed=None, fold_ratio=0.5):
+        """增量更新相似度
+
+        old_rows / new_rows 为受影响用户更新前后的 {user: {item: rating}}（未衰减的权重），
+        开启时间衰减时 old_decayed / new_decayed 为对应的衰减后权重。
+        共现矩阵与评分和矩阵都是按用户求和的，因此只需减去这些用户的旧贡献、加上新贡献。
+        变化量只涉及这些用户交互过的物品，只在这些物品的局部矩阵上计算，
+        按物品行累积在 _pending 中而不重写完整矩阵：单次更新的开销与受影响用户的行长度
+        （Σ 行长度²）成正比，与模型的规模无关。累积的变化量超过完整矩阵非零元的 fold_ratio 时
+        才合并回完整矩阵，这部分开销均摊到各次更新。
+        返回相似度可能发生变化的物品ID列表。
+        """
+        user_ids = list(new_rows.keys())
+
+        # 注册新出现的用户和物品
+        for user_id in user_ids:
+            if user_id not in self.user_index:
+                self.user_index[user_id] = len(self.user_ids)
+                self.user_ids.append(user_id)
+        for row in new_rows.values():
+            for item_id in row:
+                if item_id not in self.item_index:
+                    self.item_index[item_id] = len(self.item_ids)
+                    self.item_ids.append(item_id)
+
+        # 受影响的物品（全局列号），变化量只在这些列组成的局部矩阵上计算
+        touched = np.asarray(sorted({self.item_index[item_id] for rows in (old_rows, new_rows)
+                                     for row in rows.values() for item_id in row}), dtype=np.int64)
+        columns = {col: idx for idx, col in enumerate(touched.tolist())}
+
+        if self.fresh_cooccurrence is None:
+            old_decayed = new_decayed = None
+        old_ratings, old_binary, old_freshness = self._rows_matrix(old_rows, user_ids, columns, old_decayed)
+        new_ratings, new_binary, new_freshness = self._rows_matrix(new_rows, user_ids, columns, new_decayed)
+
+        delta_rating_sums = (new_ratings.T @ new_binary) - (old_ratings.T @ old_binary)
+        deltas = [
+            (new_binary.T @ new_binary) - (old_binary.T @ old_binary),
+            None if new_freshness is None else (new_freshness.T @ new_freshness) - (old_freshness.T @ old_freshness),
+            delta_rating_sums,
+            delta_rating_sums.T
+        ]
+        self._accumulate(touched, deltas)
+        if self._pending_nnz > self.cooccurrence.nnz * fold_ratio:
+            self._fold()
+        self.similarity = None
+
+        # 行为只增不减，受影响的物品即为这些用户新行中出现的物品
+        affected = touched[np.unique(new_binary.indices)]
+        return [self.item_ids[col] for col in affected.tolist()]
+
+    def _accumulate(self, touched, deltas):
+        """把局部变化量（列号为 touched 的下标）按行累积到 _pending"""
+        rows, cols, values = [], [], []
+        for column, delta in enumerate(deltas):
+            if delta is None:
+                continue
+            delta = delta.tocoo()
+            block = np.zeros((delta.nnz, 4))
+            block[:, column] = delta.data
+            rows.append(touched[delta.row])
+            cols.append(touched[delta.col])
+            values.append(block)
+        rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+        # 去掉对角线，按 (行, 列) 排序后合并重复项
+        mask = rows != cols
+        rows, cols, values = rows[mask], cols[mask], values[mask]
+        if len(rows) == 0:
+            return
+        order = np.lexsort((cols, rows))
+        rows, cols, values = rows[order], cols[order], values[order]
+        starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])])
+        rows, cols, values = rows[starts], cols[starts], np.add.reduceat(values, starts, axis=0)
+
+        bounds = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1], True])
+        for begin, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            row = int(rows[begin])
+            pending = self._pending.get(row)
+            if pending is None:
+                self._pending[row] = (cols[begin:end], values[begin:end])
+                self._pending_nnz += end - begin
+            else:
+                merged = _merge_row(*pending, cols[begin:end], values[begin:end])
+                self._pending_nnz += len(merged[0]) - len(pending[0])
+                self._pending[row] = merged
+
+    def _fold(self):
+        """把累积的变化量合并回完整矩阵（开销与矩阵非零元数量成正比）"""
+        if not self._pending:
+            return
+        rows = np.concatenate([np.full(len(cols), row, dtype=np.int64)
+                               for row, (cols, _) in self._pending.items()])
+        cols = np.concatenate([cols for cols, _ in self._pending.values()])
+        values = np.concatenate([values for _, values in self._pending.values()])
+        n_items = len(self.item_ids)
+
+        def delta(column):
+            return sparse.csr_matrix((values[:, column], (rows, cols)), shape=(n_items, n_items))
+
+        for matrix in (self.cooccurrence, self.fresh_cooccurrence, self.rating_sums, self.rating_sums_t):
+            if matrix is not None and matrix.shape[0] != n_items:
+                matrix.resize((n_items, n_items))
+        self.cooccurrence = _offdiag(self.cooccurrence + delta(0))
+        if self.fresh_cooccurrence is not None:
+            self.fresh_cooccurrence = _offdiag(self.fresh_cooccurrence + delta(1))
+        self.rating_sums = _offdiag(self.rating_sums + delta(2))
+        self.rating_sums_t = _offdiag(self.rating_sums_t + delta(3))
+        self._pending = {}
+        self._pending_nnz = 0
+        self.similarity = None
+
+    def build_neighbors_parallel(self, user_item_matrix, store, workers=2, block_size=None, decayed_matrix=None):
+        """多进程分块计算相似度并合并为近邻表
+
+        评分矩阵（及新鲜度矩阵）以 .npy 文件写入临时目录，各工作进程以内存映射方式打开（不随任务序列化传输）。
+        物品按行分块，每个任务计算一块物品与全部物品的共现/评分和，只返回每个物品剪枝后的 Top-K。
+        不保留完整的共现矩阵，因此之后无法 partial_fit。
+        """
+        ratings, freshness = self.build_matrix(user_item_matrix, decayed_matrix)
+        n_items = len(self.item_ids)
+        if n_items == 0:
+            return store
+        block_size = block_size or max(1, math.ceil(n_items / (workers * 4)))
+        item_ids = np.asarray(self.item_ids)
+
+        path = tempfile.mkdtemp(prefix='similarity-')
+        try:
+            _save_shared(path, ratings, freshness)
+            blocks = [(path, start, min(start + block_size, n_items), store.k, store.min_similarity,
+                       store.min_support) for start in range(0, n_items, block_size)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for rows in executor.map(_neighbor_block, blocks):
+                    for row, cols, sims, supports in rows:
+                        store.set(item_ids[row], item_ids[cols], sims, supports)
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+        self.cooccurrence = self.fresh_cooccurrence = self.rating_sums = self.rating_sums_t = self.similarity = None
+        return store
+
+
+def _merge_row(cols, values, other_cols, other_values):
+    """合并同一行的两组 (有序列号, 数值)，相同列的数值相加"""
+    merged = np.union1d(cols, other_cols)
+    merged_values = np.zeros((len(merged), values.shape[1]))
+    merged_values[np.searchsorted(merged, cols)] += values
+    merged_values[np.searchsorted(merged, other_cols)] += other_values
+    return merged, merged_values
+
+
+def _freshness(decayed, ratings):
+    """新鲜度 sqrt(衰减后权重 / 原始权重)"""
+    decayed = np.asarray(decayed, dtype=np.float64)
+    ratings = np.asarray(ratings, dtype=np.float64)
+    ratio = np.divide(decayed, ratings, out=np.ones_like(decayed), where=ratings > 0)
+    return np.sqrt(np.maximum(ratio, MIN_FRESHNESS))
+
+
+def _save_shared(path, ratings, freshness=None):
+    """保存用户-物品评分矩阵、新鲜度矩阵及其转置的 CSR 数组"""
+    matrices = [('ratings', ratings), ('ratings_t', ratings.T.tocsr())]
+    if freshness is not None:
+        matrices += [('fresh', freshness), ('fresh_t', freshness.T.tocsr())]
+    for name, matrix in matrices:
+        np.save(os.path.join(path, f'{name}_data.npy'), matrix.data)
+        np.save(os.path.join(path, f'{name}_indices.npy'), matrix.indices)
+        np.save(os.path.join(path, f'{name}_indptr.npy'), matrix.indptr)
+        np.save(os.path.join(path, f'{name}_shape.npy'), np.asarray(matrix.shape))
+
+
+def _load_shared(path):
+    """工作进程中以内存映射方式打开共享矩阵，返回 (R, B, Rᵀ, Bᵀ, F, Fᵀ)，不衰减时 F、Fᵀ 为 None"""
+    if path not in _shared_matrices:
+        _shared_matrices.clear()
+        matrices = []
+        for name in ('ratings', 'ratings_t', 'fresh', 'fresh_t'):
+            if not os.path.exists(os.path.join(path, f'{name}_shape.npy')):
+                matrices.append(None)
+                continue
+            arrays = [np.load(os.path.join(path, f'{name}_{part}.npy'), mmap_mode='r')
+                      for part in ('data', 'indices', 'indptr')]
+            shape = tuple(np.load(os.path.join(path, f'{name}_shape.npy')).tolist())
+            matrix = sparse.csr_matrix(tuple(arrays), shape=shape, copy=False)
+            if name.startswith('ratings'):
+                binary = sparse.csr_matrix((np.ones(len(arrays[0])), arrays[1], arrays[2]), shape=shape, copy=False)
+                matrices.extend([matrix, binary])
+            else:
+                matrices.append(matrix)
+        _shared_matrices[path] = matrices
+    return _shared_matrices[path]
+
+
+def _neighbor_block(args):
+    """计算物品 [start, end) 的近邻，返回 [(行号, 邻居列号, 相似度, 共同用户数), ...]"""
+    path, start, end, k, min_similarity, min_support = args
+    ratings, binary, ratings_t, binary_t, freshness, freshness_t = _load_shared(path)
+
+    block_ratings_t = ratings_t[start:end]
+    block_binary_t = binary_t[start:end]
+    # 与全量算法相同：C = BᵀB，A = RᵀB，Aᵀ 的对应行为 BᵀR，衰减时分子为 FᵀF
+    blocks = [block_binary_t @ binary, block_ratings_t @ binary, block_binary_t @ ratings]
+    if freshness is not None:
+        blocks.append(freshness_t[start:end] @ freshness)
+    for matrix in blocks:
+        matrix.sum_duplicates()
+        matrix.sort_indices()
+    cooccurrence, rating_sums, rating_sums_t = blocks[:3]
+    numerator = blocks[3] if freshness is not None else cooccurrence
+
+    results = []
+    for offset in range(end - start):
+        begin, stop = cooccurrence.indptr[offset], cooccurrence.indptr[offset + 1]
+        cols = cooccurrence.indices[begin:stop]
+        supports = cooccurrence.data[begin:stop]
+        sims = numerator.data[numerator.indptr[offset]:numerator.indptr[offset + 1]] / np.sqrt(
+            rating_sums.data[rating_sums.indptr[offset]:rating_sums.indptr[offset + 1]] *
+            rating_sums_t.data[rating_sums_t.indptr[offset]:rating_sums_t.indptr[offset + 1]]
+        )
+        mask = (cols != start + offset) & (sims >= min_similarity) & (supports >= min_support)
+        cols, sims, supports = cols[mask], sims[mask], supports[mask]
+        if len(sims) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            cols, sims, supports = cols[top], sims[top], supports[top]
+        if len(sims):
+            results.append((start + offset, cols, sims, supports))
+    return results
@@ -0,0 +1,184 @@
+"""
+推荐模型快照
+将构建好的模型（ID映射、用户-物品权重、物品近邻表、ALS隐向量）保存为带版本号的 .npy 文件目录，
+各个 worker 通过内存映射（mmap）打开，同一台机器上共享同一份物理内存页。
+
+目录结构:
+    <snapshot_dir>/CURRENT          当前版本目录名（原子替换）
+    <snapshot_dir>/v<版本号>/meta.json
+    <snapshot_dir>/v<版本号>/*.npy
+"""
+import os
+import json
+import shutil
+from collections.abc import Mapping
+from datetime import datetime
+import numpy as np
+from loguru import logger
+
+FORMAT_VERSION = 1
+CURRENT_FILE = 'CURRENT'
+
+ARRAYS = (
+    'user_ids', 'user_indptr', 'user_items', 'user_weights',
+    'item_ids', 'neighbor_indptr', 'neighbor_ids', 'neighbor_sims'
+)
+# 可选数组：ALS 隐向量（未训练时不写入）
+OPTIONAL_ARRAYS = ('als_user_ids', 'als_user_factors', 'als_item_ids', 'als_item_factors')
+
+
+class SnapshotUserItems(Mapping):
+    """只读的用户-物品矩阵，底层为内存映射的 CSR 数组
+
+    行为与 {user: {item: weight}} 一致，按需把单个用户的行转换为字典。
+    """
+
+    def __init__(self, user_ids, indptr, items, weights):
+        self.user_ids = user_ids
+        self.indptr = indptr
+        self.items = items
+        self.weights = weights
+
+    def _row(self, user_id):
+        idx = int(np.searchsorted(self.user_ids, user_id))
+        if idx < len(self.user_ids) and self.user_ids[idx] == user_id:
+            return idx
+        return None
+
+    def __getitem__(self, user_id):
+        idx = self._row(user_id)
+        if idx is None:
+            raise KeyError(user_id)
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        return dict(zip(self.items[start:end].tolist(), self.weights[start:end].tolist()))
+
+    def __contains__(self, user_id):
+        return self._row(user_id) is not None
+
+    def __iter__(self):
+        return iter(self.user_ids.tolist())
+
+    def __len__(self):
+        return len(self.user_ids)
+
+
+def user_items_to_arrays(user_item_matrix):
+    """将 {user: {item: weight}} 转换为按用户ID排序的 CSR 数组"""
+    user_ids = np.array(sorted(user_item_matrix.keys()), dtype=np.int64)
+    indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+    items, weights = [], []
+    for idx, user_id in enumerate(user_ids.tolist()):
+        row = user_item_matrix[user_id]
+        items.extend(row.keys())
+        weights.extend(row.values())
+        indptr[idx + 1] = len(items)
+    return user_ids, indptr, np.asarray(items, dtype=np.int64), np.asarray(weights, dtype=np.float64)
+
+
+def current_version(snapshot_dir):
+    """读取当前快照版本目录名，不存在时返回 None"""
+    try:
+        with open(os.path.join(snapshot_dir, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _next_version(snapshot_dir):
+    versions = [int(name[1:]) for name in os.listdir(snapshot_dir)
+                if name.startswith('v') and name[1:].isdigit()]
+    return max(versions, default=0) + 1
+
+
+def save_snapshot(snapshot_dir, user_item_matrix, neighbor_store, meta=None, keep=3, als_model=None):
+    """原子地写入一个新版本快照，返回版本目录名
+
+    先写入临时目录再 rename 为正式版本目录，最后原子替换 CURRENT 文件，
+    读取方永远不会看到写了一半的快照。
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    version = f'v{_next_version(snapshot_dir)}'
+    tmp_dir = os.path.join(snapshot_dir, f'.tmp-{version}-{os.getpid()}')
+    os.makedirs(tmp_dir)
+
+    user_ids, user_indptr, user_items, user_weights = user_items_to_arrays(user_item_matrix)
+    item_ids, neighbor_indptr, neighbor_ids, neighbor_sims = neighbor_store.to_arrays()
+    arrays = {
+        'user_ids': user_ids, 'user_indptr': user_indptr,
+        'user_items': user_items, 'user_weights': user_weights,
+        'item_ids': item_ids, 'neighbor_indptr': neighbor_indptr,
+        'neighbor_ids': neighbor_ids, 'neighbor_sims': neighbor_sims
+    }
+    if als_model is not None and als_model.is_trained:
+        arrays.update({
+            'als_user_ids': als_model.user_ids, 'als_user_factors': als_model.user_factors,
+            'als_item_ids': als_model.item_ids, 'als_item_factors': als_model.item_factors
+        })
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), array)
+
+    meta = dict(meta or {})
+    meta.update({
+        'format': FORMAT_VERSION,
+        'version': version,
+        'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        'users': len(user_ids),
+        'items': len(item_ids),
+        'neighbor_k': neighbor_store.k,
+        'min_similarity': neighbor_store.min_similarity,
+        'min_support': neighbor_store.min_support
+    })
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    os.rename(tmp_dir, os.path.join(snapshot_dir, version))
+
+    current_tmp = os.path.join(snapshot_dir, f'.{CURRENT_FILE}.{os.getpid()}')
+    with open(current_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(current_tmp, os.path.join(snapshot_dir, CURRENT_FILE))
+
+    _prune_snapshots(snapshot_dir, keep)
+    logger.info(f'💾 推荐模型快照已保存: {version}')
+    return version
+
+
+def _prune_snapshots(snapshot_dir, keep):
+    """只保留最近的若干个版本（已打开的内存映射不受删除影响）"""
+    versions = sorted(
+        (name for name in os.listdir(snapshot_dir) if name.startswith('v') and name[1:].isdigit()),
+        key=lambda name: int(name[1:])
+    )
+    for name in versions[:-keep]:
+        shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+
+
+def read_meta(snapshot_dir, version):
+    """读取快照的 meta.json，格式版本不匹配时返回 None"""
+    with open(os.path.join(snapshot_dir, version, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format') != FORMAT_VERSION:
+        logger.warning(f'快照格式版本不匹配，忽略: {version}')
+        return None
+    return meta
+
+
+def load_snapshot(snapshot_dir, version=None):
+    """以内存映射方式打开快照，返回 (meta, arrays)；没有可用快照时返回 (None, None)"""
+    version = version or current_version(snapshot_dir)
+    if not version:
+        return None, None
+
+    path = os.path.join(snapshot_dir, version)
+    meta = read_meta(snapshot_dir, version)
+    if meta is None:
+        return None, None
+
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in ARRAYS}
+    for name in OPTIONAL_ARRAYS:
+        file_path = os.path.join(path, f'{name}.npy')
+        if os.path.exists(file_path):
+            arrays[name] = np.load(file_path, mmap_mode='r')
+    return meta, arrays
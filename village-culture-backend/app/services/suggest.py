@@ -0,0 +1,175 @@
+"""
+搜索框输入联想
+以内容名称、产地、分类名（及其全拼、拼音首字母）为键建立有序数组，前缀查询用二分查找定位，
+候选按内容分数排序。短前缀（命中范围大）的结果在构建时预先算好，查询只需一次字典读取。
+"""
+import time
+import heapq
+import threading
+from bisect import bisect_left
+from loguru import logger
+
+from app.models import db, Culture, Category
+
+try:
+    from pypinyin import lazy_pinyin
+    HAS_PYPINYIN = True
+except ImportError:
+    HAS_PYPINYIN = False
+    logger.warning('未安装pypinyin，输入联想不支持拼音')
+
+
+def normalize(text):
+    return ''.join((text or '').lower().split())
+
+
+class SuggestIndex:
+    """前缀联想索引
+
+    entries 为候选 (显示文本, 类型, ID, 分数)；keys/key_entries 为按键排序的 (键, 候选下标)。
+    """
+
+    def __init__(self, limit=10, short_prefix=2, check_interval=60, rebuild_interval=600):
+        # 预先计算结果的最大前缀长度和每个前缀保留的结果数
+        self.limit = limit
+        self.short_prefix = short_prefix
+        self.check_interval = check_interval
+        self.rebuild_interval = rebuild_interval
+        self.entries = []
+        self.keys = []
+        self.key_entries = []
+        self.short_results = {}
+        self.max_culture_id = 0
+        self._pinyin_cache = {}
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # 同一时刻只允许一个线程重建（拼音缓存也只在重建时写入），可重入
+        self._build_lock = threading.RLock()
+
+    def _pinyin_keys(self, text):
+        """全拼和拼音首字母（同一文本只转换一次，重建时复用）"""
+        keys = self._pinyin_cache.get(text)
+        if keys is None:
+            syllables = lazy_pinyin(text, errors='ignore')
+            keys = (''.join(syllables), ''.join(syllable[0] for syllable in syllables if syllable))
+            self._pinyin_cache[text] = keys
+        return keys
+
+    def _keys_for(self, text):
+        keys = {normalize(text)}
+        if HAS_PYPINYIN:
+            keys.update(normalize(key) for key in self._pinyin_keys(text))
+        keys.discard('')
+        return keys
+
+    def build(self):
+        """从数据库重建索引（一次查询内容、一次查询分类）"""
+        with self._build_lock:
+            return self._build()
+
+    def _build(self):
+        start = time.perf_counter()
+        rows = db.session.query(
+            Culture.id, Culture.name, Culture.origin, Culture.category_id, Culture.score
+        ).filter(Culture.status == 1).all()
+        categories = dict(db.session.query(Category.id, Category.name).filter(Category.is_active.is_(True)).all())
+
+        # 产地和分类取其下内容的最高分
+        origin_scores = {}
+        category_scores = {}
+        entries = []
+        for row in rows:
+            score = row.score or 0.0
+            entries.append((row.name, 'culture', row.id, score))
+            if row.origin:
+                origin_scores[row.origin] = max(origin_scores.get(row.origin, score), score)
+            if row.category_id in categories:
+                category_scores[row.category_id] = max(category_scores.get(row.category_id, score), score)
+        entries.extend((origin, 'origin', None, score) for origin, score in origin_scores.items())
+        entries.extend((categories[category_id], 'category', category_id, score)
+                       for category_id, score in category_scores.items())
+
+        pairs = sorted((key, index) for index, entry in enumerate(entries) for key in self._keys_for(entry[0]))
+        keys = [key for key, _ in pairs]
+        key_entries = [index for _, index in pairs]
+
+        # 短前缀的结果预先计算
+        short_candidates = {}
+        for key, index in pairs:
+            for length in range(1, min(self.short_prefix, len(key)) + 1):
+                short_candidates.setdefault(key[:length], set()).add(index)
+        short_results = {
+            prefix: self._rank(entries, indexes, self.limit) for prefix, indexes in short_candidates.items()
+        }
+
+        with self._lock:
+            self.entries = entries
+            self.keys = keys
+            self.key_entries = key_entries
+            self.short_results = short_results
+            self.max_culture_id = max((row.id for row in rows), default=0)
+            self._built_at = self._checked_at = time.monotonic()
+        logger.info(f'输入联想索引: {len(entries)} 个候选, {len(keys)} 个键, '
+                    f'耗时 {(time.perf_counter() - start) * 1000:.0f}ms')
+        return len(entries)
+
+    @staticmethod
+    def _rank(entries, indexes, limit):
+        """按分数取前 limit 个候选（同名候选只保留分数最高的一个）"""
+        ranked = heapq.nlargest(limit * 2, indexes, key=lambda index: (entries[index][3], -index))
+        results = []
+        seen = set()
+        for index in ranked:
+            text = entries[index][0]
+            if text not in seen:
+                seen.add(text)
+                results.append(index)
+                if len(results) == limit:
+                    break
+        return results
+
+    def refresh(self):
+        """首次使用时构建；之后发现新导入的内容或超过重建间隔时重建（分数由定时任务更新）"""
+        if self._needs_rebuild():
+            with self._build_lock:
+                # 等锁期间可能已由其它线程重建完成
+                if self._needs_rebuild():
+                    self._build()
+            return
+        now = time.monotonic()
+        if now - self._checked_at > self.check_interval:
+            self._checked_at = now
+            latest = db.session.query(db.func.max(Culture.id)).scalar() or 0
+            if latest > self.max_culture_id:
+                with self._build_lock:
+                    if latest > self.max_culture_id:
+                        self._build()
+
+    def _needs_rebuild(self):
+        return not self._built_at or time.monotonic() - self._built_at > self.rebuild_interval
+
+    def suggest(self, prefix, limit=None):
+        """返回联想结果 [{'text', 'type', 'id'}, ...]"""
+        self.refresh()
+        limit = limit or self.limit
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            entries, keys, key_entries = self.entries, self.keys, self.key_entries
+            short_results = self.short_results
+        if len(prefix) <= self.short_prefix and limit <= self.limit:
+            indexes = short_results.get(prefix, [])[:limit]
+        else:
+            start = bisect_left(keys, prefix)
+            end = bisect_left(keys, prefix + '\uffff', lo=start)
+            indexes = self._rank(entries, set(key_entries[start:end]), limit)
+
+        return [{'text': entries[index][0], 'type': entries[index][1], 'id': entries[index][2]}
+                for index in indexes]
+
+
+# 全局输入联想索引
+suggest_index = SuggestIndex()
@@ -0,0 +1,141 @@
+"""
+“看了又看”浏览转移模型
+统计同一用户在会话窗口内“看完 A 接着看 B”的次数，每个内容只保留有限个后继计数，
+详情页的“接着看”列表直接读取内存中排好序的后继列表。
+
+模型由 init_recommender（调度器启动时和每日全量重建时）从最近 history_days 天的浏览行为构建，
+之后浏览记录接口（add-history）写入行为后直接调用 record 累加，请求线程不读取数据库。
+计数保存在各进程内，每日重建时与数据库重新对齐并淘汰过时的转移。
+"""
+import time
+import threading
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from loguru import logger
+
+from app.models import db, UserBehavior
+
+
+class SuccessorCounter:
+    """有界的后继计数（Space-Saving 算法）
+
+    最多保存 capacity 个计数；已满时新后继替换计数最小的一项并继承其计数，
+    出现频率高的后继总能留在表中，计数误差不超过被替换项的计数。
+    """
+
+    __slots__ = ('counts', 'capacity')
+
+    def __init__(self, capacity):
+        self.counts = {}
+        self.capacity = capacity
+
+    def add(self, item_id):
+        counts = self.counts
+        if item_id in counts:
+            counts[item_id] += 1
+        elif len(counts) < self.capacity:
+            counts[item_id] = 1
+        else:
+            victim = min(counts, key=counts.get)
+            counts[item_id] = counts.pop(victim) + 1
+
+    def top(self, k):
+        return sorted(self.counts, key=lambda item_id: (-self.counts[item_id], item_id))[:k]
+
+
+class TransitionModel:
+    """内容之间的浏览转移模型"""
+
+    def __init__(self, k=20, capacity=None, session_minutes=30, history_days=30):
+        # 每个内容返回的后继数和实际保留的计数数量
+        self.k = k
+        self.capacity = capacity or k * 4
+        # 两次浏览间隔不超过 session_minutes 才视为同一会话内的连续浏览
+        self.session_minutes = session_minutes
+        # 构建时读取的历史天数
+        self.history_days = history_days
+        self._successors = {}
+        self._next = {}
+        self._last_view = {}
+        # 上次清理后仍在会话中的用户数，超过其两倍时再次清理（均摊 O(1)）
+        self._pruned_size = 0
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _configure(self):
+        if has_app_context():
+            config = current_app.config
+            self.session_minutes = config.get('TRANSITION_SESSION_MINUTES', self.session_minutes)
+            self.history_days = config.get('TRANSITION_HISTORY_DAYS', self.history_days)
+
+    def _consume(self, views):
+        """按顺序处理浏览行为 (user_id, culture_id, created_at)"""
+        window = timedelta(minutes=self.session_minutes)
+        for user_id, culture_id, created_at in views:
+            last = self._last_view.get(user_id)
+            if last is not None and last[0] != culture_id and timedelta(0) <= created_at - last[1] <= window:
+                counter = self._successors.get(last[0])
+                if counter is None:
+                    counter = self._successors[last[0]] = SuccessorCounter(self.capacity)
+                counter.add(culture_id)
+                # 排好序的后继列表在下次读取时重新生成
+                self._next.pop(last[0], None)
+            self._last_view[user_id] = (culture_id, created_at)
+
+    def _prune(self, now):
+        """只保留仍可能与之后的浏览连成会话的用户"""
+        cutoff = now - timedelta(minutes=self.session_minutes)
+        self._last_view = {user_id: last for user_id, last in self._last_view.items() if last[1] >= cutoff}
+        self._pruned_size = len(self._last_view)
+
+    def _query_views(self, since):
+        return db.session.query(
+            UserBehavior.user_id, UserBehavior.culture_id, UserBehavior.created_at
+        ).filter(
+            UserBehavior.behavior_type == 'view', UserBehavior.created_at >= since
+        ).order_by(UserBehavior.id).all()
+
+    @property
+    def is_built(self):
+        return self._built_at > 0
+
+    def build(self):
+        """从最近 history_days 天的浏览行为全量构建，替换现有计数"""
+        self._configure()
+        views = self._query_views(datetime.utcnow() - timedelta(days=self.history_days))
+        model = TransitionModel(k=self.k, capacity=self.capacity, session_minutes=self.session_minutes,
+                                history_days=self.history_days)
+        model._consume(views)
+        if views:
+            model._prune(views[-1][2])
+        with self._lock:
+            self._successors = model._successors
+            self._next = {}
+            self._last_view = model._last_view
+            self._pruned_size = model._pruned_size
+            self._built_at = time.monotonic()
+        logger.info(f'浏览转移模型: {len(views)} 次浏览, {len(self._successors)} 个内容有后继')
+        return len(views)
+
+    def record(self, user_id, culture_id, created_at=None):
+        """记录一次已写入 user_behaviors 的浏览（由浏览记录接口调用，不访问数据库）"""
+        created_at = created_at or datetime.utcnow()
+        with self._lock:
+            self._consume([(user_id, culture_id, created_at)])
+            if len(self._last_view) > max(1024, self._pruned_size * 2):
+                self._prune(created_at)
+
+    def next_items(self, culture_id, n=None):
+        """浏览该内容后最常接着浏览的内容ID列表"""
+        n = n or self.k
+        next_ids = self._next.get(culture_id)
+        if next_ids is None:
+            with self._lock:
+                counter = self._successors.get(culture_id)
+                next_ids = counter.top(self.k) if counter is not None else []
+                self._next[culture_id] = next_ids
+        return next_ids[:n]
+
+
+# 全局浏览转移模型
+transition_model = TransitionModel()
@@ -0,0 +1,146 @@
+"""
+实时趋势
+每个内容用固定长度的环形缓冲区按时间桶（默认5分钟一桶、保留24小时）累计互动次数，
+由写入 user_behaviors 的互动（浏览记录、点赞、收藏）实时写入。趋势分数按需计算：最近一段时间的互动量相对
+窗口内其余时间的平均速度的增长幅度，刚刚开始走红的内容排在前面。
+
+计数保存在当前进程内，进程启动后首次使用时从 user_behaviors 回填最近的行为，
+实时计数与回填使用同一数据来源，重启前后的分数一致。
+"""
+import time
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from flask import current_app, has_app_context
+
+from app.models import db, UserBehavior
+
+# 互动类型权重（与推荐系统的行为权重一致）
+EVENT_WEIGHTS = {
+    'view': 1.0,
+    'like': 2.0,
+    'collect': 3.0,
+    'share': 4.0
+}
+
+
+class TrendingCounter:
+    """按时间桶计数的滑动窗口
+
+    每个内容占用两个长度为桶数的数组：计数和该槽位所属的桶号。
+    写入时若槽位里是过期的桶号就先清零，因此旧桶自动淘汰，每个内容的内存固定。
+    """
+
+    def __init__(self, bucket_seconds=300, window_hours=24, recent_minutes=60, min_events=3):
+        self.bucket_seconds = bucket_seconds
+        self.window_hours = window_hours
+        self.recent_minutes = recent_minutes
+        # 最近时段内互动量低于此值的内容不参与趋势排名
+        self.min_events = min_events
+        self._counts = {}
+        self._stamps = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def n_buckets(self):
+        return max(1, int(self.window_hours * 3600 // self.bucket_seconds))
+
+    @property
+    def recent_buckets(self):
+        return max(1, min(self.n_buckets - 1, int(self.recent_minutes * 60 // self.bucket_seconds)))
+
+    def _bucket(self, timestamp=None):
+        return int((timestamp or time.time()) // self.bucket_seconds)
+
+    def _add(self, culture_id, bucket, weight):
+        counts = self._counts.get(culture_id)
+        if counts is None:
+            counts = self._counts[culture_id] = np.zeros(self.n_buckets, dtype=np.float32)
+            self._stamps[culture_id] = np.full(self.n_buckets, -1, dtype=np.int32)
+        stamps = self._stamps[culture_id]
+        slot = bucket % self.n_buckets
+        if stamps[slot] != bucket:
+            stamps[slot] = bucket
+            counts[slot] = 0.0
+        counts[slot] += weight
+
+    def record(self, culture_id, event_type='view', timestamp=None):
+        """记录一次互动"""
+        weight = EVENT_WEIGHTS.get(event_type)
+        if weight is None:
+            return
+        self._ensure_loaded()
+        with self._lock:
+            self._add(culture_id, self._bucket(timestamp), weight)
+
+    def load(self):
+        """从 user_behaviors 回填窗口内的行为（替换现有计数）"""
+        if has_app_context():
+            config = current_app.config
+            self.bucket_seconds = config.get('TRENDING_BUCKET_SECONDS', self.bucket_seconds)
+            self.window_hours = config.get('TRENDING_WINDOW_HOURS', self.window_hours)
+            self.recent_minutes = config.get('TRENDING_RECENT_MINUTES', self.recent_minutes)
+
+        cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+        rows = db.session.query(
+            UserBehavior.culture_id, UserBehavior.behavior_type, UserBehavior.created_at
+        ).filter(UserBehavior.created_at >= cutoff).all()
+
+        with self._lock:
+            self._counts = {}
+            self._stamps = {}
+            for culture_id, behavior_type, created_at in rows:
+                weight = EVENT_WEIGHTS.get(behavior_type)
+                if weight is not None:
+                    timestamp = created_at.replace(tzinfo=timezone.utc).timestamp()
+                    self._add(culture_id, self._bucket(timestamp), weight)
+            self._loaded = True
+        return len(rows)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def scores(self, now=None):
+        """计算趋势分数，返回 {culture_id: (分数, 最近时段互动量)}；窗口内没有互动的内容顺便移除
+
+        分数 = (最近时段互动量 - 按窗口内其余时间平均速度的期望量) / sqrt(期望量 + 1)
+        """
+        self._ensure_loaded()
+        current = self._bucket(now)
+        n_buckets = self.n_buckets
+        recent_buckets = self.recent_buckets
+        baseline_buckets = n_buckets - recent_buckets
+
+        result = {}
+        with self._lock:
+            for culture_id in list(self._counts):
+                counts, stamps = self._counts[culture_id], self._stamps[culture_id]
+                age = current - stamps
+                valid = (age >= 0) & (age < n_buckets)
+                if not valid.any():
+                    del self._counts[culture_id], self._stamps[culture_id]
+                    continue
+                recent = float(counts[valid & (age < recent_buckets)].sum())
+                if recent < self.min_events:
+                    continue
+                baseline = float(counts[valid & (age >= recent_buckets)].sum())
+                expected = baseline / baseline_buckets * recent_buckets
+                result[culture_id] = ((recent - expected) / math.sqrt(expected + 1.0), recent)
+        return result
+
+    def top(self, n=10, now=None):
+        """趋势分数最高的内容，返回 [(culture_id, 分数, 最近时段互动量), ...]"""
+        ranked = sorted(self.scores(now).items(), key=lambda item: item[1][0], reverse=True)
+        return [(culture_id, score, recent) for culture_id, (score, recent) in ranked[:n] if score > 0]
+
+    def memory_usage(self):
+        with self._lock:
+            n_items = len(self._counts)
+        return {'items': n_items, 'bytes_per_item': self.n_buckets * 8, 'total_bytes': n_items * self.n_buckets * 8}
+
+
+# 全局趋势计数器
+trending = TrendingCounter()
@@ -28,6 +28,54 @@ class Config:
     WECHAT_SECRET = os.getenv('WECHAT_SECRET', '')
     
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'data', 'uploads')
+    # 推荐模型快照目录（各 worker 通过内存映射共享）
+    MODEL_SNAPSHOT_DIR = os.getenv('MODEL_SNAPSHOT_DIR', os.path.join(os.path.dirname(__file__), 'data', 'models'))
+
+    # 全文检索索引文件，以及排序时内容分数所占的比例（其余为 BM25 相关度）
+    SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', os.path.join(os.path.dirname(__file__), 'data', 'search_index.npz'))
+    SEARCH_SCORE_WEIGHT = float(os.getenv('SEARCH_SCORE_WEIGHT', 0.2))
+
+    # 行为权重半衰期（天），0 表示不做时间衰减
+    BEHAVIOR_HALF_LIFE_DAYS = float(os.getenv('BEHAVIOR_HALF_LIFE_DAYS', 0))
+    # 物品近邻表剪枝：每个物品保留的近邻数、最低相似度、最少共同用户数
+    NEIGHBOR_K = int(os.getenv('NEIGHBOR_K', 50))
+    NEIGHBOR_MIN_SIMILARITY = float(os.getenv('NEIGHBOR_MIN_SIMILARITY', 0.0))
+    NEIGHBOR_MIN_SUPPORT = int(os.getenv('NEIGHBOR_MIN_SUPPORT', 1))
+    # 物品相似度计算进程数，大于 1 时按物品分块多进程计算（不支持增量更新，每次全量构建）
+    SIMILARITY_WORKERS = int(os.getenv('SIMILARITY_WORKERS', 1))
+
+    # 个性化推荐默认算法：hybrid（协同过滤+内容）或 als（矩阵分解）
+    RECOMMEND_ALGORITHM = os.getenv('RECOMMEND_ALGORITHM', 'hybrid')
+    # ALS 训练（在定时任务中执行，限制时长和线程数）；未设置时只在默认算法为 als 时训练
+    ALS_ENABLED = os.getenv('ALS_ENABLED', str(RECOMMEND_ALGORITHM == 'als')).lower() == 'true'
+    ALS_MAX_SECONDS = int(os.getenv('ALS_MAX_SECONDS', 300))
+    ALS_THREADS = int(os.getenv('ALS_THREADS', 1))
+    # 推荐离线预计算：每个用户保存的推荐数、活跃用户时间窗口、批大小、工作进程数（0为CPU核数）、结果有效期
+    PRECOMPUTE_TOP_N = int(os.getenv('PRECOMPUTE_TOP_N', 50))
+    PRECOMPUTE_ACTIVE_DAYS = int(os.getenv('PRECOMPUTE_ACTIVE_DAYS', 30))
+    PRECOMPUTE_BATCH_SIZE = int(os.getenv('PRECOMPUTE_BATCH_SIZE', 500))
+    # 预计算进程数，调度器可能运行在 Web 进程内，默认只启动少量进程；0 或 1 时在当前进程内计算
+    PRECOMPUTE_WORKERS = int(os.getenv('PRECOMPUTE_WORKERS', 2))
+    PRECOMPUTE_MAX_AGE_MINUTES = int(os.getenv('PRECOMPUTE_MAX_AGE_MINUTES', 120))
+
+    # 内存热门排行榜与数据库对账的间隔（秒），其它进程的计数变化在对账后可见
+    HOT_RECONCILE_SECONDS = int(os.getenv('HOT_RECONCILE_SECONDS', 300))
+
+    # 分类列表及内容数缓存的有效期（秒），其它进程导入或下架内容后在过期后可见
+    CATEGORY_CACHE_SECONDS = int(os.getenv('CATEGORY_CACHE_SECONDS', 300))
+
+    # 实时趋势：时间桶长度（秒）、窗口长度（小时）、与窗口平均速度比较的最近时段（分钟）
+    TRENDING_BUCKET_SECONDS = int(os.getenv('TRENDING_BUCKET_SECONDS', 300))
+    TRENDING_WINDOW_HOURS = int(os.getenv('TRENDING_WINDOW_HOURS', 24))
+    TRENDING_RECENT_MINUTES = int(os.getenv('TRENDING_RECENT_MINUTES', 60))
+
+    # 浏览转移（看了又看）：会话窗口（分钟）、构建读取的历史天数
+    TRANSITION_SESSION_MINUTES = int(os.getenv('TRANSITION_SESSION_MINUTES', 30))
+    TRANSITION_HISTORY_DAYS = int(os.getenv('TRANSITION_HISTORY_DAYS', 30))
+
+    # 后台任务线程池：同时执行的任务数和最多排队的任务数
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', 10))
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     
     PAGE_SIZE = 20
@@ -46,6 +94,8 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEARCH_INDEX_PATH = None
+    MODEL_SNAPSHOT_DIR = None
 
 
 config = {
@@ -101,6 +101,15 @@ CREATE TABLE IF NOT EXISTS user_behaviors (
     INDEX idx_user_behavior (user_id, behavior_type)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+CREATE TABLE IF NOT EXISTS user_recommendations (
+    user_id INT PRIMARY KEY,
+    algorithm VARCHAR(20) NOT NULL DEFAULT 'hybrid',
+    culture_ids TEXT NOT NULL,
+    model_version VARCHAR(50),
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 INSERT INTO categories (name, description, sort_order) VALUES
 ('传统手工', '传统手工艺技艺', 1),
 ('表演艺术', '传统表演艺术', 2),
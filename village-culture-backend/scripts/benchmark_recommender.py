@@ -0,0 +1,496 @@
+"""
+推荐系统性能基准测试
+生成合成的用户行为数据，测试物品相似度计算耗时和用户-物品矩阵构建的内存峰值
+
+用法:
+    python scripts/benchmark_recommender.py --suite --scale 100k --json results.json
+    python scripts/benchmark_recommender.py --suite --scale 100k --compare results.json
+    python scripts/benchmark_recommender.py --items 10000 --behaviors 1000000
+    python scripts/benchmark_recommender.py --items 500 --behaviors 20000 --legacy
+    python scripts/benchmark_recommender.py --scale 1m --parallel 1,2,4,8
+    python scripts/benchmark_recommender.py --build --behaviors 500000
+    python scripts/benchmark_recommender.py --scores --items 100000 --behaviors 0
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from collections import defaultdict
+from app.services.recommender import RecommenderSystem, RecommenderModel
+from app.services.similarity import ItemSimilarityEngine
+
+BEHAVIOR_TYPES = np.array(['view', 'like', 'collect', 'share'])
+BEHAVIOR_WEIGHTS = np.array([1.0, 2.0, 3.0, 4.0])
+BEHAVIOR_PROBS = np.array([0.80, 0.12, 0.06, 0.02])
+N_CATEGORIES = 6
+
+# 预设规模: (用户数, 内容数, 行为数)
+SCALES = {
+    '10k': (1000, 500, 10000),
+    '100k': (10000, 2000, 100000),
+    '1m': (100000, 10000, 1000000)
+}
+
+
+def generate_behaviors(n_users, n_items, n_behaviors, seed=42, affinity=0.0):
+    """生成合成的行为流（物品热度服从幂律分布），返回 (users, items, 行为类型下标)
+
+    affinity > 0 时每个用户有一个偏好分类，该比例的行为落在偏好分类内，
+    使离线评估的准确率/召回率有可学习的信号。
+    """
+    rng = np.random.default_rng(seed)
+
+    item_popularity = 1.0 / np.arange(1, n_items + 1) ** 0.8
+    item_popularity /= item_popularity.sum()
+
+    users = rng.integers(1, n_users + 1, size=n_behaviors)
+    items = rng.choice(np.arange(1, n_items + 1), size=n_behaviors, p=item_popularity)
+    types = rng.choice(len(BEHAVIOR_TYPES), size=n_behaviors, p=BEHAVIOR_PROBS)
+
+    if affinity > 0 and n_items >= N_CATEGORIES:
+        # 内容 i 的分类为 (i - 1) % N_CATEGORIES + 1，与 create_synthetic_app 一致
+        favorite = rng.integers(0, N_CATEGORIES, size=n_users + 1)
+        per_category = n_items // N_CATEGORIES
+        rank_popularity = 1.0 / np.arange(1, per_category + 1) ** 0.8
+        rank_popularity /= rank_popularity.sum()
+        in_category = rng.random(n_behaviors) < affinity
+        ranks = rng.choice(per_category, size=int(in_category.sum()), p=rank_popularity)
+        items[in_category] = ranks * N_CATEGORIES + favorite[users[in_category]] + 1
+    return users, items, types
+
+
+def generate_user_item_matrix(n_users, n_items, n_behaviors, seed=42):
+    """生成合成的用户-物品矩阵"""
+    users, items, types = generate_behaviors(n_users, n_items, n_behaviors, seed)
+
+    user_items = defaultdict(dict)
+    for user_id, item_id, weight in zip(users.tolist(), items.tolist(), BEHAVIOR_WEIGHTS[types].tolist()):
+        row = user_items[user_id]
+        row[item_id] = row.get(item_id, 0.0) + weight
+    return user_items
+
+
+def create_synthetic_app(n_users, n_items, n_behaviors, path=None, seed=42, behaviors=None):
+    """在本地 SQLite 数据库中生成合成的行为表，返回 Flask 应用
+
+    behaviors 为 (users, items, 行为类型下标) 时直接写入这些行为（用于训练/测试划分）。
+    """
+    from config import config, TestingConfig
+    from app import create_app, db
+    from app.models import UserBehavior, Culture
+
+    path = path or os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        MODEL_SNAPSHOT_DIR = None
+
+    config['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+
+    with app.app_context():
+        if Culture.query.count() == 0:
+            rng = np.random.default_rng(seed)
+            counts = rng.zipf(1.8, size=(n_items, 4)).clip(max=100000)
+            days = rng.integers(0, 730, size=n_items)
+            now = datetime.utcnow()
+            batch = 20000
+            for start in range(0, n_items, batch):
+                db.session.execute(Culture.__table__.insert(), [
+                    {'id': idx + 1, 'name': f'文化{idx + 1}', 'category_id': idx % N_CATEGORIES + 1,
+                     'view_count': int(c[0]), 'like_count': int(c[1]), 'collect_count': int(c[2]),
+                     'share_count': int(c[3]), 'score': 0.0, 'status': 1,
+                     'created_at': now - timedelta(days=int(d))}
+                    for idx, c, d in zip(range(start, min(start + batch, n_items)),
+                                         counts[start:start + batch], days[start:start + batch])
+                ])
+            db.session.commit()
+
+        if n_behaviors and UserBehavior.query.count() == 0:
+            users, items, types = behaviors or generate_behaviors(n_users, n_items, n_behaviors, seed)
+            # 行为时间均匀分布在过去一年内
+            seconds = np.random.default_rng(seed).integers(0, 365 * 86400, size=len(users))
+            now = datetime.utcnow()
+            table = UserBehavior.__table__
+            batch = 50000
+            for start in range(0, len(users), batch):
+                db.session.execute(table.insert(), [
+                    {'user_id': u, 'culture_id': i, 'behavior_type': t, 'created_at': now - timedelta(seconds=sec)}
+                    for u, i, t, sec in zip(users[start:start + batch].tolist(),
+                                            items[start:start + batch].tolist(),
+                                            BEHAVIOR_TYPES[types[start:start + batch]].tolist(),
+                                            seconds[start:start + batch].tolist())
+                ])
+            db.session.commit()
+    return app
+
+
+def add_behaviors(n, n_users, n_items, seed=42):
+    """追加 n 条当前时刻的随机行为（用于测试增量更新）"""
+    from app.models import db, UserBehavior
+
+    rng = np.random.default_rng(seed + 2)
+    users = rng.integers(1, n_users + 1, size=n)
+    items = rng.integers(1, n_items + 1, size=n)
+    for user_id, item_id in zip(users.tolist(), items.tolist()):
+        db.session.add(UserBehavior(user_id=user_id, culture_id=item_id, behavior_type='view'))
+    db.session.commit()
+
+
+def legacy_build_user_item_matrix(decay=None):
+    """原始实现：一次性加载全部行为ORM对象后在Python中累加（仅用于对比）
+
+    传入 decay 时按行为日期乘以相对 decay.epoch 的衰减系数。
+    """
+    from app.models import UserBehavior
+
+    user_items = defaultdict(dict)
+    for behavior in UserBehavior.query.all():
+        weight = {'view': 1.0, 'like': 2.0, 'collect': 3.0, 'share': 4.0}.get(behavior.behavior_type, 1.0)
+        if decay is not None:
+            weight *= decay.growth(behavior.created_at.date())
+        row = user_items[behavior.user_id]
+        row[behavior.culture_id] = row.get(behavior.culture_id, 0.0) + weight
+    return user_items
+
+
+def legacy_update_scores():
+    """原始实现：逐行计算分数，由ORM逐行UPDATE（仅用于对比）"""
+    from app.models import db, Culture
+
+    for culture in Culture.query.filter_by(status=1).all():
+        score = (culture.view_count * 0.1 + culture.like_count * 1.0 +
+                 culture.collect_count * 2.0 + culture.share_count * 3.0)
+        days = (datetime.utcnow() - culture.created_at).days
+        culture.score = score * (1.0 / (1.0 + days * 0.01))
+    db.session.commit()
+
+
+def measure(fn, trace_memory=True):
+    """返回 (结果, 耗时秒, 峰值内存MB)；tracemalloc 会拖慢执行，只关心耗时时可关闭"""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def time_similarity(user_item_matrix, method, k=50):
+    """计时一次相似度计算"""
+    rec = RecommenderSystem(similarity_method=method, neighbor_k=k, similarity_workers=1)
+    start = time.perf_counter()
+    model = rec.calculate_item_similarity(RecommenderModel(user_item_matrix=user_item_matrix))
+    return time.perf_counter() - start, model.item_similarity
+
+
+def max_difference(a, b):
+    """比较两种实现的近邻表（只比较两边都保留的近邻，Top-K边界上的并列项可能不同）"""
+    diff = 0.0
+    for item_id, (ids, sims) in a.items():
+        other = dict(zip(*[arr.tolist() for arr in b.get(item_id)]))
+        for neighbor, sim in zip(ids.tolist(), sims.tolist()):
+            if neighbor in other:
+                diff = max(diff, abs(sim - other[neighbor]))
+    return diff
+
+
+def benchmark_similarity(args):
+    start = time.perf_counter()
+    matrix = generate_user_item_matrix(args.users, args.items, args.behaviors)
+    print(f'生成数据: {len(matrix)} 用户, {args.behaviors} 条行为, 耗时 {time.perf_counter() - start:.2f}s')
+
+    sparse_time, sparse_result = time_similarity(matrix, 'sparse', args.k)
+    memory = sparse_result.memory_usage()
+    print(f'稀疏矩阵算法: {sparse_time:.2f}s, 近邻 {memory["neighbors"]} 个, '
+          f'近邻表内存 {memory["total_bytes"] / 1024 / 1024:.1f} MB')
+
+    if args.legacy:
+        legacy_time, legacy_result = time_similarity(matrix, 'legacy', args.k)
+        print(f'原始算法: {legacy_time:.2f}s, 加速比 {legacy_time / sparse_time:.1f}x')
+        print(f'结果最大误差: {max_difference(sparse_result, legacy_result):.2e}')
+
+    if args.parallel:
+        benchmark_parallel(matrix, args, sparse_time, sparse_result)
+
+
+def benchmark_parallel(matrix, args, base_time, base_result):
+    """多进程分块计算的加速比曲线（以单进程稀疏矩阵算法为基准）"""
+    workers_list = [int(w) for w in args.parallel.split(',')]
+    print(f'\nCPU 核数: {os.cpu_count()}')
+    print(f'{"进程数":>6} {"耗时(s)":>10} {"加速比":>8} {"并行效率":>8} {"最大误差":>10}')
+    print(f'{"基准":>6} {base_time:>10.2f} {1.0:>8.2f} {"-":>8} {"-":>10}')
+    for workers in workers_list:
+        rec = RecommenderSystem(neighbor_k=args.k)
+        store = rec._new_neighbor_store()
+        start = time.perf_counter()
+        # 进程数为 1 时同样走分块多进程路径，可看出分块与进程通信本身的开销
+        ItemSimilarityEngine().build_neighbors_parallel(matrix, store, workers)
+        elapsed = time.perf_counter() - start
+        speedup = base_time / elapsed
+        print(f'{workers:>6} {elapsed:>10.2f} {speedup:>8.2f} {speedup / workers:>8.0%} '
+              f'{max_difference(base_result, store):>10.2e}')
+
+
+def benchmark_build(args):
+    start = time.perf_counter()
+    app = create_synthetic_app(args.users, args.items, args.behaviors, args.db)
+    print(f'生成行为表: {args.behaviors} 条, 耗时 {time.perf_counter() - start:.2f}s')
+
+    with app.app_context():
+        legacy, legacy_time, legacy_peak = measure(legacy_build_user_item_matrix)
+        print(f'原始构建（.all()）: {legacy_time:.2f}s, 峰值内存 {legacy_peak:.1f} MB')
+
+        rec = RecommenderSystem(chunk_size=args.chunk_size, half_life_days=0)
+        model, stream_time, stream_peak = measure(rec.build_user_item_matrix)
+        print(f'流式聚合构建（chunk={args.chunk_size}）: {stream_time:.2f}s, 峰值内存 {stream_peak:.1f} MB')
+
+        assert legacy == model.user_item_matrix, '两种构建方式结果不一致'
+
+        # 时间衰减：按天分组聚合，同时得到衰减后和未衰减的两份矩阵
+        half_life = args.half_life or 30
+        rec = RecommenderSystem(chunk_size=args.chunk_size, half_life_days=half_life)
+        model, decay_time, decay_peak = measure(rec.build_user_item_matrix)
+        print(f'流式聚合构建（半衰期 {half_life:g} 天）: {decay_time:.2f}s, 峰值内存 {decay_peak:.1f} MB')
+
+        assert legacy == model.raw_user_item_matrix, '未衰减的矩阵与原始构建不一致'
+        decayed = legacy_build_user_item_matrix(model.decay)
+        diff = max(abs(weight - model.user_item_matrix[user_id][item_id])
+                   for user_id, row in decayed.items() for item_id, weight in row.items())
+        print(f'衰减后矩阵最大误差: {diff:.2e}')
+
+
+def benchmark_scores(args):
+    from app.models import db, Culture
+
+    app = create_synthetic_app(args.users, args.items, args.behaviors, args.db)
+    with app.app_context():
+        _, legacy_time, _ = measure(legacy_update_scores, trace_memory=False)
+        print(f'原始逐行更新: {args.items} 条, {legacy_time:.2f}s, {args.items / legacy_time:.0f} 行/秒')
+        legacy_scores = dict(db.session.query(Culture.id, Culture.score).all())
+
+        db.session.query(Culture).update({Culture.score: 0.0})
+        db.session.commit()
+
+        stats, bulk_time, _ = measure(RecommenderSystem().update_scores, trace_memory=False)
+        print(f'批量向量化更新: {stats["rows"]} 条, {bulk_time:.2f}s, {stats["rowsPerSecond"]:.0f} 行/秒')
+
+        bulk_scores = dict(db.session.query(Culture.id, Culture.score).all())
+        diff = max(abs(bulk_scores[i] - legacy_scores[i]) for i in legacy_scores)
+        print(f'结果最大误差: {diff:.2e}')
+
+        stats = RecommenderSystem().update_scores()
+        print(f'分数未变化时再次更新: 写回 {stats["updated"]} 条, {stats["rowsPerSecond"]:.0f} 行/秒')
+
+
+def split_behaviors(users, items, types, holdout=0.2, seed=42):
+    """按行随机划分训练/测试集，返回 (训练行为, {用户: 测试集中新出现的物品})"""
+    rng = np.random.default_rng(seed + 1)
+    test = rng.random(len(users)) < holdout
+    train = (users[~test], items[~test], types[~test])
+
+    train_pairs = set(zip(train[0].tolist(), train[1].tolist()))
+    truth = defaultdict(set)
+    for user_id, item_id in zip(users[test].tolist(), items[test].tolist()):
+        if (user_id, item_id) not in train_pairs:
+            truth[user_id].add(item_id)
+    return train, truth
+
+
+def evaluate(recommend, eval_users, truth, k):
+    """逐个用户生成推荐，返回准确率@k、召回率@k、覆盖率和单次调用延迟"""
+    latencies, precisions, recalls = [], [], []
+    recommended_items = set()
+    for user_id in eval_users:
+        start = time.perf_counter()
+        items = recommend(user_id, k)
+        latencies.append(time.perf_counter() - start)
+
+        hits = len(set(items) & truth[user_id])
+        precisions.append(hits / k)
+        recalls.append(hits / len(truth[user_id]))
+        recommended_items.update(items)
+
+    latencies = np.array(latencies) * 1000
+    return {
+        f'precision@{k}': round(float(np.mean(precisions)), 4),
+        f'recall@{k}': round(float(np.mean(recalls)), 4),
+        'coverage': len(recommended_items),
+        'totalSeconds': round(float(latencies.sum() / 1000), 3),
+        'latencyMsMean': round(float(latencies.mean()), 3),
+        'latencyMsP95': round(float(np.percentile(latencies, 95)), 3)
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_suite(args):
+    """完整基准：构建、相似度、各推荐算法的耗时/内存，以及留出集上的离线评估"""
+    from sqlalchemy import func
+    from app.models import db, UserBehavior
+
+    users, items, types = generate_behaviors(args.users, args.items, args.behaviors, args.seed, args.affinity)
+    train, truth = split_behaviors(users, items, types, args.holdout, args.seed)
+
+    start = time.perf_counter()
+    app = create_synthetic_app(args.users, args.items, len(train[0]), args.db, args.seed, behaviors=train)
+    print(f'生成数据: {args.users} 用户, {args.items} 内容, {len(train[0])} 条训练行为, '
+          f'{sum(len(v) for v in truth.values())} 条测试交互, 耗时 {time.perf_counter() - start:.2f}s')
+
+    result = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__
+        },
+        'params': {key: getattr(args, key) for key in
+                   ('users', 'items', 'behaviors', 'k', 'top_n', 'holdout', 'affinity', 'eval_users',
+                    'half_life', 'increment', 'seed')},
+        'stages': {},
+        'quality': {}
+    }
+
+    with app.app_context():
+        rec = RecommenderSystem(neighbor_k=args.k, half_life_days=args.half_life)
+        stages = (('build_user_item_matrix', rec.build_user_item_matrix),
+                  ('calculate_item_similarity', lambda: rec.calculate_item_similarity(rec.model)))
+        for name, fn in stages:
+            rec.model, elapsed, peak = measure(fn, trace_memory=not args.no_trace)
+            result['stages'][name] = {'seconds': round(elapsed, 3)}
+            if not args.no_trace:
+                result['stages'][name]['peakMB'] = round(peak, 1)
+            print(f'{name}: {elapsed:.2f}s' + ('' if args.no_trace else f', 峰值内存 {peak:.1f} MB'))
+
+        if args.increment:
+            # 增量更新：写入少量新行为后只处理水位线之后的部分，耗时应与模型规模基本无关
+            add_behaviors(args.increment, args.users, args.items, args.seed)
+            processed, elapsed, _ = measure(rec.update_incremental, trace_memory=False)
+            result['stages']['update_incremental'] = {'seconds': round(elapsed, 4)}
+            print(f'update_incremental: {processed} 条新行为, {elapsed:.4f}s')
+
+        # 只评估训练集中有足够行为、且测试集中有新交互的用户
+        train_counts = dict(db.session.query(
+            UserBehavior.user_id, func.count(UserBehavior.id)
+        ).group_by(UserBehavior.user_id).all())
+        candidates = sorted(user_id for user_id in truth if train_counts.get(user_id, 0) >= 3)
+        rng = np.random.default_rng(args.seed)
+        eval_users = sorted(rng.choice(candidates, size=min(args.eval_users, len(candidates)),
+                                       replace=False).tolist()) if candidates else []
+
+        algorithms = {
+            'hot': lambda user_id, n: rec.get_hot_items(n),
+            'cf': rec.recommend_by_cf,
+            'content': rec.recommend_by_content,
+            'hybrid': rec.recommend_hybrid
+        }
+        for name, recommend in algorithms.items():
+            metrics = evaluate(recommend, eval_users, truth, args.top_n) if eval_users else {}
+            result['quality'][name] = metrics
+            if metrics:
+                print(f'{name}: P@{args.top_n}={metrics[f"precision@{args.top_n}"]:.4f}, '
+                      f'R@{args.top_n}={metrics[f"recall@{args.top_n}"]:.4f}, '
+                      f'延迟 {metrics["latencyMsMean"]:.2f}ms (p95 {metrics["latencyMsP95"]:.2f}ms)')
+
+    # ru_maxrss 在 Linux 上单位为 KB
+    result['stages']['process'] = {
+        'maxRssMB': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+    print(f'评估用户数: {len(eval_users)}, 进程峰值内存 {result["stages"]["process"]["maxRssMB"]} MB')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f'结果已写入 {args.json}')
+    if args.compare:
+        compare_results(args.compare, result)
+    return result
+
+
+def compare_results(baseline_path, current, threshold=0.2):
+    """与之前保存的结果对比，耗时变慢或指标下降超过阈值时标记"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f'对比基线 {baseline["meta"].get("revision")} ({baseline["meta"]["timestamp"]}):')
+    if baseline['params'] != current['params']:
+        print(f'  ⚠️ 基准参数不同，结果不可直接比较: {baseline["params"]}')
+
+    rows = []
+    for stage, values in current['stages'].items():
+        for key in ('seconds', 'peakMB', 'maxRssMB'):
+            if key in values and key in baseline['stages'].get(stage, {}):
+                rows.append((f'{stage}.{key}', baseline['stages'][stage][key], values[key], True))
+    for algorithm, values in current['quality'].items():
+        for key, value in values.items():
+            old = baseline['quality'].get(algorithm, {}).get(key)
+            if old is not None and key != 'coverage':
+                rows.append((f'{algorithm}.{key}', old, value, key.startswith(('latency', 'total'))))
+
+    for name, old, new, lower_is_better in rows:
+        change = (new - old) / old if old else 0.0
+        regressed = change > threshold if lower_is_better else change < -threshold
+        print(f'  {name:45s} {old:>10} -> {new:<10} {change:+.1%}{"  ⚠️ 退化" if regressed else ""}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='推荐系统性能基准测试')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--behaviors', type=int, default=1000000)
+    parser.add_argument('--k', type=int, default=50, help='每个物品保留的近邻数')
+    parser.add_argument('--legacy', action='store_true', help='同时运行原始算法进行对比（仅适合小规模数据）')
+    parser.add_argument('--build', action='store_true', help='测试从数据库构建用户-物品矩阵的内存峰值')
+    parser.add_argument('--db', help='合成数据使用的 SQLite 文件路径（默认临时目录）')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--scores', action='store_true', help='测试内容分数批量更新的吞吐量')
+    parser.add_argument('--suite', action='store_true', help='完整基准：各阶段耗时/内存和留出集离线评估')
+    parser.add_argument('--scale', choices=SCALES, help='预设规模，覆盖 --users/--items/--behaviors')
+    parser.add_argument('--top-n', type=int, default=10, help='离线评估的推荐数量 k')
+    parser.add_argument('--holdout', type=float, default=0.2, help='留作测试集的行为比例')
+    parser.add_argument('--affinity', type=float, default=0.5, help='用户落在偏好分类内的行为比例')
+    parser.add_argument('--eval-users', type=int, default=500, help='参与离线评估的用户数')
+    parser.add_argument('--half-life', type=float, help='行为权重半衰期（天），0 不衰减，默认读取配置')
+    parser.add_argument('--increment', type=int, default=5, help='完整基准中增量更新测试写入的新行为数，0 不测试')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-trace', action='store_true', help='不使用 tracemalloc（计时更准确，不记录峰值内存）')
+    parser.add_argument('--json', help='将完整基准结果写入 JSON 文件')
+    parser.add_argument('--compare', help='与之前保存的 JSON 结果对比')
+    parser.add_argument('--parallel', help='逗号分隔的进程数列表，输出多进程相似度计算的加速比曲线，如 1,2,4,8')
+    args = parser.parse_args()
+
+    if args.scale:
+        args.users, args.items, args.behaviors = SCALES[args.scale]
+
+    if args.suite:
+        benchmark_suite(args)
+    elif args.build:
+        benchmark_build(args)
+    elif args.scores:
+        benchmark_scores(args)
+    else:
+        benchmark_similarity(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -54,6 +54,16 @@ def import_to_database(data_list):
             db.session.commit()
             logger.info(f'✅ 导入完成，共导入 {imported_count} 条新数据')
 
+            # 新内容增量加入相似度索引和全文检索索引，重建输入联想索引
+            if imported_count:
+                from app.services.content_index import content_index
+                from app.services.search import search_index
+                from app.services.suggest import suggest_index
+                content_index.add_new()
+                search_index.add_new()
+                search_index.save()
+                suggest_index.build()
+
             return imported_count
 
         except Exception as e:
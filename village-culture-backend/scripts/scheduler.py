@@ -12,9 +12,21 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.crawler import CultureCrawler
 from scripts.import_data import import_to_database
-from app.services.recommender import init_recommender, recommender
+from app.services.recommender import init_recommender, refresh_content_index, rebuild_transitions, recommender
+from app.services.precompute import precompute_recommendations
+from app.services.search import search_index
 
 scheduler = BackgroundScheduler()
+_app = None
+
+
+def _app_context():
+    """定时任务运行在后台线程中，需要显式推入应用上下文"""
+    global _app
+    if _app is None:
+        from app import create_app
+        _app = create_app(os.getenv('FLASK_ENV', 'development'))
+    return _app.app_context()
 
 
 def scheduled_crawl():
@@ -42,16 +54,61 @@ def scheduled_crawl():
 
 
 def update_recommendations():
-    """更新推荐系统"""
+    """增量更新推荐系统"""
     logger.info('⏰ 更新推荐系统...')
 
     try:
-        init_recommender()
+        with _app_context():
+            init_recommender(full=False)
         logger.info('✅ 推荐系统更新完成')
     except Exception as e:
         logger.error(f'❌ 推荐系统更新失败: {e}')
 
 
+def rebuild_recommendations():
+    """全量重建推荐系统（增量更新的兜底）"""
+    logger.info('⏰ 全量重建推荐系统...')
+
+    try:
+        with _app_context():
+            init_recommender(full=True)
+        logger.info('✅ 推荐系统全量重建完成')
+    except Exception as e:
+        logger.error(f'❌ 推荐系统全量重建失败: {e}')
+
+
+def precompute_user_recommendations():
+    """为活跃用户离线预计算推荐"""
+    logger.info('⏰ 开始预计算个性化推荐...')
+
+    try:
+        with _app_context():
+            precompute_recommendations()
+    except Exception as e:
+        logger.error(f'❌ 推荐预计算失败: {e}')
+
+
+def rebuild_search_index():
+    """全量重建全文检索索引（同步内容的修改和下架），写入索引文件供各进程重新加载"""
+    logger.info('⏰ 重建全文检索索引...')
+
+    try:
+        with _app_context():
+            search_index.build()
+            search_index.save()
+    except Exception as e:
+        logger.error(f'❌ 全文检索索引重建失败: {e}')
+
+
+def build_item_indexes():
+    """构建内容相似度索引和浏览转移模型（调度器启动时执行一次，之后随推荐系统更新）"""
+    logger.info('⏰ 构建内容相似度索引和浏览转移模型...')
+
+    with _app_context():
+        refresh_content_index(full=True)
+        rebuild_transitions()
+
+
 def setup_scheduler():
     """设置定时任务"""
     # 每天凌晨2点爬取数据
@@ -72,11 +129,53 @@ def setup_scheduler():
         replace_existing=True
     )
 
+    # 每小时30分预计算活跃用户的推荐（在增量更新之后）
+    scheduler.add_job(
+        precompute_user_recommendations,
+        trigger=CronTrigger(hour='*', minute=30),
+        id='hourly_recommend_precompute',
+        name='每小时推荐预计算',
+        replace_existing=True
+    )
+
+    # 每天凌晨3点全量重建推荐
+    scheduler.add_job(
+        rebuild_recommendations,
+        trigger=CronTrigger(hour=3, minute=0),
+        id='daily_recommend_rebuild',
+        name='每日推荐全量重建',
+        replace_existing=True
+    )
+
+    # 每天凌晨3点30分重建全文检索索引
+    scheduler.add_job(
+        rebuild_search_index,
+        trigger=CronTrigger(hour=3, minute=30),
+        id='daily_search_rebuild',
+        name='每日全文检索索引重建',
+        replace_existing=True
+    )
+
+    # 启动后立即构建内容相似度索引和浏览转移模型，避免由第一个详情页请求承担
+    scheduler.add_job(
+        build_item_indexes,
+        id='startup_item_indexes',
+        name='启动时构建内容相似度索引和浏览转移模型',
+        replace_existing=True
+    )
+
     logger.info('📅 定时任务设置完成')
 
 
-def start_scheduler():
+def start_scheduler(app=None):
     """启动调度器"""
+    global _app
+    if app is not None:
+        _app = app
+    else:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            _app = current_app._get_current_object()
     setup_scheduler()
     scheduler.start()
     logger.info('🚀 定时任务调度器已启动')
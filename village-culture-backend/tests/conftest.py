@@ -0,0 +1,47 @@
+import pytest
+
+from app import create_app
+from app.models import db as _db, User, Category, Culture
+from app.services.cache import recommendation_cache
+from app.services.profiles import user_profiles
+
+
+@pytest.fixture
+def app():
+    """内存 SQLite 上的测试应用，带4个分类、若干用户和40条内容"""
+    app = create_app('testing')
+    with app.app_context():
+        for category_id in range(1, 5):
+            _db.session.add(Category(id=category_id, name=f'分类{category_id}', sort_order=category_id))
+        for user_id in range(1, 11):
+            _db.session.add(User(id=user_id, phone=f'1{user_id:010d}'))
+        for culture_id in range(1, 41):
+            _db.session.add(Culture(id=culture_id, name=f'文化{culture_id}', category_id=culture_id % 4 + 1,
+                                    score=float(culture_id)))
+        _db.session.commit()
+        user_profiles.clear()
+        recommendation_cache.clear()
+        yield app
+        _db.session.remove()
+        user_profiles.clear()
+        recommendation_cache.clear()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def query_counter(db):
+    """统计执行的 SQL 语句"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
@@ -0,0 +1,59 @@
+import random
+
+from app.services.als import ALSModel
+
+
+def _two_groups():
+    """用户 1-20 只浏览物品 1-8 中的4个，用户 21-40 只浏览物品 9-16 中的4个"""
+    rng = random.Random(3)
+    matrix = {}
+    for user_id in range(1, 41):
+        items = range(1, 9) if user_id <= 20 else range(9, 17)
+        matrix[user_id] = {item_id: 1.0 for item_id in rng.sample(items, 4)}
+    return matrix
+
+
+def test_recommends_items_from_the_users_group():
+    model = ALSModel(factors=4, iterations=15)
+    assert model.fit(_two_groups()) == 15
+
+    seen = _two_groups()[1]
+    recommended = model.recommend(1, n=4, exclude=seen)
+    assert set(recommended) == set(range(1, 9)) - set(seen)
+
+
+def test_unknown_user_and_untrained_model_return_nothing():
+    model = ALSModel(factors=4)
+    assert model.recommend(1) == []
+    model.fit(_two_groups())
+    assert model.recommend(999) == []
+
+
+def test_training_stops_at_the_time_limit():
+    model = ALSModel(factors=4, max_seconds=0)
+    assert model.fit(_two_groups()) == 0
+    assert not model.is_trained
+
+
+def test_from_arrays_serves_the_same_results():
+    model = ALSModel(factors=4, iterations=5)
+    model.fit(_two_groups())
+    restored = ALSModel.from_arrays(model.user_ids, model.user_factors, model.item_ids, model.item_factors)
+    assert restored.recommend(22, n=3) == model.recommend(22, n=3)
+
+
+def test_recommender_serves_als_without_seen_items(db):
+    from app.models import UserBehavior
+    from app.services.recommender import RecommenderSystem
+
+    for user_id, items in _two_groups().items():
+        for culture_id in items:
+            db.session.add(UserBehavior(user_id=user_id, culture_id=culture_id, behavior_type='view'))
+    db.session.commit()
+    recommender = RecommenderSystem(half_life_days=0)
+    recommender.build_model()
+    assert recommender.recommend_by_als(1) == []
+
+    recommender.train_als(factors=4, iterations=15)
+    recommended = recommender.recommend_by_als(1, n=4)
+    assert set(recommended) == set(range(1, 9)) - set(_two_groups()[1])
@@ -0,0 +1,52 @@
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app.services.cache import RecommendationCache, recommendation_cache
+
+
+def test_invalidate_user_only_drops_that_user():
+    cache = RecommendationCache()
+    cache.set(1, (10, 'hybrid'), [1, 2])
+    cache.set(1, (5, 'als'), [3])
+    cache.set(2, (10, 'hybrid'), [4])
+
+    cache.invalidate_user(1)
+
+    assert cache.get(1, (10, 'hybrid')) is None and cache.get(1, (5, 'als')) is None
+    assert cache.get(2, (10, 'hybrid')) == [4]
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    cache = RecommendationCache(maxsize=2, ttl=60)
+    cache.set(1, (10,), 'a')
+    cache.set(2, (10,), 'b')
+    assert cache.get(1, (10,)) == 'a'
+    cache.set(3, (10,), 'c')
+    assert cache.get(2, (10,)) is None and cache.stats()['evictions'] == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 61)
+    assert cache.get(1, (10,)) is None and cache.get(3, (10,)) is None
+    assert cache.stats()['size'] == 0
+
+
+def test_interaction_invalidates_cached_recommendations(app, db):
+    recommendation_cache.set(1, (10, 'hybrid'), [7, 8])
+    recommendation_cache.set(2, (10, 'hybrid'), [9])
+    headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+
+    response = app.test_client().post('/api/interaction/add-history', json={'id': 5}, headers=headers)
+
+    assert response.status_code == 200
+    assert recommendation_cache.get(1, (10, 'hybrid')) is None
+    assert recommendation_cache.get(2, (10, 'hybrid')) == [9]
+
+
+def test_cache_stats_requires_login(app):
+    client = app.test_client()
+    assert client.get('/api/recommend/cache/stats').status_code == 401
+
+    headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+    response = client.get('/api/recommend/cache/stats', headers=headers)
+    assert response.status_code == 200 and 'hitRate' in response.get_json()['data']
@@ -0,0 +1,65 @@
+import time
+
+from app.models import Culture, Category
+from app.services import categories as categories_module
+from app.services.categories import CategoryCache, category_cache
+
+
+def _counts():
+    return {category['id']: category['count'] for category in category_cache.active()}
+
+
+def test_counts_loaded_with_one_query(db, query_counter):
+    category_cache.invalidate()
+    query_counter.clear()
+    assert _counts() == {1: 10, 2: 10, 3: 10, 4: 10}
+    category_cache.names()
+    assert len(query_counter) == 1
+
+
+def test_commit_invalidates_only_on_category_changes(db):
+    """浏览量变化不使缓存失效；下架、换分类、新增内容提交后失效"""
+    category_cache.invalidate()
+    _counts()
+
+    db.session.get(Culture, 1).view_count += 1
+    db.session.commit()
+    assert category_cache._loaded_at
+
+    db.session.get(Culture, 1).status = 0
+    db.session.commit()
+    assert not category_cache._loaded_at
+    assert _counts()[2] == 9
+
+    db.session.get(Culture, 2).category_id = 1
+    db.session.add(Culture(id=41, name='新内容', category_id=1))
+    db.session.commit()
+    assert _counts() == {1: 12, 2: 9, 3: 9, 4: 10}
+
+    db.session.get(Category, 4).name = '改名'
+    db.session.commit()
+    assert category_cache.names()[4] == '改名'
+
+
+def test_rollback_keeps_cache(db):
+    category_cache.invalidate()
+    _counts()
+    db.session.get(Culture, 3).status = 0
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert category_cache._loaded_at and _counts()[4] == 10
+
+
+def test_changes_from_other_processes_show_after_ttl(app, db, monkeypatch):
+    """绕过本进程 ORM 的修改（如其它进程）在 TTL 到期后同步"""
+    cache = CategoryCache()
+    assert {c['id']: c['count'] for c in cache.active()}[1] == 10
+
+    db.session.execute(Culture.__table__.update().where(Culture.id == 4).values(status=0))
+    db.session.commit()
+    assert {c['id']: c['count'] for c in cache.active()}[1] == 10
+
+    now = time.monotonic()
+    monkeypatch.setattr(categories_module.time, 'monotonic', lambda: now + app.config['CATEGORY_CACHE_SECONDS'] + 1)
+    assert {c['id']: c['count'] for c in cache.active()}[1] == 9
@@ -0,0 +1,23 @@
+from app.models import Culture
+from app.services import recommender as recommender_module
+from app.services.content_index import ContentIndex
+
+
+def test_index_is_built_by_init_recommender_not_by_requests(db, monkeypatch, query_counter):
+    """相似推荐请求不触发全量构建，索引由 init_recommender 预先构建"""
+    for culture_id, name in {1: '蔚县剪纸艺术', 2: '佛山剪纸艺术', 3: '景德镇陶瓷'}.items():
+        db.session.get(Culture, culture_id).name = name
+    db.session.commit()
+    index = ContentIndex()
+    monkeypatch.setattr(recommender_module, 'content_index', index)
+
+    query_counter.clear()
+    assert index.similar(1) is None
+    assert not index.is_built and not query_counter
+
+    recommender_module.init_recommender()
+    assert index.is_built
+
+    query_counter.clear()
+    assert index.similar(1)[0] == 2
+    assert not query_counter
@@ -0,0 +1,40 @@
+from flask_jwt_extended import create_access_token
+
+from app.models import Like, UserRecommendation
+from app.services.leaderboard import hot_leaderboard
+
+
+def _auth(user_id):
+    return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+
+def _precompute(db, user_id):
+    db.session.add(UserRecommendation(user_id=user_id, culture_ids='1,2,3'))
+    db.session.commit()
+
+
+def test_view_keeps_precomputed_recommendations(app, db):
+    """浏览不删除预计算结果，点赞后删除"""
+    _precompute(db, 1)
+    client = app.test_client()
+
+    response = client.post('/api/interaction/add-history', json={'id': 5}, headers=_auth(1))
+    assert response.status_code == 200
+    assert db.session.get(UserRecommendation, 1) is not None
+
+    response = client.post('/api/interaction/like', json={'id': 5}, headers=_auth(1))
+    assert response.status_code == 200
+    assert db.session.get(UserRecommendation, 1) is None
+
+
+def test_hook_failure_does_not_fail_committed_like(app, db, monkeypatch):
+    """互动已提交后，后续处理出错不影响接口返回"""
+    def fail(culture):
+        raise RuntimeError('leaderboard unavailable')
+
+    monkeypatch.setattr(hot_leaderboard, 'update', fail)
+    response = app.test_client().post('/api/interaction/like', json={'id': 5}, headers=_auth(1))
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['likeCount'] == 1
+    assert Like.query.filter_by(user_id=1, culture_id=5).count() == 1
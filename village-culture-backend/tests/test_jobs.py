@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.services.jobs import JobManager, JobQueueFull
+
+
+def _blocking(release):
+    def run(job):
+        release.wait(5)
+        return 'done'
+    return run
+
+
+def test_same_name_jobs_are_coalesced():
+    """同名任务执行期间重复提交返回同一个任务，结束后可以再次提交"""
+    manager = JobManager(max_workers=1, max_pending=1)
+    release = threading.Event()
+    job, created = manager.submit('rebuild', _blocking(release))
+    again, created_again = manager.submit('rebuild', _blocking(release))
+    assert created and not created_again and again is job
+
+    release.set()
+    manager._executor.shutdown(wait=True)
+    assert job.status == 'success' and job.result == 'done'
+    manager._executor = None
+    assert manager.submit('rebuild', lambda job: None)[1]
+    manager._executor.shutdown(wait=True)
+
+
+def test_submit_raises_when_queue_is_full():
+    """执行中和排队的任务达到上限后拒绝新任务"""
+    manager = JobManager(max_workers=1, max_pending=1)
+    release = threading.Event()
+    manager.submit('a', _blocking(release))
+    manager.submit('b', _blocking(release))
+    with pytest.raises(JobQueueFull):
+        manager.submit('c', _blocking(release))
+    release.set()
+    manager._executor.shutdown(wait=True)
+
+
+def test_job_routes_require_login(app):
+    client = app.test_client()
+    assert client.get('/api/jobs').status_code == 401
+    assert client.get('/api/jobs/unknown').status_code == 401
+
+    headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+    assert client.get('/api/jobs', headers=headers).status_code == 200
+    assert client.get('/api/jobs/unknown', headers=headers).status_code == 404
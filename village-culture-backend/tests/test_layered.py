@@ -0,0 +1,21 @@
+from app.services.layered import LayeredDict
+
+
+def test_updated_leaves_previous_version_unchanged():
+    base = {key: key * 10 for key in range(100)}
+    first = LayeredDict.of(base)
+    second = first.updated({1: 'a', 200: 'b'}, removed=[2, 300])
+
+    assert second[1] == 'a' and second[200] == 'b' and 2 not in second
+    assert len(second) == 100 and sorted(second)[-1] == 200
+    assert first[1] == 10 and 200 not in first and first[2] == 20 and len(first) == 100
+    assert base == {key: key * 10 for key in range(100)}
+
+
+def test_layers_are_merged_logarithmically():
+    version = LayeredDict.of({key: 0 for key in range(1024)})
+    for step in range(1, 300):
+        version = version.updated({step % 50: step})
+    assert version.depth <= 11
+    assert len(version) == 1024
+    assert version[49] == 299 and version[0] == 250
@@ -0,0 +1,55 @@
+from app.models import Culture
+from app.services import leaderboard as leaderboard_module
+from app.services.leaderboard import HotLeaderboard
+
+
+def _set_views(db, views):
+    for culture_id, view_count in views.items():
+        db.session.get(Culture, culture_id).view_count = view_count
+    db.session.commit()
+
+
+def test_update_reorders_without_database(db, query_counter):
+    _set_views(db, {1: 10, 2: 5, 3: 5})
+    board = HotLeaderboard()
+    board.reconcile()
+    assert board.top(3) == [1, 2, 3]
+
+    culture = db.session.get(Culture, 3)
+    culture.view_count = 20
+    db.session.commit()
+    db.session.refresh(culture)
+    query_counter.clear()
+    board.update(culture)
+    assert board.top(3) == [3, 1, 2]
+    assert board.top(2, category_id=culture.category_id)[0] == 3
+    assert not query_counter
+
+
+def test_reconcile_picks_up_changes_from_other_processes(app, db, monkeypatch):
+    """其它进程写入的计数和下架在对账间隔后同步"""
+    _set_views(db, {1: 10, 2: 5})
+    board = HotLeaderboard()
+    assert board.top(2) == [1, 2]
+
+    _set_views(db, {2: 50})
+    db.session.get(Culture, 1).status = 0
+    db.session.commit()
+    assert board.top(2) == [1, 2]
+
+    now = leaderboard_module.time.monotonic()
+    interval = app.config['HOT_RECONCILE_SECONDS']
+    monkeypatch.setattr(leaderboard_module.time, 'monotonic', lambda: now + interval + 1)
+    assert board.top(1) == [2] and 1 not in board.top(40)
+
+
+def test_detail_survives_leaderboard_failure(app, db, monkeypatch):
+    """排行榜更新失败时详情仍正常返回，浏览量已计入"""
+    def fail(culture):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(leaderboard_module.hot_leaderboard, 'update', fail)
+    response = app.test_client().get('/api/content/detail/1')
+
+    assert response.status_code == 200 and response.get_json()['data']['id'] == 1
+    assert db.session.get(Culture, 1).view_count == 1
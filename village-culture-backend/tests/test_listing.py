@@ -0,0 +1,18 @@
+import pytest
+
+from app.services.categories import category_cache
+
+
+@pytest.mark.parametrize('url', ['/api/content/recommend', '/api/content/latest', '/api/content/category/2'])
+def test_list_pages_issue_no_lazy_loads(app, db, query_counter, url):
+    """列表和游标分页只执行一次分页查询，不为每一行补充加载列"""
+    client = app.test_client()
+    category_cache.names()
+    cursor = ''
+    for _ in range(2):
+        query_counter.clear()
+        data = client.get(url, query_string={'pageSize': 4, 'cursor': cursor}).get_json()['data']
+        cursor = data['nextCursor']
+        assert len(data['list']) == 4 and cursor
+        # 分页查询本身；浮点排序列的游标条件内含子查询，仍为同一条语句
+        assert len(query_counter) == 1, query_counter
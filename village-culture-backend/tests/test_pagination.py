@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from app.models import Culture
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def _walk(client, url, page_size, **params):
+    """按 nextCursor 逐页读取，返回全部ID和页数"""
+    ids, cursor, pages = [], '', 0
+    while cursor is not None:
+        data = client.get(url, query_string={'pageSize': page_size, 'cursor': cursor, **params}).get_json()['data']
+        ids += [item['id'] for item in data['list']]
+        cursor = data['nextCursor']
+        pages += 1
+    return ids, pages
+
+
+def test_cursor_pages_match_offset_order_with_ties(app, db):
+    """排序列取值相同时按ID继续排序，逐页读取不重复、不遗漏"""
+    same_time = datetime(2024, 1, 1)
+    for culture in Culture.query.all():
+        culture.created_at = same_time
+        culture.is_recommend = True
+        culture.score = float(culture.id % 3)
+    db.session.commit()
+    client = app.test_client()
+
+    latest, pages = _walk(client, '/api/content/latest', 7)
+    assert latest == list(range(40, 0, -1)) and pages == 6
+
+    recommend, _ = _walk(client, '/api/content/recommend', 6)
+    assert recommend == sorted(range(1, 41), key=lambda i: (-(i % 3), -i))
+
+    offset_pages = [client.get('/api/content/recommend', query_string={'page': page, 'pageSize': 6}).get_json()['data']
+                    for page in range(1, 8)]
+    assert [item['id'] for data in offset_pages for item in data['list']] == recommend
+    assert offset_pages[0]['total'] == 40 and not offset_pages[-1]['hasMore']
+
+
+@pytest.mark.parametrize('cursor', ['WzEsMl0', 'not-base64!', encode_cursor([1]), encode_cursor(['x', 1]),
+                                    encode_cursor([{'dt': '2024-01-01T00:00:00'}, True])])
+def test_bad_cursor_is_rejected(app, cursor):
+    response = app.test_client().get('/api/content/latest', query_string={'cursor': cursor})
+    assert response.status_code == 400
+
+
+def test_decode_cursor_checks_types():
+    when = datetime(2024, 1, 1, 12, 30)
+    assert decode_cursor(encode_cursor([2.5, when, 3]), [float, datetime, int]) == [2.5, when, 3]
+    assert decode_cursor(encode_cursor([2, when, 3]), [float, datetime, int])[0] == 2.0
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor([when, 3.5]), [datetime, int])
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(['5']), [int])
+
+
+def test_search_cursor_must_be_offset(app, db):
+    client = app.test_client()
+    for cursor in (encode_cursor(['1']), encode_cursor([-1]), encode_cursor([1, 2])):
+        assert client.get('/api/content/search', query_string={'keyword': '文化', 'cursor': cursor}).status_code == 400
+
+
+@pytest.mark.parametrize('requested, expected', [(0, 1), (-5, 1), (1000, 100), (15, 15)])
+def test_page_size_is_clamped(app, requested, expected):
+    data = app.test_client().get('/api/content/latest', query_string={'pageSize': requested}).get_json()['data']
+    assert data['pageSize'] == expected and len(data['list']) == min(expected, 40)
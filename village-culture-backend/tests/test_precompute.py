@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from app.models import UserBehavior, UserRecommendation
+from app.services import recommender as recommender_module
+from app.services.precompute import precompute_recommendations
+from app.services.recommender import RecommenderModel, get_personal_recommendations
+
+
+def _add_views(db, user_id, culture_ids):
+    for culture_id in culture_ids:
+        db.session.add(UserBehavior(user_id=user_id, culture_id=culture_id, behavior_type='view'))
+    db.session.commit()
+
+
+def _precompute(db, user_id, culture_ids):
+    db.session.add(UserRecommendation(user_id=user_id, algorithm='hybrid', updated_at=datetime.utcnow(),
+                                      culture_ids=','.join(map(str, culture_ids))))
+    db.session.commit()
+
+
+def test_precomputed_list_skips_items_seen_since(db, monkeypatch):
+    """预计算之后看过的内容不再推荐，剩余数量足够时不做在线计算"""
+    _add_views(db, 1, [1, 2, 3, 5])
+    _precompute(db, 1, [1, 5, 6, 7, 8])
+    online_calls = []
+    monkeypatch.setattr(recommender_module, '_compute_personal_recommendations',
+                        lambda *args: online_calls.append(args) or [])
+
+    assert get_personal_recommendations(1, n=3) == [6, 7, 8]
+    assert not online_calls
+
+
+def test_short_precomputed_list_is_topped_up_online(db, monkeypatch):
+    _add_views(db, 1, [1, 2, 3, 5])
+    _precompute(db, 1, [1, 5, 6, 7])
+    monkeypatch.setattr(recommender_module, '_compute_personal_recommendations',
+                        lambda user_id, n, algorithm: [6, 2, 9, 10, 11])
+
+    assert get_personal_recommendations(1, n=4) == [6, 7, 9, 10]
+
+
+def test_precompute_in_process_writes_unseen_items(db, monkeypatch):
+    monkeypatch.setattr(recommender_module.recommender, 'model', RecommenderModel())
+    for user_id in (1, 2, 3):
+        _add_views(db, user_id, [1, 2, 3, user_id + 3])
+
+    stats = precompute_recommendations(n=5, workers=1)
+
+    assert stats['users'] == stats['written'] == 3 and stats['workers'] == 1
+    row = db.session.get(UserRecommendation, 1)
+    assert row.get_culture_ids() and not set(row.get_culture_ids()) & {1, 2, 3, 4}
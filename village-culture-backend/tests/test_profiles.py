@@ -0,0 +1,35 @@
+from flask_jwt_extended import create_access_token
+
+from app.models import UserBehavior
+from app.services.profiles import UserProfileStore, user_profiles
+
+
+def test_profile_loads_with_one_query(db, query_counter):
+    for culture_id, behavior_type in ((1, 'view'), (1, 'like'), (2, 'view'), (5, 'collect')):
+        db.session.add(UserBehavior(user_id=1, culture_id=culture_id, behavior_type=behavior_type))
+    db.session.commit()
+    store = UserProfileStore()
+
+    query_counter.clear()
+    profile = store.get(1)
+    assert len(query_counter) == 1
+    assert profile.behavior_count == 4 and profile.item_ids == {1, 2, 5}
+    # 内容1、5属于分类2，内容2属于分类3
+    assert profile.category_weights == {2: 6.0, 3: 1.0}
+    assert profile.preferred_categories() == [2, 3]
+
+    store.get(1)
+    assert len(query_counter) == 1 and store.stats()['hits'] == 1
+
+
+def test_interaction_updates_cached_profile_without_reloading(app, db, query_counter):
+    """互动接口写入行为后累加到缓存的画像上，旧画像对象保持不变"""
+    before = user_profiles.get(1)
+    headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+    assert app.test_client().post('/api/interaction/add-history', json={'id': 7}, headers=headers).status_code == 200
+
+    query_counter.clear()
+    after = user_profiles.get(1)
+    assert not query_counter
+    assert after.item_ids == {7} and after.behavior_count == 1
+    assert before.item_ids == set() and before.behavior_count == 0
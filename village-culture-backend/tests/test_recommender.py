@@ -0,0 +1,243 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import UserBehavior
+from app.services.profiles import user_profiles
+from app.services.recommender import RecommenderSystem, BEHAVIOR_WEIGHTS
+
+
+def _add_views(db, user_id, culture_ids):
+    for culture_id in culture_ids:
+        db.session.add(UserBehavior(user_id=user_id, culture_id=culture_id, behavior_type='view'))
+    db.session.commit()
+
+
+def test_content_recommendation_query_count_independent_of_history(db, query_counter):
+    """内容推荐的查询次数和 SQL 长度不随用户历史长度增长"""
+    _add_views(db, 1, [1, 2, 3, 4])
+    _add_views(db, 2, [culture_id % 30 + 1 for culture_id in range(500)])
+    recommender = RecommenderSystem()
+
+    statements = {}
+    results = {}
+    for user_id in (1, 2):
+        user_profiles.clear()
+        query_counter.clear()
+        results[user_id] = recommender.recommend_by_content(user_id, n=5)
+        statements[user_id] = list(query_counter)
+
+    assert len(statements[1]) == len(statements[2]) <= 2
+    assert [len(statement) for statement in statements[1]] == [len(statement) for statement in statements[2]]
+    assert len(results[2]) == 5 and all(culture_id > 30 for culture_id in results[2])
+
+
+def _add_behavior(db, user_id, culture_id, days_ago=0, behavior_type='view'):
+    db.session.add(UserBehavior(user_id=user_id, culture_id=culture_id, behavior_type=behavior_type,
+                                created_at=datetime.utcnow() - timedelta(days=days_ago)))
+
+
+def test_fresh_cooccurrence_ranks_above_stale(db):
+    """时间衰减压低陈旧的共现：300天前共同浏览的物品排在今天共同浏览的物品之后"""
+    for user_id, culture_id in ((1, 1), (1, 2), (2, 1), (2, 2)):
+        _add_behavior(db, user_id, culture_id, days_ago=300)
+    for user_id, culture_id in ((3, 1), (3, 3), (4, 1), (4, 3)):
+        _add_behavior(db, user_id, culture_id)
+    _add_behavior(db, 5, 1)
+    db.session.commit()
+
+    for method in ('sparse', 'legacy'):
+        recommender = RecommenderSystem(similarity_method=method, half_life_days=30)
+        recommender.build_model()
+        neighbor_ids, sims = recommender.item_similarity.get(1)
+        sims = dict(zip(neighbor_ids.tolist(), sims.tolist()))
+        assert sims[3] > sims[2] * 100
+        assert recommender.recommend_by_cf(5, n=2) == [3, 2]
+
+
+def test_incremental_update_matches_full_build_with_decay(db, query_counter):
+    """开启衰减时增量更新不回查历史行为，只读取水位线之后的新行为"""
+    for user_id in range(1, 8):
+        for culture_id in range(user_id, user_id + 4):
+            _add_behavior(db, user_id, culture_id, days_ago=10 * culture_id)
+    db.session.commit()
+    recommender = RecommenderSystem(half_life_days=30)
+    recommender.build_model()
+
+    for user_id, culture_id in ((1, 5), (2, 9), (8, 1), (8, 2)):
+        _add_behavior(db, user_id, culture_id, behavior_type='like')
+    db.session.commit()
+    query_counter.clear()
+    assert recommender.update_incremental() == 4
+    assert len(query_counter) == 1
+
+    rebuilt = RecommenderSystem(half_life_days=30)
+    rebuilt.build_model()
+    assert dict(recommender.model.raw_user_item_matrix) == rebuilt.model.raw_user_item_matrix
+    for culture_id in range(1, 12):
+        ids, sims = recommender.item_similarity.get(culture_id)
+        expected_ids, expected_sims = rebuilt.item_similarity.get(culture_id)
+        assert dict(zip(ids.tolist(), sims.tolist())) == pytest.approx(
+            dict(zip(expected_ids.tolist(), expected_sims.tolist())), rel=1e-6)
+
+
+def test_incremental_update_cost_bounded_by_touched_rows(db):
+    """增量更新只计算受影响物品的近邻，不重写完整矩阵，新旧模型共享未变化的数据"""
+    for user_id in range(1, 11):
+        _add_views(db, user_id, range(user_id, user_id + 20))
+    recommender = RecommenderSystem(half_life_days=0)
+    old = recommender.build_model()
+    engine = old.similarity_engine
+    cooccurrence = engine.cooccurrence
+
+    computed = []
+    neighbors_of = engine.neighbors_of
+    engine.neighbors_of = lambda item_id: computed.append(item_id) or neighbors_of(item_id)
+    _add_views(db, 1, [35])
+    assert recommender.update_incremental() == 1
+    new = recommender.model
+
+    assert sorted(computed) == list(range(1, 21)) + [35]
+    assert engine.cooccurrence is cooccurrence
+    assert new.user_item_matrix._layers[0] is old.user_item_matrix
+    assert new.user_item_matrix[2] is old.user_item_matrix[2]
+    assert 35 not in old.user_item_matrix[1] and 35 in new.user_item_matrix[1]
+    assert new.item_similarity.get(30)[0] is old.item_similarity.get(30)[0]
+
+    rebuilt = RecommenderSystem(half_life_days=0)
+    rebuilt.build_model()
+    for culture_id in range(1, 36):
+        ids, sims = new.item_similarity.get(culture_id)
+        expected_ids, expected_sims = rebuilt.item_similarity.get(culture_id)
+        assert dict(zip(ids.tolist(), sims.tolist())) == pytest.approx(
+            dict(zip(expected_ids.tolist(), expected_sims.tolist())), rel=1e-6)
+
+
+def test_refresh_from_snapshot_keeps_newer_local_model(db, tmp_path):
+    """本进程重建的模型不会被水位线更旧的快照替换，水位线更新的快照仍会加载"""
+    _add_views(db, 1, [1, 2, 3])
+    _add_views(db, 2, [1, 2])
+    writer = RecommenderSystem()
+    writer.build_model()
+    writer.save_snapshot(str(tmp_path))
+
+    _add_views(db, 3, [2, 3])
+    local = RecommenderSystem()
+    local.build_model()
+    assert not local.refresh_from_snapshot(str(tmp_path), interval=0)
+    assert local.model.snapshot_version is None
+    assert 3 in local.user_item_matrix
+
+    fresh = RecommenderSystem()
+    assert fresh.refresh_from_snapshot(str(tmp_path), interval=0)
+
+    _add_views(db, 4, [1, 3])
+    writer.build_model()
+    writer.save_snapshot(str(tmp_path))
+    assert local.refresh_from_snapshot(str(tmp_path), interval=0)
+    assert local.model.snapshot_version == 'v2'
+    assert 4 in local.user_item_matrix
+
+
+def test_neighbor_pruning_reads_config(app, db):
+    """近邻表的 K、最低相似度和最少共同用户数可以通过配置调整"""
+    for user_id in range(1, 6):
+        _add_views(db, user_id, [1, 2])
+    _add_views(db, 6, [1, 3])
+    for culture_id in range(4, 10):
+        _add_views(db, 7, [1, culture_id])
+
+    default = RecommenderSystem(half_life_days=0).build_model().item_similarity
+    assert len(default.get(1)[0]) == 8
+
+    app.config.update(NEIGHBOR_K=3, NEIGHBOR_MIN_SUPPORT=2)
+    pruned = RecommenderSystem(half_life_days=0).build_model().item_similarity
+    ids, sims = pruned.get(1)
+    assert ids.tolist() == [2]
+    assert pruned.k == 3 and pruned.min_support == 2
+
+    app.config.update(NEIGHBOR_MIN_SUPPORT=1, NEIGHBOR_MIN_SIMILARITY=0.3)
+    ids, sims = RecommenderSystem(half_life_days=0).build_model().item_similarity.get(1)
+    assert len(ids) <= 3 and (sims >= 0.3).all()
+
+
+def test_streaming_build_matches_python_accumulation(db):
+    """分块流式聚合构建的用户-物品矩阵与逐条累加的结果一致"""
+    types = ('view', 'like', 'collect', 'share')
+    expected = {}
+    for index in range(60):
+        user_id, culture_id, behavior_type = index % 7 + 1, index % 11 + 1, types[index % 4]
+        _add_behavior(db, user_id, culture_id, behavior_type=behavior_type)
+        row = expected.setdefault(user_id, {})
+        row[culture_id] = row.get(culture_id, 0.0) + BEHAVIOR_WEIGHTS[behavior_type]
+    db.session.commit()
+
+    model = RecommenderSystem(chunk_size=4, half_life_days=0).build_user_item_matrix()
+
+    assert model.user_item_matrix == expected
+    assert model.last_behavior_id == 60
+
+
+def test_update_scores_writes_only_changed_rows(db):
+    """分数按热度和发布时间计算，分数未变化的内容不再写回"""
+    from app.models import Culture
+
+    culture = db.session.get(Culture, 1)
+    culture.view_count, culture.like_count, culture.collect_count, culture.share_count = 100, 5, 2, 1
+    culture.created_at = datetime.utcnow() - timedelta(days=100)
+    db.session.commit()
+
+    stats = RecommenderSystem().update_scores()
+    assert stats['rows'] == 40 and stats['updated'] == 40
+    assert db.session.get(Culture, 1).score == pytest.approx((10 + 5 + 4 + 3) / 2.0)
+    assert db.session.get(Culture, 2).score == 0.0
+
+    assert RecommenderSystem().update_scores()['updated'] == 0
+
+
+def test_rebuild_swaps_whole_model_and_clears_cache(db):
+    """重建在新对象上完成后整体发布：持有旧模型的读取方不受影响，推荐缓存清空"""
+    from app.services.cache import recommendation_cache
+
+    _add_views(db, 1, [1, 2])
+    _add_views(db, 2, [1, 2])
+    recommender = RecommenderSystem(half_life_days=0)
+    old = recommender.build_model()
+    old_neighbors = old.item_similarity.get(1)[0].tolist()
+    recommendation_cache.set(1, (10, 'hybrid'), [2])
+
+    _add_views(db, 3, [1, 3])
+    _add_views(db, 4, [1, 3])
+    new = recommender.build_model()
+
+    assert recommender.model is new and new is not old
+    assert old.item_similarity.get(1)[0].tolist() == old_neighbors == [2]
+    assert sorted(new.item_similarity.get(1)[0].tolist()) == [2, 3]
+    assert recommendation_cache.get(1, (10, 'hybrid')) is None
+
+
+def test_concurrent_ensure_model_builds_once(app, db, monkeypatch):
+    import threading
+
+    _add_views(db, 1, [1, 2])
+    recommender = RecommenderSystem(half_life_days=0)
+    builds = []
+    build = recommender.build_user_item_matrix
+
+    def counted_build(*args, **kwargs):
+        builds.append(1)
+        return build(*args, **kwargs)
+
+    monkeypatch.setattr(recommender, 'build_user_item_matrix', counted_build)
+    models = []
+
+    def worker():
+        with app.app_context():
+            models.append(recommender.ensure_model())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1 and len({id(model) for model in models}) == 1
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from app.models import Culture
+from app.services.search import SearchIndex
+
+
+def _rename(db, names):
+    for culture_id, name in names.items():
+        db.session.get(Culture, culture_id).name = name
+    db.session.commit()
+
+
+def test_single_character_query_matches(db):
+    """单字查询命中包含该字的内容，多字查询仍按二元组匹配"""
+    _rename(db, {1: '北京剪纸', 2: '京剧脸谱', 3: '蔚县剪纸', 4: '景德镇陶瓷'})
+    index = SearchIndex()
+
+    ids, total = index.search('京')
+    assert sorted(ids) == [1, 2] and total == 2
+    ids, total = index.search('剪')
+    assert sorted(ids) == [1, 3] and total == 2
+    ids, total = index.search('剪纸')
+    assert sorted(ids) == [1, 3] and total == 2
+
+
+def test_old_index_file_is_rebuilt(db, tmp_path):
+    """格式版本不匹配的索引文件不加载"""
+    path = str(tmp_path / 'search_index.npz')
+    index = SearchIndex()
+    index.build()
+    index.save(path)
+    assert SearchIndex().load(path)
+
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files if name != 'format'}
+    np.savez(path, **arrays)
+    assert not SearchIndex().load(path)
+
+
+
+def test_deactivated_content_is_excluded_from_total(db):
+    """下架的内容在分数刷新后不再命中，命中总数随之减少"""
+    _rename(db, {culture_id: f'剪纸{culture_id}' for culture_id in range(1, 6)})
+    index = SearchIndex()
+    index.build()
+    assert index.search('剪纸')[1] == 5
+
+    db.session.get(Culture, 2).status = 0
+    db.session.commit()
+    index.refresh_scores()
+    ids, total = index.search('剪纸', offset=2, limit=2)
+    assert total == 4 and 2 not in ids and len(ids) == 2
+
+
+def test_concurrent_add_new_appends_once(db, monkeypatch):
+    """并发补充新内容时同一批内容只追加一次"""
+    index = SearchIndex()
+    index.build()
+    new_docs = [(41, 0.0, Counter({'剪纸': 1}))]
+
+    def load_docs(min_id=0):
+        time.sleep(0.05)
+        return new_docs if min_id < 41 else []
+
+    monkeypatch.setattr(index, '_load_docs', load_docs)
+    threads = [threading.Thread(target=index.add_new) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert index.doc_ids.tolist().count(41) == 1
+    assert len(index.doc_active) == len(index.doc_ids) == 41
@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+
+from app.models import UserBehavior
+from app.services import snapshot
+from app.services.recommender import RecommenderSystem
+
+
+def _add_views(db, user_id, culture_ids):
+    for culture_id in culture_ids:
+        db.session.add(UserBehavior(user_id=user_id, culture_id=culture_id, behavior_type='view'))
+    db.session.commit()
+
+
+def test_snapshot_round_trip_gives_same_recommendations(db, tmp_path):
+    """从快照（内存映射）加载的模型与构建出的模型推荐结果一致"""
+    for user_id in range(1, 9):
+        _add_views(db, user_id, range(user_id, user_id + 6))
+    built = RecommenderSystem(half_life_days=0)
+    built.build_model()
+    version = built.save_snapshot(str(tmp_path))
+
+    loaded = RecommenderSystem()
+    assert loaded.load_snapshot(str(tmp_path))
+    assert loaded.snapshot_version == version == snapshot.current_version(str(tmp_path))
+    assert isinstance(loaded.item_similarity.get(3)[0].base, np.memmap)
+    assert dict(loaded.user_item_matrix[2]) == built.user_item_matrix[2]
+    for user_id in range(1, 10):
+        assert loaded.recommend_by_cf(user_id, n=5) == built.recommend_by_cf(user_id, n=5)
+
+
+def test_old_versions_are_pruned(db, tmp_path):
+    _add_views(db, 1, [1, 2])
+    recommender = RecommenderSystem(half_life_days=0)
+    recommender.build_model()
+    for _ in range(5):
+        recommender.save_snapshot(str(tmp_path))
+
+    versions = sorted(name for name in os.listdir(tmp_path) if name.startswith('v'))
+    assert versions == ['v3', 'v4', 'v5']
+    assert snapshot.current_version(str(tmp_path)) == 'v5'
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from app.models import Culture
+from app.services import suggest as suggest_module
+from app.services.suggest import SuggestIndex
+
+
+def test_prefix_matches_name_and_pinyin(db):
+    db.session.get(Culture, 1).name = '剪纸'
+    db.session.get(Culture, 2).name = '剪刀'
+    db.session.commit()
+    index = SuggestIndex()
+
+    assert [item['id'] for item in index.suggest('剪')] == [2, 1]
+    assert [item['text'] for item in index.suggest('剪纸')] == ['剪纸']
+    if suggest_module.HAS_PYPINYIN:
+        assert [item['text'] for item in index.suggest('jianzhi')] == ['剪纸']
+        assert [item['text'] for item in index.suggest('jz')] == ['剪纸']
+
+
+def test_concurrent_first_use_builds_once(app, monkeypatch):
+    """并发的首次请求只构建一次，其余线程等待构建完成后直接使用"""
+    index = SuggestIndex()
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        index._built_at = index._checked_at = time.monotonic()
+        return 0
+
+    monkeypatch.setattr(index, '_build', build)
+
+    def worker():
+        with app.app_context():
+            index.refresh()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
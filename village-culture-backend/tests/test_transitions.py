@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from app.models import UserBehavior
+from app.routes import interaction as interaction_routes
+from app.services import recommender as recommender_module
+from app.services.transitions import SuccessorCounter, TransitionModel
+
+
+def test_successor_counter_keeps_frequent_items():
+    counter = SuccessorCounter(capacity=2)
+    for item_id in [1, 1, 1, 1, 2, 3, 3, 4]:
+        counter.add(item_id)
+    assert counter.top(1) == [1] and len(counter.counts) == 2
+
+
+def test_build_counts_transitions_within_session(db):
+    """只统计会话窗口内的连续浏览"""
+    now = datetime.utcnow()
+    for user_id, culture_id, minutes_ago in ((1, 1, 50), (1, 2, 45), (1, 3, 5),
+                                             (2, 1, 20), (2, 2, 10), (3, 1, 15), (3, 4, 14)):
+        db.session.add(UserBehavior(user_id=user_id, culture_id=culture_id, behavior_type='view',
+                                    created_at=now - timedelta(minutes=minutes_ago)))
+    db.session.commit()
+    model = TransitionModel()
+
+    assert model.build() == 7
+    assert model.next_items(1) == [2, 4]
+    assert model.next_items(2) == []
+
+
+def test_add_history_feeds_model_without_queries(app, db, monkeypatch, query_counter):
+    """浏览记录接口直接累加转移，读取“接着看”时不访问数据库"""
+    model = TransitionModel()
+    model.build()
+    monkeypatch.setattr(interaction_routes, 'transition_model', model)
+    monkeypatch.setattr(recommender_module, 'transition_model', model)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+
+    for culture_id in (7, 8, 7, 9):
+        assert client.post('/api/interaction/add-history', json={'id': culture_id}, headers=headers).status_code == 200
+    query_counter.clear()
+    assert model.next_items(7) == [8, 9]
+    assert not query_counter
+
+    recommender_module.rebuild_transitions()
+    assert model.next_items(7) == [8, 9]
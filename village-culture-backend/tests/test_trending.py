@@ -0,0 +1,42 @@
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app.routes import interaction as interaction_routes
+from app.services.trending import TrendingCounter
+
+
+def test_burst_ranks_above_steady_traffic():
+    """最近一小时突然增长的内容排在长期稳定的内容之前，过期的桶不再计入"""
+    counter = TrendingCounter()
+    counter._loaded = True
+    now = time.time()
+    for hour in range(24):
+        for _ in range(3):
+            counter.record(1, 'view', now - hour * 3600 - 60)
+    for _ in range(10):
+        counter.record(2, 'view', now - 60)
+    counter.record(2, 'like', now - 25 * 3600)
+
+    assert counter.top(2, now=now)[0][0] == 2
+    assert counter.scores(now=now)[2][1] == 10
+    assert counter.scores(now=now + 25 * 3600) == {} and counter.memory_usage()['items'] == 0
+
+
+def test_live_counts_match_backfill(app, db, monkeypatch):
+    """实时计数与重启后从用户行为回填的结果一致，详情浏览不单独计数"""
+    live = TrendingCounter()
+    live._loaded = True
+    monkeypatch.setattr(interaction_routes, 'trending', live)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+
+    for _ in range(3):
+        client.get('/api/content/detail/5')
+        assert client.post('/api/interaction/add-history', json={'id': 5}, headers=headers).status_code == 200
+    assert client.post('/api/interaction/like', json={'id': 5}, headers=headers).status_code == 200
+
+    backfilled = TrendingCounter()
+    backfilled.load()
+    assert live.scores() == backfilled.scores()
+    assert live.scores()[5][1] == 3 * 1.0 + 2.0